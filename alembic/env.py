@@ -12,6 +12,7 @@ from src.base.models import Base
 from src.checks.models import Check  # noqa: F401
 from src.checks.models import CheckPayment  # noqa: F401
 from src.checks.models import CheckProduct  # noqa: F401
+from src.checks.partitions import partition_month
 from src.conf.settings import settings
 from src.users.models import User  # noqa: F401
 
@@ -40,6 +41,26 @@ if config.config_file_name is not None:
 target_metadata = Base.metadata
 
 
+def include_object(object, name, type_, reflected, compare_to):
+    """
+    Skip optional indexes that are created by migration flags only, e.g. `-x brin=true`,
+    partitions of the partitioned tables, which are created at runtime, and the per-partition copies of foreign keys
+    referencing them
+    """
+    if type_ == "index" and reflected and compare_to is None and name.endswith("_brin"):
+        return False
+    if type_ == "table" and reflected and compare_to is None and partition_month(name) is not None:
+        return False
+    if (
+        type_ == "foreign_key_constraint"
+        and reflected
+        and compare_to is None
+        and partition_month(object.referred_table.name) is not None
+    ):
+        return False
+    return True
+
+
 # other values from the config, defined by the needs of env.py,
 # can be acquired:
 # my_important_option = config.get_main_option("my_important_option")
@@ -62,6 +83,7 @@ def run_migrations_offline() -> None:
     context.configure(
         url=url,
         target_metadata=target_metadata,
+        include_object=include_object,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
     )
@@ -84,7 +106,7 @@ def run_migrations_online() -> None:
     )
 
     with connectable.connect() as connection:
-        context.configure(connection=connection, target_metadata=target_metadata)
+        context.configure(connection=connection, target_metadata=target_metadata, include_object=include_object)
 
         with context.begin_transaction():
             context.run_migrations()
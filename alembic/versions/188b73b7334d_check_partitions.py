@@ -0,0 +1,135 @@
+"""check partitions
+
+Revision ID: 188b73b7334d
+Revises: 279f9e1b9806
+Create Date: 2026-10-18 11:52:37.250677
+
+Rebuilds checks, check_payments and check_products as tables partitioned by month of the check creation time.
+The child tables get the `check_created_at` partition key and reference checks by (id, created_at). Rows are copied
+into partitions covering the existing checks and the next months, later months are created by the application,
+see `src.checks.partitions`.
+
+The tables are rewritten under an exclusive lock, run it in a maintenance window on large databases.
+"""
+
+from typing import Sequence
+from typing import Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "188b73b7334d"
+down_revision: Union[str, None] = "279f9e1b9806"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+MONTHS_AHEAD = 3
+# (table, partition key, indexes), the parent table first
+TABLES = (
+    (
+        "checks",
+        "created_at",
+        (
+            ("ix_checks_user_id_created_at_id", "user_id, created_at, id"),
+            ("ix_checks_user_id_total_id", "user_id, total, id"),
+            ("ix_checks_user_id_payment_type_created_at_id", "user_id, payment_type, created_at, id"),
+        ),
+    ),
+    ("check_payments", "check_created_at", (("ix_check_payments_check_id_type", "check_id, type"),)),
+    ("check_products", "check_created_at", (("ix_check_products_check_id", "check_id"),)),
+)
+BRIN_INDEX = "ix_checks_created_at_brin"
+
+
+def rebuild_tables(partitioned: bool) -> None:
+    """Copy the tables into new ones, partitioned or plain, and restore their keys and indexes"""
+    brin = op.get_bind().exec_driver_sql(f"SELECT to_regclass('{BRIN_INDEX}')").scalar() is not None
+    op.execute("LOCK TABLE checks, check_payments, check_products IN EXCLUSIVE MODE")
+    for table, _, _ in TABLES:
+        op.execute(f"ALTER SEQUENCE {table}_id_seq OWNED BY NONE")
+        op.execute(f"ALTER TABLE {table} RENAME TO {table}_old")
+
+    for table, key, _ in TABLES:
+        if not partitioned:
+            op.execute(f"CREATE TABLE {table} (LIKE {table}_old INCLUDING DEFAULTS)")
+        elif table == "checks":
+            op.execute(f"CREATE TABLE {table} (LIKE {table}_old INCLUDING DEFAULTS) PARTITION BY RANGE ({key})")
+        else:
+            # the partition key of the child tables, the creation time of their check
+            column = f"{key} timestamp without time zone NOT NULL"
+            op.execute(
+                f"CREATE TABLE {table} (LIKE {table}_old INCLUDING DEFAULTS, {column}) PARTITION BY RANGE ({key})"
+            )
+    if partitioned:
+        op.execute(
+            f"""
+            DO $$
+            DECLARE
+                partition_month timestamp;
+                table_name text;
+            BEGIN
+                FOR partition_month IN
+                    SELECT generate_series(
+                        date_trunc('month', coalesce((SELECT min(created_at) FROM checks_old), localtimestamp)),
+                        date_trunc('month', localtimestamp) + interval '{MONTHS_AHEAD} months',
+                        interval '1 month'
+                    )
+                LOOP
+                    FOREACH table_name IN ARRAY ARRAY['checks', 'check_payments', 'check_products'] LOOP
+                        EXECUTE format(
+                            'CREATE TABLE %I PARTITION OF %I FOR VALUES FROM (%L) TO (%L)',
+                            table_name || '_p' || to_char(partition_month, 'YYYYMM'),
+                            table_name,
+                            partition_month,
+                            partition_month + interval '1 month'
+                        );
+                    END LOOP;
+                END LOOP;
+            END
+            $$
+            """
+        )
+
+    op.execute("INSERT INTO checks SELECT * FROM checks_old")
+    for table in ("check_payments", "check_products"):
+        if partitioned:
+            op.execute(
+                f"""
+                INSERT INTO {table}
+                SELECT {table}_old.*, checks_old.created_at
+                FROM {table}_old
+                JOIN checks_old ON checks_old.id = {table}_old.check_id
+                """
+            )
+        else:
+            op.execute(f"INSERT INTO {table} SELECT * FROM {table}_old")
+            op.execute(f"ALTER TABLE {table} DROP COLUMN check_created_at")
+    for table, _, _ in reversed(TABLES):
+        op.execute(f"DROP TABLE {table}_old")
+
+    if partitioned:
+        check_key, child_key = "id, created_at", "id, check_created_at"
+        reference = "(check_id, check_created_at) REFERENCES checks (id, created_at)"
+    else:
+        check_key, child_key, reference = "id", "id", "(check_id) REFERENCES checks (id)"
+    op.execute(f"ALTER TABLE checks ADD PRIMARY KEY ({check_key})")
+    op.execute("ALTER TABLE checks ADD FOREIGN KEY (user_id) REFERENCES users (id)")
+    for table in ("check_payments", "check_products"):
+        op.execute(f"ALTER TABLE {table} ADD PRIMARY KEY ({child_key})")
+        op.execute(f"ALTER TABLE {table} ADD FOREIGN KEY {reference}")
+    for table, _, indexes in TABLES:
+        for name, columns in indexes:
+            op.execute(f"CREATE INDEX {name} ON {table} ({columns})")
+        op.execute(f"ALTER SEQUENCE {table}_id_seq OWNED BY {table}.id")
+    if brin:
+        op.execute(f"CREATE INDEX {BRIN_INDEX} ON checks USING brin (created_at)")
+
+
+def upgrade() -> None:
+    rebuild_tables(partitioned=True)
+
+
+def downgrade() -> None:
+    rebuild_tables(partitioned=False)
@@ -0,0 +1,71 @@
+"""product names
+
+Revision ID: 231c38e32cc9
+Revises: 188b73b7334d
+Create Date: 2026-10-18 12:31:05.418226
+
+Moves product names of check_products into the product_names dictionary, products refer to their names by id.
+Every check_products row is rewritten, run VACUUM FULL check_products afterwards to give the space back.
+"""
+
+from typing import Sequence
+from typing import Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "231c38e32cc9"
+down_revision: Union[str, None] = "188b73b7334d"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "product_names",
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), server_default=sa.text("now()"), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("name"),
+    )
+    op.execute(
+        """
+        INSERT INTO product_names (name, updated_at)
+        SELECT name, now()
+        FROM check_products
+        GROUP BY name
+        ORDER BY name
+        """
+    )
+    op.add_column("check_products", sa.Column("name_id", sa.Integer(), nullable=True))
+    op.execute(
+        """
+        UPDATE check_products
+        SET name_id = product_names.id
+        FROM product_names
+        WHERE product_names.name = check_products.name
+        """
+    )
+    op.alter_column("check_products", "name_id", nullable=False)
+    op.create_foreign_key(None, "check_products", "product_names", ["name_id"], ["id"])
+    op.drop_column("check_products", "name")
+
+
+def downgrade() -> None:
+    op.add_column("check_products", sa.Column("name", sa.String(), nullable=True))
+    op.execute(
+        """
+        UPDATE check_products
+        SET name = product_names.name
+        FROM product_names
+        WHERE product_names.id = check_products.name_id
+        """
+    )
+    op.alter_column("check_products", "name", nullable=False)
+    op.drop_column("check_products", "name_id")
+    op.drop_table("product_names")
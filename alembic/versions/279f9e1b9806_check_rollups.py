@@ -0,0 +1,78 @@
+"""check rollups
+
+Revision ID: 279f9e1b9806
+Revises: 7752e422ac98
+Create Date: 2026-10-18 11:37:34.107769
+
+"""
+
+from typing import Sequence
+from typing import Union
+
+import sqlalchemy as sa
+
+from sqlalchemy.dialects import postgresql
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "279f9e1b9806"
+down_revision: Union[str, None] = "7752e422ac98"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("check_daily_stats", sa.Column("total_amount", sa.Numeric(), nullable=True))
+    op.execute(
+        """
+        UPDATE check_daily_stats
+        SET total_amount = coalesce(
+            (
+                SELECT sum(checks.total)
+                FROM checks
+                WHERE checks.user_id = check_daily_stats.user_id
+                    AND checks.created_at >= check_daily_stats.day
+                    AND checks.created_at < check_daily_stats.day + 1
+                    AND checks.payment_type = check_daily_stats.payment_type
+            ),
+            0
+        )
+        """
+    )
+    op.alter_column("check_daily_stats", "total_amount", nullable=False)
+    op.create_table(
+        "check_monthly_stats",
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("month", sa.Date(), nullable=False),
+        sa.Column(
+            "payment_type",
+            postgresql.ENUM("cash", "card", name="paymenttypeenum", create_type=False),
+            nullable=False,
+        ),
+        sa.Column("checks_count", sa.Integer(), nullable=False),
+        sa.Column("total_amount", sa.Numeric(), nullable=False),
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), server_default=sa.text("now()"), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(
+            ["user_id"],
+            ["users.id"],
+        ),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("user_id", "month", "payment_type"),
+    )
+    op.execute(
+        """
+        INSERT INTO check_monthly_stats (user_id, month, payment_type, checks_count, total_amount, updated_at)
+        SELECT user_id, date_trunc('month', day)::date, payment_type, sum(checks_count), sum(total_amount), now()
+        FROM check_daily_stats
+        GROUP BY user_id, date_trunc('month', day), payment_type
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("check_monthly_stats")
+    op.drop_column("check_daily_stats", "total_amount")
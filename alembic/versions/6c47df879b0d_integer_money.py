@@ -0,0 +1,114 @@
+"""integer money
+
+Revision ID: 6c47df879b0d
+Revises: aa47a982be90
+Create Date: 2026-10-18 14:02:17.264815
+
+Stores amounts as integer kopecks and product quantities as integer thousandths, see src.checks.money.
+Amounts are rounded half up to kopecks, product totals are recomputed from the converted prices and quantities,
+and totals of checks and rollups from the product totals, as new checks are created. Every row of the check tables
+is rewritten once.
+"""
+
+from typing import Sequence
+from typing import Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "6c47df879b0d"
+down_revision: Union[str, None] = "aa47a982be90"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # USING expressions see the old values of all columns of the statement
+    op.execute(
+        """
+        ALTER TABLE check_products
+            ALTER COLUMN price TYPE bigint USING round(price * 100),
+            ALTER COLUMN quantity TYPE bigint USING round(quantity * 1000),
+            ALTER COLUMN total TYPE bigint USING round(round(price * 100) * round(quantity * 1000) / 1000)
+        """
+    )
+    op.execute("ALTER TABLE check_payments ALTER COLUMN amount TYPE bigint USING round(amount * 100)")
+    op.execute(
+        """
+        ALTER TABLE checks
+            ALTER COLUMN total TYPE bigint USING round(total * 100),
+            ALTER COLUMN rest TYPE bigint USING round(paid_amount * 100) - round(total * 100),
+            ALTER COLUMN paid_amount TYPE bigint USING round(paid_amount * 100)
+        """
+    )
+    op.execute(
+        """
+        UPDATE checks
+        SET total = products.total, rest = checks.paid_amount - products.total
+        FROM (
+            SELECT check_id, check_created_at, sum(total) AS total
+            FROM check_products
+            GROUP BY check_id, check_created_at
+        ) products
+        WHERE products.check_id = checks.id
+            AND products.check_created_at = checks.created_at
+            AND products.total <> checks.total
+        """
+    )
+    for table in ("check_daily_stats", "check_monthly_stats"):
+        op.execute(f"ALTER TABLE {table} ALTER COLUMN total_amount TYPE bigint USING round(total_amount * 100)")
+    op.execute(
+        """
+        UPDATE check_daily_stats
+        SET total_amount = checks.total_amount
+        FROM (
+            SELECT user_id, CAST(created_at AS date) AS day, payment_type, sum(total) AS total_amount
+            FROM checks
+            GROUP BY user_id, CAST(created_at AS date), payment_type
+        ) checks
+        WHERE checks.user_id = check_daily_stats.user_id
+            AND checks.day = check_daily_stats.day
+            AND checks.payment_type = check_daily_stats.payment_type
+            AND checks.total_amount <> check_daily_stats.total_amount
+        """
+    )
+    op.execute(
+        """
+        UPDATE check_monthly_stats
+        SET total_amount = daily.total_amount
+        FROM (
+            SELECT
+                user_id, CAST(date_trunc('month', day) AS date) AS month, payment_type,
+                sum(total_amount) AS total_amount
+            FROM check_daily_stats
+            GROUP BY user_id, CAST(date_trunc('month', day) AS date), payment_type
+        ) daily
+        WHERE daily.user_id = check_monthly_stats.user_id
+            AND daily.month = check_monthly_stats.month
+            AND daily.payment_type = check_monthly_stats.payment_type
+            AND daily.total_amount <> check_monthly_stats.total_amount
+        """
+    )
+
+
+def downgrade() -> None:
+    for table in ("check_daily_stats", "check_monthly_stats"):
+        op.execute(f"ALTER TABLE {table} ALTER COLUMN total_amount TYPE numeric USING total_amount * 0.01")
+    op.execute(
+        """
+        ALTER TABLE checks
+            ALTER COLUMN total TYPE numeric USING total * 0.01,
+            ALTER COLUMN rest TYPE numeric USING rest * 0.01,
+            ALTER COLUMN paid_amount TYPE numeric USING paid_amount * 0.01
+        """
+    )
+    op.execute("ALTER TABLE check_payments ALTER COLUMN amount TYPE numeric USING amount * 0.01")
+    op.execute(
+        """
+        ALTER TABLE check_products
+            ALTER COLUMN price TYPE numeric USING price * 0.01,
+            ALTER COLUMN quantity TYPE numeric USING quantity * 0.001,
+            ALTER COLUMN total TYPE numeric USING total * 0.01
+        """
+    )
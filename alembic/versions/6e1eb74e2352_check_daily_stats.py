@@ -0,0 +1,59 @@
+"""check daily stats
+
+Revision ID: 6e1eb74e2352
+Revises: 7ef545d69f2f
+Create Date: 2026-10-18 10:32:11.524108
+
+"""
+
+from typing import Sequence
+from typing import Union
+
+import sqlalchemy as sa
+
+from sqlalchemy.dialects import postgresql
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "6e1eb74e2352"
+down_revision: Union[str, None] = "7ef545d69f2f"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "check_daily_stats",
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column(
+            "payment_type",
+            postgresql.ENUM("cash", "card", name="paymenttypeenum", create_type=False),
+            nullable=False,
+        ),
+        sa.Column("checks_count", sa.Integer(), nullable=False),
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), server_default=sa.text("now()"), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(
+            ["user_id"],
+            ["users.id"],
+        ),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("user_id", "day", "payment_type"),
+    )
+    op.execute(
+        """
+        INSERT INTO check_daily_stats (user_id, day, payment_type, checks_count, updated_at)
+        SELECT checks.user_id, checks.created_at::date, check_payments.type, count(*), now()
+        FROM checks
+        JOIN check_payments ON check_payments.check_id = checks.id
+        GROUP BY checks.user_id, checks.created_at::date, check_payments.type
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("check_daily_stats")
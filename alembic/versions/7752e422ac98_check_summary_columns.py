@@ -0,0 +1,71 @@
+"""check summary columns
+
+Revision ID: 7752e422ac98
+Revises: be347c2366c4
+Create Date: 2026-10-18 11:08:42.911354
+
+"""
+
+from typing import Sequence
+from typing import Union
+
+import sqlalchemy as sa
+
+from sqlalchemy.dialects import postgresql
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "7752e422ac98"
+down_revision: Union[str, None] = "be347c2366c4"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "checks",
+        sa.Column(
+            "payment_type",
+            postgresql.ENUM("cash", "card", name="paymenttypeenum", create_type=False),
+            nullable=True,
+        ),
+    )
+    op.add_column("checks", sa.Column("paid_amount", sa.Numeric(), nullable=True))
+    op.add_column("checks", sa.Column("products_count", sa.Integer(), nullable=True))
+    op.execute(
+        """
+        UPDATE checks
+        SET payment_type = check_payments.type,
+            paid_amount = check_payments.amount,
+            products_count = (SELECT count(*) FROM check_products WHERE check_products.check_id = checks.id)
+        FROM check_payments
+        WHERE check_payments.check_id = checks.id
+        """
+    )
+    op.alter_column("checks", "payment_type", nullable=False)
+    op.alter_column("checks", "paid_amount", nullable=False)
+    op.alter_column("checks", "products_count", nullable=False)
+    # CheckService.get_user_checks filtered by payment_type: WHERE user_id = ? AND payment_type = ? ORDER BY created_at
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_checks_user_id_payment_type_created_at_id",
+            "checks",
+            ["user_id", "payment_type", "created_at", "id"],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_checks_user_id_payment_type_created_at_id",
+            table_name="checks",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+    op.drop_column("checks", "products_count")
+    op.drop_column("checks", "paid_amount")
+    op.drop_column("checks", "payment_type")
@@ -0,0 +1,45 @@
+"""product name search
+
+Revision ID: aa47a982be90
+Revises: 231c38e32cc9
+Create Date: 2026-10-18 13:07:44.590312
+
+Trigram index of product names for substring and fuzzy search, and an index of products by name to find their checks.
+pg_trgm is a trusted extension, the database owner or a user with CREATE on the database can create it.
+"""
+
+from typing import Sequence
+from typing import Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "aa47a982be90"
+down_revision: Union[str, None] = "231c38e32cc9"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.create_index(
+        "ix_product_names_name_trgm",
+        "product_names",
+        ["name"],
+        unique=False,
+        postgresql_using="gin",
+        postgresql_ops={"name": "gin_trgm_ops"},
+    )
+    op.create_index(
+        "ix_check_products_name_id_check_id_check_created_at",
+        "check_products",
+        ["name_id", "check_id", "check_created_at"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_check_products_name_id_check_id_check_created_at", table_name="check_products")
+    op.drop_index("ix_product_names_name_trgm", table_name="product_names")
+    # the extension is kept, other objects of the database may use it
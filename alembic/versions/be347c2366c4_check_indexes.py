@@ -0,0 +1,61 @@
+"""check indexes
+
+Revision ID: be347c2366c4
+Revises: 6e1eb74e2352
+Create Date: 2026-10-18 10:51:37.204816
+
+Indexes are built CONCURRENTLY, outside of the migration transaction, so existing tables stay writable.
+Pass `-x brin=true` to also create a BRIN index on checks.created_at for very large, append-only tables:
+
+    alembic -x brin=true upgrade heads
+"""
+
+from typing import Sequence
+from typing import Union
+
+from alembic import context
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "be347c2366c4"
+down_revision: Union[str, None] = "6e1eb74e2352"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+INDEXES = (
+    # CheckService.get_user_checks ordered by created_at: WHERE user_id = ? [AND created_at range] ORDER BY created_at,
+    # and the keyset condition (created_at, id) > (?, ?)
+    ("ix_checks_user_id_created_at_id", "checks", ["user_id", "created_at", "id"]),
+    # CheckService.get_user_checks ordered or filtered by total, and its (total, id) keyset condition
+    ("ix_checks_user_id_total_id", "checks", ["user_id", "total", "id"]),
+    # selectinload(Check.products): WHERE check_id IN (...)
+    ("ix_check_products_check_id", "check_products", ["check_id"]),
+    # selectinload(Check.payment) and the payment_type filter EXISTS (... WHERE check_id = ? AND type = ?)
+    ("ix_check_payments_check_id_type", "check_payments", ["check_id", "type"]),
+)
+BRIN_INDEX = "ix_checks_created_at_brin"
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(name, table, columns, postgresql_concurrently=True, if_not_exists=True)
+        if context.get_x_argument(as_dictionary=True).get("brin", "").lower() == "true":
+            # time-range scans over all users: a few pages per block range instead of a large btree
+            op.create_index(
+                BRIN_INDEX,
+                "checks",
+                ["created_at"],
+                postgresql_using="brin",
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(BRIN_INDEX, table_name="checks", postgresql_concurrently=True, if_exists=True)
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
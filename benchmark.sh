@@ -0,0 +1 @@
+./dc.sh exec app python -m "scripts.benchmarks.$1" "${@:2}"
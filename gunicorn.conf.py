@@ -1,17 +1,11 @@
-import multiprocessing
-
 from src.conf.logging import LOG_CONFIG
+from src.conf.metrics import metrics
 from src.conf.settings import settings
 
 
-workers_per_core = 2
-cores = multiprocessing.cpu_count()
-default_web_concurrency = workers_per_core * cores
-web_concurrency = max(int(default_web_concurrency), 2)
-
 # Gunicorn config variables
 bind = f"0.0.0.0:{settings.PORT}"
-workers = web_concurrency
+workers = settings.web_concurrency
 graceful_timeout = 300  # default
 timeout = 300  # default
 keepalive = 2  # default
@@ -20,11 +14,20 @@ logconfig_dict = LOG_CONFIG
 # For debugging and testing
 log_data = {
     "message": "GUNICORN CONFIG LOADED",
-    "workers_per_core": workers_per_core,
-    "cores": cores,
     "workers": workers,
+    "db_pool_size": settings.db_pool_size,
+    "db_max_overflow": settings.db_max_overflow,
     "bind": bind,
     "graceful_timeout": graceful_timeout,
     "timeout": timeout,
     "keepalive": keepalive,
 }
+
+
+def on_starting(server):
+    """Drop metric snapshots of workers of the previous run"""
+    metrics.clear_snapshots()
+
+
+def child_exit(server, worker):
+    metrics.remove_snapshot(worker.pid)
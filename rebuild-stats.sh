@@ -0,0 +1,3 @@
+#!/bin/bash
+
+./dc.sh exec app python -m scripts.rebuild_stats "$@"
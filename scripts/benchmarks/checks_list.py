@@ -0,0 +1,122 @@
+"""
+Compare latency and allocations per page of the checks list execution modes, and of the check detail JSON
+built by the ORM and by Postgres.
+
+Creates a user with a page of checks inside a transaction that is rolled back at the end, checks that all modes
+return the same documents, then times one page per mode as the number of products per check grows.
+Allocations are measured as the peak memory traced by tracemalloc while building one page:
+
+    ./benchmark.sh checks_list --products 10,100,1000 --checks 100 --repeat 5
+"""
+
+import argparse
+import asyncio
+import json
+import time
+import tracemalloc
+
+from datetime import datetime
+from functools import partial
+from typing import get_args
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from src.checks.models import PaymentTypeEnum
+from src.checks.schemas import CheckDTOCreateSchema
+from src.checks.schemas import CheckDTOResponseSchema
+from src.checks.schemas import FilterParams
+from src.checks.service import CheckService
+from src.conf.settings import settings
+from src.users.models import User
+
+
+MODES = get_args(FilterParams.model_fields["mode"].annotation)
+
+
+def build_request(products: int) -> CheckDTOCreateSchema:
+    return CheckDTOCreateSchema.model_validate(
+        {
+            "products": [{"name": f"Product {i}", "price": "12.35", "quantity": "1.5"} for i in range(products)],
+            "payment": {"type": PaymentTypeEnum.card, "amount": products * 20},
+            "comment": "benchmark",
+        }
+    )
+
+
+async def get_page(service: CheckService, user: User, filter_params: FilterParams) -> bytes:
+    page = await service.get_user_checks(user, filter_params)
+    return page if isinstance(page, bytes) else page.model_dump_json().encode()
+
+
+async def get_detail(service: CheckService, id: int, mode: str) -> bytes:
+    if mode == "postgres":
+        return await service.get_check_json(id)
+    return CheckDTOResponseSchema.model_validate(await service.get_check(id)).model_dump_json().encode()
+
+
+async def measure(get_body, session: AsyncSession, user: User, repeat: int) -> tuple[float, int]:
+    """Seconds per call and peak traced memory of one call"""
+    started = time.perf_counter()
+    for _ in range(repeat):
+        await get_body()
+        session.expunge_all()
+        session.add(user)
+    elapsed = time.perf_counter() - started
+
+    tracemalloc.start()
+    await get_body()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    session.expunge_all()
+    session.add(user)
+    return elapsed / repeat, peak
+
+
+async def main(products_list: list[int], checks: int, repeat: int, modes: list[str]) -> None:
+    engine = create_async_engine(settings.sqlalchemy_database_uri)
+    async with engine.connect() as connection:
+        transaction = await connection.begin()
+        session = AsyncSession(bind=connection, join_transaction_mode="create_savepoint", expire_on_commit=False)
+
+        print(f"{'products':>8} {'request':>8} {'mode':>9} {'ms':>8} {'peak KiB':>9} {'body KiB':>9}")
+        for products in products_list:
+            user = User(username=f"benchmark-{time.time_ns()}", password="benchmark", updated_at=datetime.now(tz=None))
+            session.add(user)
+            await session.flush()
+            service = CheckService(session)
+            check_id = (await service.insert_checks([(user.id, build_request(products))] * checks))[0].id
+            await session.flush()
+            session.expunge_all()
+            session.add(user)
+
+            requests = {}
+            for mode in modes:
+                params = FilterParams(limit=min(checks, 100), mode=mode)
+                requests["list", mode] = partial(get_page, service, user, params)
+            for mode in ("orm", "postgres"):
+                requests["detail", mode] = partial(get_detail, service, check_id, mode)
+
+            bodies = {key: await get_body() for key, get_body in requests.items()}
+            for request in ("list", "detail"):
+                documents = [json.loads(body) for (name, _), body in bodies.items() if name == request]
+                assert all(document == documents[0] for document in documents), f"{request} documents differ"
+
+            for (request, mode), get_body in requests.items():
+                elapsed, peak = await measure(get_body, session, user, repeat)
+                size = len(bodies[request, mode]) / 1024
+                print(f"{products:>8} {request:>8} {mode:>9} {elapsed * 1000:>8.2f} {peak / 1024:>9.0f} {size:>9.0f}")
+
+        await session.close()
+        await transaction.rollback()
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--products", default="10,100,1000", help="Comma separated product counts per check")
+    parser.add_argument("--checks", type=int, default=100, help="Checks of the user, a page holds up to 100")
+    parser.add_argument("--repeat", type=int, default=5, help="Pages fetched per product count and mode")
+    parser.add_argument("--modes", default=",".join(MODES), help="Comma separated execution modes to compare")
+    args = parser.parse_args()
+    asyncio.run(main([int(n) for n in args.products.split(",")], args.checks, args.repeat, args.modes.split(",")))
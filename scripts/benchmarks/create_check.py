@@ -0,0 +1,117 @@
+"""
+Compare statements and latency per check for the ORM unit-of-work and the bulk INSERT ... RETURNING write paths.
+
+Runs against the database from settings inside a transaction that is rolled back at the end, so every
+commit becomes a SAVEPOINT/RELEASE pair that is counted for both paths:
+
+    ./benchmark.sh create_check --lines 1,10,50,200 --repeat 20
+"""
+
+import argparse
+import asyncio
+import time
+
+from datetime import datetime
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from src.checks.models import Check
+from src.checks.models import CheckPayment
+from src.checks.models import CheckProduct
+from src.checks.models import PaymentTypeEnum
+from src.checks.money import product_total
+from src.checks.schemas import CheckDTOCreateSchema
+from src.checks.service import CheckService
+from src.conf.settings import settings
+from src.users.models import User
+
+
+def build_request(lines: int) -> CheckDTOCreateSchema:
+    return CheckDTOCreateSchema.model_validate(
+        {
+            "products": [{"name": f"Product {i}", "price": "12.35", "quantity": "1.5"} for i in range(lines)],
+            "payment": {"type": PaymentTypeEnum.card, "amount": lines * 20},
+            "comment": "benchmark",
+        }
+    )
+
+
+async def create_check_orm(session: AsyncSession, user: User, request_data: CheckDTOCreateSchema) -> Check:
+    """The write path CheckService.create_check used before the bulk insert"""
+    now = datetime.now(tz=None)
+    name_ids = await CheckService(session).get_product_name_ids(product.name for product in request_data.products)
+    products = [
+        CheckProduct(
+            name_id=name_ids[product.name],
+            price=product.price,
+            quantity=product.quantity,
+            total=product_total(product.price, product.quantity),
+            updated_at=now,
+        )
+        for product in request_data.products
+    ]
+    payment = CheckPayment(type=request_data.payment.type, amount=request_data.payment.amount, updated_at=now)
+    total_price = sum([product.total for product in products])
+    check = Check(
+        user_id=user.id,
+        products=products,
+        payment=payment,
+        comment=request_data.comment,
+        total=total_price,
+        rest=payment.amount - total_price,
+        payment_type=payment.type,
+        paid_amount=payment.amount,
+        products_count=len(products),
+        updated_at=now,
+    )
+    session.add(check)
+    await session.commit()
+    return check
+
+
+async def create_check_bulk(session: AsyncSession, user: User, request_data: CheckDTOCreateSchema) -> Check:
+    return await CheckService(session).create_check(user, request_data)
+
+
+async def main(lines_list: list[int], repeat: int) -> None:
+    engine = create_async_engine(settings.sqlalchemy_database_uri)
+    statements = 0
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def count_statements(*args):
+        nonlocal statements
+        statements += 1
+
+    async with engine.connect() as connection:
+        transaction = await connection.begin()
+        session = AsyncSession(bind=connection, join_transaction_mode="create_savepoint", expire_on_commit=False)
+        user = User(username=f"benchmark-{time.time_ns()}", password="benchmark", updated_at=datetime.now(tz=None))
+        session.add(user)
+        await session.commit()
+
+        print(f"{'lines':>6} {'path':>6} {'statements/check':>17} {'ms/check':>9}")
+        for lines in lines_list:
+            request_data = build_request(lines)
+            for name, create in (("orm", create_check_orm), ("bulk", create_check_bulk)):
+                statements = 0
+                started = time.perf_counter()
+                for _ in range(repeat):
+                    await create(session, user, request_data)
+                    session.expunge_all()
+                    session.add(user)
+                elapsed = time.perf_counter() - started
+                print(f"{lines:>6} {name:>6} {statements / repeat:>17.1f} {elapsed / repeat * 1000:>9.2f}")
+
+        await session.close()
+        await transaction.rollback()
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lines", default="1,10,50,200", help="Comma separated product line counts")
+    parser.add_argument("--repeat", type=int, default=20, help="Checks created per line count and path")
+    args = parser.parse_args()
+    asyncio.run(main([int(lines) for lines in args.lines.split(",")], args.repeat))
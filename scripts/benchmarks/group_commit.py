@@ -0,0 +1,98 @@
+"""
+Compare throughput and latency of check creation with a commit per check and with group commits.
+
+Concurrent clients create checks of a benchmark user through `CheckService.create_check`, first committing every
+check on its own, then through the group commit queue. Checks are committed for real, so the WAL flushes are
+measured, the user and its checks are deleted at the end:
+
+    ./benchmark.sh group_commit --clients 1,16,64 --checks 2000 --lines 5
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+from datetime import datetime
+
+from sqlalchemy import delete
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from scripts.benchmarks.create_check import build_request
+from src.checks.models import Check
+from src.checks.models import CheckDailyStat
+from src.checks.models import CheckMonthlyStat
+from src.checks.models import CheckPayment
+from src.checks.models import CheckProduct
+from src.checks.service import CheckService
+from src.checks.service import check_commit_queue
+from src.conf.db import async_session
+from src.conf.settings import settings
+from src.users.models import User
+
+
+async def create_checks(user: User, lines: int, clients: int, checks: int) -> list[float]:
+    """Create `checks` checks by `clients` concurrent clients, returns latencies of the requests"""
+    request_data = build_request(lines)
+    latencies = []
+
+    async def client(count: int) -> None:
+        for _ in range(count):
+            started = time.perf_counter()
+            async with async_session() as session:
+                await CheckService(session).create_check(user, request_data)
+            latencies.append(time.perf_counter() - started)
+
+    await asyncio.gather(*(client(checks // clients) for _ in range(clients)))
+    return latencies
+
+
+async def delete_user(user: User) -> None:
+    async with async_session() as session:
+        check_ids = select(Check.id).where(Check.user_id == user.id)
+        for model in (CheckProduct, CheckPayment):
+            await session.execute(delete(model).where(model.check_id.in_(check_ids)))
+        for model in (Check, CheckDailyStat, CheckMonthlyStat):
+            await session.execute(delete(model).where(model.user_id == user.id))
+        await session.execute(delete(User).where(User.id == user.id))
+        await session.commit()
+
+
+async def main(clients_list: list[int], checks: int, lines: int) -> None:
+    engine = create_async_engine(settings.sqlalchemy_database_uri, pool_size=max(clients_list))
+    async_session.configure(bind=engine)
+    async with async_session() as session:
+        user = User(username=f"benchmark-{time.time_ns()}", password="benchmark", updated_at=datetime.now(tz=None))
+        session.add(user)
+        await session.commit()
+
+    try:
+        print(f"{'clients':>7} {'mode':>6} {'checks/s':>9} {'p50 ms':>7} {'p99 ms':>7} {'batch':>6}")
+        for clients in clients_list:
+            for mode in ("commit", "group"):
+                if mode == "group":
+                    check_commit_queue.start()
+                batches = check_commit_queue.batches
+                started = time.perf_counter()
+                latencies = sorted(await create_checks(user, lines, clients, checks))
+                elapsed = time.perf_counter() - started
+                await check_commit_queue.close()
+                batch = len(latencies) / (check_commit_queue.batches - batches) if mode == "group" else 1
+                print(
+                    f"{clients:>7} {mode:>6} {len(latencies) / elapsed:>9.0f} "
+                    f"{statistics.median(latencies) * 1000:>7.1f} {latencies[int(len(latencies) * 0.99)] * 1000:>7.1f} "
+                    f"{batch:>6.1f}"
+                )
+    finally:
+        await delete_user(user)
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", default="1,16,64", help="Comma separated numbers of concurrent clients")
+    parser.add_argument("--checks", type=int, default=2000, help="Checks created per number of clients and mode")
+    parser.add_argument("--lines", type=int, default=5, help="Product lines per check")
+    args = parser.parse_args()
+    asyncio.run(main([int(clients) for clients in args.clients.split(",")], args.checks, args.lines))
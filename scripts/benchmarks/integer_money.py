@@ -0,0 +1,144 @@
+"""
+Compare storage and aggregates of check products with numeric amounts and with integer kopecks and thousandths,
+and the check creation arithmetic on Decimal and on integers.
+
+Fills two copies of check_products, one per column type, with the same synthetic products inside a transaction that
+is rolled back at the end, then reports the size of the tables and the time of a revenue aggregate over them:
+
+    ./benchmark.sh integer_money --products 2000000 --repeat 5
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+import timeit
+
+from decimal import Decimal
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from src.checks.money import product_total
+from src.conf.settings import settings
+
+
+TABLES = {"numeric": "benchmark_numeric_products", "integer": "benchmark_integer_products"}
+AGGREGATE = "SELECT check_id / 1000, sum(total), sum(price * quantity) FROM {table} GROUP BY 1"
+
+
+async def create_tables(connection: AsyncConnection, products: int) -> None:
+    for kind, column_type in (("numeric", "numeric"), ("integer", "bigint")):
+        await connection.execute(
+            text(
+                f"""
+                CREATE TABLE {TABLES[kind]} (
+                    id integer PRIMARY KEY,
+                    name_id integer NOT NULL,
+                    price {column_type} NOT NULL,
+                    quantity {column_type} NOT NULL,
+                    total {column_type} NOT NULL,
+                    check_id integer NOT NULL
+                )
+                """
+            )
+        )
+    # prices of up to 10000.00, quantities of whole pieces and of weighed goods
+    await connection.execute(
+        text(
+            f"""
+            INSERT INTO {TABLES["numeric"]}
+            SELECT i, i % 5000, price, quantity, round(price * quantity, 2), i / 10
+            FROM (
+                SELECT
+                    i,
+                    round(CAST(random() * 10000 AS numeric), 2) AS price,
+                    CASE WHEN i % 3 = 0 THEN round(CAST(random() * 5 AS numeric), 3) ELSE 1 + i % 4 END AS quantity
+                FROM generate_series(1, :products) i
+            ) products
+            """
+        ),
+        {"products": products},
+    )
+    await connection.execute(
+        text(
+            f"""
+            INSERT INTO {TABLES["integer"]}
+            SELECT id, name_id, price * 100, quantity * 1000, total * 100, check_id FROM {TABLES["numeric"]}
+            """
+        )
+    )
+    for table in TABLES.values():
+        await connection.execute(text(f"ANALYZE {table}"))
+
+
+async def get_size(connection: AsyncConnection, table: str) -> int:
+    return await connection.scalar(text("SELECT pg_table_size(CAST(:table AS regclass))"), {"table": table})
+
+
+async def time_query(connection: AsyncConnection, query: str, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        await connection.execute(text(query))
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings)
+
+
+def time_arithmetic(lines: int) -> tuple[float, float]:
+    """Seconds to total a check of `lines` products on Decimal and on integers, as `insert_checks` did and does"""
+    decimal_products = [(Decimal("12.35"), Decimal("1.5"))] * lines
+    integer_products = [(1235, 1500)] * lines
+
+    def decimal_total():
+        totals = [Decimal(price * quantity) for price, quantity in decimal_products]
+        return Decimal(sum(price * quantity for price, quantity in decimal_products)), totals
+
+    def integer_total():
+        totals = [product_total(price, quantity) for price, quantity in integer_products]
+        return sum(totals), totals
+
+    number = max(1, 20000 // lines)
+    return tuple(
+        min(timeit.repeat(total, number=number, repeat=5)) / number for total in (decimal_total, integer_total)
+    )
+
+
+async def main(products: int, repeat: int) -> None:
+    engine = create_async_engine(settings.sqlalchemy_database_uri)
+    async with engine.connect() as connection:
+        transaction = await connection.begin()
+        await create_tables(connection, products)
+
+        sizes = {kind: await get_size(connection, table) for kind, table in TABLES.items()}
+        timings = {
+            kind: await time_query(connection, AGGREGATE.format(table=table), repeat) for kind, table in TABLES.items()
+        }
+        print(f"{products} products")
+        print(f"{'':>16} {'numeric':>10} {'integer':>10} {'saved':>7}")
+        print(
+            f"{'size, MiB':>16} {sizes['numeric'] / 2**20:>10.1f} {sizes['integer'] / 2**20:>10.1f} "
+            f"{1 - sizes['integer'] / sizes['numeric']:>7.0%}"
+        )
+        print(
+            f"{'aggregate, ms':>16} {timings['numeric'] * 1000:>10.1f} {timings['integer'] * 1000:>10.1f} "
+            f"{1 - timings['integer'] / timings['numeric']:>7.0%}"
+        )
+        for lines in (10, 100, 1000):
+            decimal_seconds, integer_seconds = time_arithmetic(lines)
+            print(
+                f"{f'{lines} lines, µs':>16} {decimal_seconds * 1e6:>10.1f} {integer_seconds * 1e6:>10.1f} "
+                f"{1 - integer_seconds / decimal_seconds:>7.0%}"
+            )
+
+        await transaction.rollback()
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--products", type=int, default=2_000_000, help="Product lines of all checks")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs of the aggregate, the median is reported")
+    args = parser.parse_args()
+    asyncio.run(main(args.products, args.repeat))
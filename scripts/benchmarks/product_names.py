@@ -0,0 +1,143 @@
+"""
+Compare storage and I/O of check products with inline names and with names interned in the product_names dictionary.
+
+Fills two copies of check_products, one per row layout, with the same synthetic products inside a transaction that is
+rolled back at the end, then reports the size of the tables with their indexes and the shared buffers read by
+a full scan and by reading products of a page of checks, names included:
+
+    ./benchmark.sh product_names --products 2000000 --names 5000 --per-check 10
+"""
+
+import argparse
+import asyncio
+import json
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from src.conf.settings import settings
+
+
+COLUMNS = """
+    id integer NOT NULL,
+    price numeric NOT NULL,
+    quantity numeric NOT NULL,
+    total numeric NOT NULL,
+    check_id integer NOT NULL,
+    check_created_at timestamp NOT NULL,
+    created_at timestamp NOT NULL DEFAULT now(),
+    updated_at timestamp NOT NULL
+"""
+# name of the i-th product, as long as the names of real receipts
+NAME = "'Молоко ультрапастеризоване 2,5% 900 г, арт. ' || {i}"
+QUERIES = {
+    "full scan": (
+        "SELECT sum(length(name)) FROM benchmark_inline_products",
+        """
+        SELECT sum(length(names.name))
+        FROM benchmark_interned_products products
+        JOIN benchmark_product_names names ON names.id = products.name_id
+        """,
+    ),
+    "page of checks": (
+        "SELECT name, price, quantity, total FROM benchmark_inline_products WHERE check_id < 1000",
+        """
+        SELECT names.name, price, quantity, total
+        FROM benchmark_interned_products products
+        JOIN benchmark_product_names names ON names.id = products.name_id
+        WHERE check_id < 1000
+        """,
+    ),
+}
+
+
+async def create_tables(connection: AsyncConnection, products: int, names: int, per_check: int) -> None:
+    await connection.execute(text(f"CREATE TABLE benchmark_inline_products ({COLUMNS}, name varchar NOT NULL)"))
+    await connection.execute(text(f"CREATE TABLE benchmark_interned_products ({COLUMNS}, name_id integer NOT NULL)"))
+    await connection.execute(
+        text("CREATE TABLE benchmark_product_names (id integer PRIMARY KEY, name varchar NOT NULL UNIQUE)")
+    )
+    await connection.execute(
+        text(
+            f"""
+            INSERT INTO benchmark_product_names
+            SELECT i, {NAME.format(i="i")} FROM generate_series(1, :names) i
+            """
+        ),
+        {"names": names},
+    )
+    # product names follow a skewed distribution, a few best sellers take most of the lines
+    await connection.execute(
+        text(
+            f"""
+            INSERT INTO benchmark_inline_products
+            SELECT i, 12.35, 1.5, 18.525, i / :per_check, now(), now(), now(), {NAME.format(i="name_id")}
+            FROM (
+                SELECT i, 1 + floor(:names * power(random(), 3))::integer AS name_id
+                FROM generate_series(1, :products) i
+            ) products
+            """
+        ),
+        {"products": products, "names": names, "per_check": per_check},
+    )
+    await connection.execute(
+        text(
+            """
+            INSERT INTO benchmark_interned_products
+            SELECT products.id, price, quantity, total, check_id, check_created_at, created_at, updated_at, names.id
+            FROM benchmark_inline_products products
+            JOIN benchmark_product_names names ON names.name = products.name
+            """
+        )
+    )
+    for table in ("benchmark_inline_products", "benchmark_interned_products"):
+        await connection.execute(text(f"ALTER TABLE {table} ADD PRIMARY KEY (id)"))
+        await connection.execute(text(f"CREATE INDEX ON {table} (check_id)"))
+        await connection.execute(text(f"ANALYZE {table}"))
+    await connection.execute(text("ANALYZE benchmark_product_names"))
+
+
+async def get_size(connection: AsyncConnection, *tables: str) -> int:
+    query = text("SELECT sum(pg_total_relation_size(CAST(name AS regclass))) FROM unnest(CAST(:tables AS text[])) name")
+    return await connection.scalar(query, {"tables": list(tables)})
+
+
+async def get_buffers(connection: AsyncConnection, query: str) -> int:
+    """Shared buffers hit or read by the query"""
+    plan = await connection.scalar(text(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {query}"))
+    plan = (json.loads(plan) if isinstance(plan, str) else plan)[0]["Plan"]
+    return plan["Shared Hit Blocks"] + plan["Shared Read Blocks"]
+
+
+async def main(products: int, names: int, per_check: int) -> None:
+    engine = create_async_engine(settings.sqlalchemy_database_uri)
+    async with engine.connect() as connection:
+        transaction = await connection.begin()
+        await create_tables(connection, products, names, per_check)
+
+        inline = await get_size(connection, "benchmark_inline_products")
+        interned = await get_size(connection, "benchmark_interned_products")
+        dictionary = await get_size(connection, "benchmark_product_names")
+        print(f"{products} products of {names} names, {per_check} per check")
+        print(f"{'':>24} {'inline':>12} {'interned':>12} {'saved':>7}")
+        print(
+            f"{'size, MiB':>24} {inline / 2**20:>12.1f} {(interned + dictionary) / 2**20:>12.1f} "
+            f"{1 - (interned + dictionary) / inline:>7.0%}"
+        )
+        for name, (inline_query, interned_query) in QUERIES.items():
+            inline = await get_buffers(connection, inline_query)
+            interned = await get_buffers(connection, interned_query)
+            print(f"{name + ', buffers':>24} {inline:>12} {interned:>12} {1 - interned / inline:>7.0%}")
+
+        await transaction.rollback()
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--products", type=int, default=2_000_000, help="Product lines of all checks")
+    parser.add_argument("--names", type=int, default=5000, help="Distinct product names")
+    parser.add_argument("--per-check", type=int, default=10, help="Product lines per check")
+    args = parser.parse_args()
+    asyncio.run(main(args.products, args.names, args.per_check))
@@ -0,0 +1,147 @@
+"""
+Measure latency of the checks list filtered by product name on a large synthetic dataset.
+
+Creates users with checks and products of the current month inside a transaction that is rolled back at the end,
+then times a page of checks of one user for common, rare and misspelled product names:
+
+    ./benchmark.sh product_search --products 10000000 --users 1000 --names 5000 --repeat 5
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import time
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from src.checks.schemas import FilterParams
+from src.checks.service import CheckService
+from src.conf.settings import settings
+from src.users.models import User
+
+
+PRODUCTS_PER_CHECK = 10
+# (product_name, product_name_match), names are "<kind> <brand>, арт. <n>"
+SEARCHES = (
+    ("кава", "substring"),
+    ("арт. 4242", "substring"),
+    ("Кефiр Галичина", "fuzzy"),
+)
+
+
+async def create_data(connection: AsyncConnection, products: int, users: int, names: int) -> list[int]:
+    """Insert users, product names, checks and products, returns ids of the users"""
+    run = str(time.time_ns())
+    user_ids = (
+        await connection.scalars(
+            text(
+                """
+                INSERT INTO users (username, password, updated_at)
+                SELECT 'benchmark-' || :run || '-' || i, 'benchmark', now() FROM generate_series(1, :users) i
+                RETURNING id
+                """
+            ),
+            {"run": run, "users": users},
+        )
+    ).all()
+    name_ids = (
+        await connection.scalars(
+            text(
+                """
+                INSERT INTO product_names (name, updated_at)
+                SELECT (ARRAY['Молоко', 'Кефір', 'Хліб', 'Кава', 'Чай', 'Сир', 'Масло', 'Яблука', 'Вода', 'Печиво'])[
+                        1 + i % 10
+                    ] || ' ' || (ARRAY['Галичина', 'Яготинське', 'Lavazza', 'Моршинська', 'Рошен'])[1 + i / 10 % 5]
+                    || ', арт. ' || i,
+                    now()
+                FROM generate_series(1, :names) i
+                RETURNING id
+                """
+            ),
+            {"names": names},
+        )
+    ).all()
+    await connection.execute(
+        text(
+            """
+            INSERT INTO checks (user_id, total, rest, payment_type, paid_amount, products_count, created_at, updated_at)
+            SELECT
+                :first_user + i % :users, 10, 0, 'card', 10, :per_check,
+                date_trunc('month', localtimestamp) + (localtimestamp - date_trunc('month', localtimestamp)) * random(),
+                now()
+            FROM generate_series(1, :checks) i
+            """
+        ),
+        {
+            "first_user": user_ids[0],
+            "users": users,
+            "per_check": PRODUCTS_PER_CHECK,
+            "checks": products // PRODUCTS_PER_CHECK,
+        },
+    )
+    # product names follow a skewed distribution, a few best sellers take most of the lines
+    await connection.execute(
+        text(
+            """
+            INSERT INTO check_products (name_id, price, quantity, total, check_id, check_created_at, updated_at)
+            SELECT
+                :first_name + floor(:names * power(random(), 3))::integer, 1, 1, 1,
+                checks.id, checks.created_at, now()
+            FROM checks
+            CROSS JOIN generate_series(1, :per_check)
+            WHERE checks.user_id BETWEEN :first_user AND :last_user
+            """
+        ),
+        {
+            "first_name": name_ids[0],
+            "names": names,
+            "per_check": PRODUCTS_PER_CHECK,
+            "first_user": user_ids[0],
+            "last_user": user_ids[-1],
+        },
+    )
+    for table in ("users", "product_names", "checks", "check_products"):
+        await connection.execute(text(f"ANALYZE {table}"))
+    return list(user_ids)
+
+
+async def main(products: int, users: int, names: int, repeat: int) -> None:
+    engine = create_async_engine(settings.sqlalchemy_database_uri)
+    async with engine.connect() as connection:
+        transaction = await connection.begin()
+        started = time.perf_counter()
+        user_ids = await create_data(connection, products, users, names)
+        print(f"{products} products of {products // PRODUCTS_PER_CHECK} checks, {users} users, {names} names")
+        print(f"created in {time.perf_counter() - started:.0f} s")
+
+        session = AsyncSession(bind=connection, join_transaction_mode="create_savepoint")
+        service = CheckService(session)
+        user = await session.get(User, user_ids[0])
+        print(f"{'product_name':>16} {'match':>10} {'total':>6} {'ms':>8}")
+        for product_name, match in SEARCHES:
+            params = FilterParams(product_name=product_name, product_name_match=match, mode="lean")
+            timings = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                page = await service.get_user_checks(user, params)
+                timings.append(time.perf_counter() - started)
+            total = json.loads(page)["total"]
+            print(f"{product_name:>16} {match:>10} {total:>6} {statistics.median(timings) * 1000:>8.1f}")
+
+        await session.close()
+        await transaction.rollback()
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--products", type=int, default=10_000_000, help="Product lines of all checks")
+    parser.add_argument("--users", type=int, default=1000, help="Users the checks are spread over")
+    parser.add_argument("--names", type=int, default=5000, help="Distinct product names")
+    parser.add_argument("--repeat", type=int, default=5, help="Pages fetched per search, the median is reported")
+    args = parser.parse_args()
+    asyncio.run(main(args.products, args.users, args.names, args.repeat))
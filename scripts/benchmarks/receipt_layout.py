@@ -0,0 +1,247 @@
+"""
+Micro-benchmark of the receipt layout engine against the previous MarkupService implementation.
+
+Checks that both produce the same receipts for random checks, then times rendering as the number of lines grows:
+
+    ./benchmark.sh receipt_layout --lines 10,100,1000,10000
+"""
+
+import argparse
+import random
+import string
+import timeit
+
+from datetime import datetime
+from decimal import Decimal
+from types import SimpleNamespace
+
+from markupsafe import Markup
+
+from src.checks.layout import ReceiptLayout
+from src.checks.models import PaymentTypeEnum
+from src.checks.money import MONEY_PLACES
+from src.checks.money import format_amount
+from src.checks.money import format_quantity
+from src.checks.money import product_total
+from src.checks.money import to_decimal
+from src.checks.service import MarkupService
+
+
+class LegacyMarkupService:
+    """MarkupService before the single-pass layout engine"""
+
+    def __init__(self, check=None):
+        self.check = check
+        if check:
+            self.max_symbols = check.user.check_symbols or 50
+
+    class ALIGN:
+        LEFT = "left"
+        RIGHT = "right"
+        CENTER = "center"
+
+    def get_spaces(self, text: str, align=ALIGN.LEFT) -> tuple[str, str]:
+        left_spaces = ""
+        right_spaces = ""
+        empty_space_count = self.max_symbols - len(text)
+
+        if align == self.ALIGN.LEFT:
+            return left_spaces, " " * empty_space_count
+        elif align == self.ALIGN.RIGHT:
+            return " " * empty_space_count, right_spaces
+        elif align == self.ALIGN.CENTER:
+            return " " * int(empty_space_count / 2), " " * int(empty_space_count / 2)
+
+    def get_line(self, text, align=ALIGN.LEFT):
+        text = text.strip()
+        left_spaces, right_spaces = self.get_spaces(text, align)
+        return f"{left_spaces}{text}{right_spaces}"
+
+    def split_text(self, text: str, indentation: int = 0) -> list[str]:
+        return [
+            text[i : i + self.max_symbols - indentation] for i in range(0, len(text), self.max_symbols - indentation)
+        ]
+
+    def build_header(self):
+        base_header = f"ФОП {self.check.user.last_name} {self.check.user.first_name}"
+        align = self.ALIGN.CENTER
+        markup_lines = []
+        # build header
+        if len(base_header) > self.max_symbols:
+            parts = base_header.split(" ")
+            part_line = ""
+            for part in parts:
+                if len(" ".join((part_line, part))) <= self.max_symbols:
+                    part_line = " ".join((part_line, part))
+                else:
+                    markup_lines.append(self.get_line(part_line, align)) if part_line else ""
+                    part_line = ""
+                    if len(part) <= self.max_symbols:
+                        part_line = part
+                    else:
+                        for part_sub in self.split_text(part):
+                            markup_lines.append(self.get_line(part_sub, align))
+            else:
+                markup_lines.append(self.get_line(part_line, align))
+        else:
+            markup_lines.append(self.get_line(base_header, align))
+
+        markup_lines.append("=" * self.max_symbols)
+
+        return markup_lines
+
+    def build_products(self):
+        markup_lines = []
+
+        for product in self.check.products:
+            total_price = f"= {round(product.total, 2)}"
+            if len(product.name) + len(total_price) <= self.max_symbols:
+                markup_lines.append(self.get_line(product.name))
+            else:
+                markup_lines.extend(self.split_text(product.name, len(total_price)))
+
+            product_price_formation = f"{product.quantity} x {product.price}"
+            base_product_details_line = (
+                f"{product_price_formation}{self.get_spaces(product_price_formation + total_price)[1]}{total_price}"
+            )
+
+            if len(base_product_details_line) <= self.max_symbols:
+                markup_lines.append(base_product_details_line)
+            else:
+                product_price_formation = product_price_formation.split(" ")
+                lines = list()
+                for part in product_price_formation:
+                    lines.extend(self.split_text(part, len(total_price)))
+                lines[-1] = f"{lines[-1]}{self.get_spaces(lines[-1] + total_price)[1]}{total_price}"
+                markup_lines.extend(lines)
+
+            if self.check.products[-1] != product:
+                markup_lines.append("-" * self.max_symbols)
+
+        markup_lines.append("=" * self.max_symbols)
+        return markup_lines
+
+    def build_payment(self):
+        markup_lines = []
+
+        check_amount = str(round(self.check.total, 2))
+        check_amount_line = f"Сума{self.get_spaces('Сума' + check_amount)[1]}{check_amount}"
+        markup_lines.append(check_amount_line)
+
+        # compared with the enum member rather than "card", which never matched, as the layout does now
+        payment_amount_type = "Картка" if self.check.payment.type == PaymentTypeEnum.card else "Готівка"
+        payment_amount = str(round(self.check.payment.amount, 2))
+        payment_amount_line = (
+            f"{payment_amount_type}{self.get_spaces(payment_amount_type + payment_amount)[1]}{payment_amount}"
+        )
+        markup_lines.append(payment_amount_line)
+
+        rest_amount = str(round(self.check.rest, 2))
+        rest_amount_line = f"Решта{self.get_spaces('Решта' + rest_amount)[1]}{rest_amount}"
+        markup_lines.append(rest_amount_line)
+
+        markup_lines.append("=" * self.max_symbols)
+        return markup_lines
+
+    def build_footer(self):
+        markup_lines = []
+        align = self.ALIGN.CENTER
+
+        markup_lines.append(self.get_line("Дякуємо за покупку!", align))
+        markup_lines.append(self.get_line(str(self.check.created_at.replace(microsecond=0)), align))
+        markup_lines.extend(self.get_line(part, align) for part in self.split_text(self.check.comment))
+
+        return markup_lines
+
+    def build_markup(self) -> Markup:
+        if not self.check:
+            return Markup()
+
+        markup_lines = self.build_header()
+        markup_lines.extend(self.build_products())
+        markup_lines.extend(self.build_payment())
+        markup_lines.extend(self.build_footer())
+
+        return Markup("<br>".join(markup_lines))
+
+
+def random_text(rnd: random.Random, max_length: int) -> str:
+    alphabet = string.ascii_letters + "абвгґдеєжзиіїйклмнопрстуфхцчшщьюя" + " " * 8
+    return "".join(rnd.choice(alphabet) for _ in range(rnd.randint(1, max_length))).strip() or "x"
+
+
+def build_check(rnd: random.Random, lines: int, width: int | None = 50) -> SimpleNamespace:
+    """Random check with amounts in kopecks and quantities in thousandths"""
+    products = []
+    for _ in range(lines):
+        price = rnd.randint(1, 10 ** rnd.randint(2, 9))
+        quantity = rnd.randint(1, 10 ** rnd.randint(1, 6)) * 10 ** rnd.randint(0, 3)
+        products.append(
+            SimpleNamespace(
+                name=random_text(rnd, 90), price=price, quantity=quantity, total=product_total(price, quantity)
+            )
+        )
+    total = sum(product.total for product in products)
+    amount = total + rnd.randint(0, 1000) * 100
+    return SimpleNamespace(
+        user=SimpleNamespace(
+            first_name=random_text(rnd, 40),
+            last_name=random_text(rnd, 40),
+            check_symbols=width,
+        ),
+        products=products,
+        payment=SimpleNamespace(type=rnd.choice(list(PaymentTypeEnum)), amount=amount),
+        total=total,
+        rest=amount - total,
+        created_at=datetime(2024, 12, 16, 19, 55, 28, 823701),
+        comment=random_text(rnd, 200),
+    )
+
+
+def as_decimal_check(check: SimpleNamespace) -> SimpleNamespace:
+    """The check with Decimal amounts and quantities, as LegacyMarkupService got them, prices as they were sent"""
+    return SimpleNamespace(
+        **vars(check)
+        | {
+            "products": [
+                SimpleNamespace(
+                    name=product.name,
+                    price=Decimal(format_amount(product.price)),
+                    quantity=Decimal(format_quantity(product.quantity)),
+                    total=to_decimal(product.total, MONEY_PLACES),
+                )
+                for product in check.products
+            ],
+            "payment": SimpleNamespace(type=check.payment.type, amount=to_decimal(check.payment.amount, MONEY_PLACES)),
+            "total": to_decimal(check.total, MONEY_PLACES),
+            "rest": to_decimal(check.rest, MONEY_PLACES),
+        }
+    )
+
+
+def main(lines_list: list[int], samples: int) -> None:
+    rnd = random.Random(42)
+    for _ in range(samples):
+        check = build_check(rnd, rnd.randint(1, 20), rnd.choice([None, 20, 32, 42, 50, 80]))
+        legacy = LegacyMarkupService(as_decimal_check(check)).build_markup()
+        current = MarkupService(check).build_markup()
+        assert legacy == current, f"Receipts differ:\n{legacy}\n{current}"
+        layout = ReceiptLayout.for_width(check.user.check_symbols or 50)
+        assert list(layout.iter_lines(check, chunk_size=3)) == layout.render(check), "Chunked layout differs"
+    print(f"{samples} random receipts are identical")
+
+    print(f"{'lines':>6} {'legacy ms':>10} {'layout ms':>10} {'speedup':>8}")
+    for lines in lines_list:
+        number = max(1, 2000 // lines)
+        check = build_check(rnd, lines)
+        legacy = min(timeit.repeat(LegacyMarkupService(as_decimal_check(check)).build_markup, number=number, repeat=5))
+        current = min(timeit.repeat(MarkupService(check).build_markup, number=number, repeat=5))
+        print(f"{lines:>6} {legacy / number * 1000:>10.3f} {current / number * 1000:>10.3f} {legacy / current:>7.2f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lines", default="10,100,1000,10000", help="Comma separated product line counts")
+    parser.add_argument("--samples", type=int, default=2000, help="Random receipts compared for equality")
+    args = parser.parse_args()
+    main([int(lines) for lines in args.lines.split(",")], args.samples)
@@ -0,0 +1,41 @@
+"""
+Manage monthly partitions of checks, check_payments and check_products:
+
+    ./partitions.sh create --ahead 6
+    ./partitions.sh detach --before 2024-01
+    ./partitions.sh detach --before 2024-01 --drop
+"""
+
+import argparse
+import asyncio
+
+from datetime import datetime
+
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from src.checks.partitions import create_partitions
+from src.checks.partitions import detach_partitions
+from src.conf.settings import settings
+
+
+async def main(args: argparse.Namespace) -> None:
+    engine = create_async_engine(settings.sqlalchemy_database_uri)
+    if args.command == "create":
+        names = await create_partitions(engine, args.ahead)
+        print(f"Created {len(names)} partitions: {', '.join(names)}")
+    else:
+        before = datetime.strptime(args.before, "%Y-%m").date()
+        names = await detach_partitions(engine, before, args.drop)
+        print(f"{'Dropped' if args.drop else 'Detached'} {len(names)} partitions: {', '.join(names)}")
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+    create = commands.add_parser("create", help="Create missing partitions from the current month on")
+    create.add_argument("--ahead", type=int, default=settings.CHECKS_PARTITIONS_AHEAD, help="Months after the current")
+    detach = commands.add_parser("detach", help="Detach partitions of the months before a month")
+    detach.add_argument("--before", required=True, help="First month to keep, YYYY-MM")
+    detach.add_argument("--drop", action="store_true", help="Drop the detached partitions")
+    asyncio.run(main(parser.parse_args()))
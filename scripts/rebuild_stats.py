@@ -0,0 +1,30 @@
+"""
+Rebuild the daily and monthly sales rollups from the checks, of all users or only of the given ones:
+
+    ./rebuild-stats.sh
+    ./rebuild-stats.sh --user-id 1 --user-id 2
+"""
+
+import argparse
+import asyncio
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from src.checks.service import CheckService
+from src.conf.settings import settings
+
+
+async def main(user_ids: list[int] | None) -> None:
+    engine = create_async_engine(settings.sqlalchemy_database_uri)
+    async with AsyncSession(engine, expire_on_commit=False) as session:
+        rows = await CheckService(session).rebuild_stats(user_ids)
+    await engine.dispose()
+    print(f"Rebuilt {rows} daily rollup rows")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--user-id", type=int, action="append", dest="user_ids", help="Rebuild only this user")
+    args = parser.parse_args()
+    asyncio.run(main(args.user_ids))
@@ -0,0 +1,99 @@
+import sys
+
+from collections import OrderedDict
+from typing import Any
+from typing import Callable
+from typing import Hashable
+
+from src.base.schemas import CacheStatsSchema
+
+
+class LRUCache:
+    """
+    In-process LRU cache bounded by the total size of its values.
+
+    Values are evicted from the least recently used end until the cache fits into `max_size`,
+    the size of a value is measured with `sizeof`. Keys are indexed by `group` of the key, if provided,
+    so the values of a group are invalidated without scanning the cache.
+    """
+
+    def __init__(
+        self,
+        max_size: int,
+        sizeof: Callable[[Any], int] = sys.getsizeof,
+        group: Callable[[Hashable], Hashable] | None = None,
+    ):
+        self.max_size = max_size
+        self.sizeof = sizeof
+        self.group = group
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._items: OrderedDict[Hashable, tuple[Any, int]] = OrderedDict()
+        self._groups: dict[Hashable, set[Hashable]] = {}
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def get(self, key: Hashable) -> Any | None:
+        """Get value by key and mark it as recently used"""
+        item = self._items.get(key)
+        if item is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._items.move_to_end(key)
+        return item[0]
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """Put value to the cache, evicting least recently used values if it does not fit"""
+        size = self.sizeof(value)
+        if size > self.max_size:
+            return
+        self.pop(key)
+        self._items[key] = (value, size)
+        self.size += size
+        if self.group is not None:
+            self._groups.setdefault(self.group(key), set()).add(key)
+        while self.size > self.max_size:
+            self.pop(next(iter(self._items)))
+            self.evictions += 1
+
+    def pop(self, key: Hashable) -> Any | None:
+        """Remove value by key"""
+        item = self._items.pop(key, None)
+        if item is None:
+            return None
+        self.size -= item[1]
+        if self.group is not None:
+            group = self.group(key)
+            keys = self._groups[group]
+            keys.discard(key)
+            if not keys:
+                del self._groups[group]
+        return item[0]
+
+    def invalidate(self, group: Hashable) -> int:
+        """Remove all values with keys of the group, returns the number of removed values"""
+        keys = list(self._groups.get(group, ()))
+        for key in keys:
+            self.pop(key)
+        return len(keys)
+
+    def clear(self) -> None:
+        self._items.clear()
+        self._groups.clear()
+        self.size = 0
+
+    def stats(self) -> CacheStatsSchema:
+        requests = self.hits + self.misses
+        return CacheStatsSchema(
+            hits=self.hits,
+            misses=self.misses,
+            hit_rate=self.hits / requests if requests else 0.0,
+            evictions=self.evictions,
+            items=len(self._items),
+            size=self.size,
+            max_size=self.max_size,
+        )
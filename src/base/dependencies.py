@@ -1,11 +1,47 @@
 from typing import AsyncGenerator
+from typing import Callable
 
+from fastapi import Request
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.conf.db import async_session
+from src.conf.query_budget import QueryTracker
+from src.conf.query_budget import query_tracker
+from src.conf.settings import QueryBudgetMode
+from src.conf.settings import settings
 
 
 async def get_db_session() -> AsyncGenerator["AsyncSession", None]:
     """Dependency to get database session"""
     async with async_session() as session:  # type:ignore
         yield session
+
+
+def query_budget(
+    max_statements: int, max_repeats: int = 1, max_duration: float | None = None, commits: bool = False
+) -> Callable:
+    """
+    Dependency factory to guard a route with a query budget.
+
+    With QUERY_BUDGET_MODE enabled, SQL statements of the request are counted, and the request is logged or failed
+    if it issues more than `max_statements`, repeats an identical statement more than `max_repeats` times,
+    or spends more than `max_duration` seconds in the database. Violations of routes that `commits` are only logged,
+    the budget is checked after the commit, and failing the request would hide a write that was made.
+    """
+
+    async def track_queries(request: Request) -> AsyncGenerator[None, None]:
+        if settings.QUERY_BUDGET_MODE == QueryBudgetMode.OFF:
+            yield
+            return
+        tracker = QueryTracker()
+        token = query_tracker.set(tracker)
+        try:
+            yield
+        finally:
+            query_tracker.reset(token)
+        route = request.scope.get("route")
+        name = f"{request.method} {getattr(route, 'path', request.url.path)}"
+        mode = QueryBudgetMode.LOG if commits else settings.QUERY_BUDGET_MODE
+        tracker.check(name, mode, max_statements, max_repeats, max_duration)
+
+    return track_queries
@@ -0,0 +1,129 @@
+import asyncio
+import logging
+import time
+
+from typing import Awaitable
+from typing import Callable
+from typing import Generic
+from typing import TypeVar
+
+from src.base.schemas import GroupCommitStatsSchema
+from src.conf.metrics import group_commit_batch_size
+from src.conf.metrics import group_commit_duration
+
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+class GroupCommitQueue(Generic[T, R]):
+    """
+    Write-behind queue of items written by a flusher task in group commits.
+
+    Items submitted by concurrent requests are written with a single `commit_many` call once `max_batch_size` items
+    are queued or `interval` seconds after the first item of a group, so they share one transaction and one WAL flush.
+    `commit_many` gets a list of items and returns a result or an error for every item, in their order. `submit`
+    returns only after the group of the item is committed.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        commit_many: Callable[[list[T]], Awaitable[list[R | Exception]]],
+        max_batch_size: int,
+        interval: float,
+        max_queue_size: int = 0,
+    ):
+        self.name = name
+        self.commit_many = commit_many
+        self.max_batch_size = max_batch_size
+        self.interval = interval
+        self.max_queue_size = max_queue_size
+        self.batches = 0
+        self.items = 0
+        self.errors = 0
+        self._queue: asyncio.Queue[tuple[T, asyncio.Future] | None] | None = None
+        self._task: asyncio.Task | None = None
+
+    @property
+    def running(self) -> bool:
+        """Whether items are accepted, False before `start` and once `close` is called"""
+        return self._task is not None
+
+    def start(self) -> None:
+        """Start the flusher task in the running event loop"""
+        self._queue = asyncio.Queue(self.max_queue_size)
+        self._task = asyncio.get_running_loop().create_task(self._flush_periodically())
+
+    async def close(self) -> None:
+        """Stop accepting items and wait until the queued items are committed"""
+        if self._task is None:
+            return
+        task, self._task = self._task, None
+        await self._queue.put(None)
+        await task
+
+    async def submit(self, item: T) -> R:
+        """Queue the item and wait for its group commit, returns its result or raises its error"""
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((item, future))
+        # a cancelled request must not cancel the commit of its group
+        return await asyncio.shield(future)
+
+    async def _flush_periodically(self) -> None:
+        loop = asyncio.get_running_loop()
+        closed = False
+        while not closed:
+            entry = await self._queue.get()
+            if entry is None:
+                break
+            batch = [entry]
+            deadline = loop.time() + self.interval
+            while len(batch) < self.max_batch_size:
+                try:
+                    if self._queue.empty():
+                        async with asyncio.timeout_at(deadline):
+                            entry = await self._queue.get()
+                    else:
+                        entry = self._queue.get_nowait()
+                except TimeoutError:
+                    break
+                if entry is None:
+                    closed = True
+                    break
+                batch.append(entry)
+            await self._commit_batch(batch)
+
+    async def _commit_batch(self, batch: list[tuple[T, asyncio.Future]]) -> None:
+        size = len(batch)
+        self.batches += 1
+        self.items += size
+        group_commit_batch_size.observe(self.name, value=size)
+        started = time.perf_counter()
+        try:
+            results = await self.commit_many([item for item, _ in batch])
+        except Exception as e:
+            logger.exception("Group commit of %s %s failed", size, self.name)
+            results = [e] * size
+        group_commit_duration.observe(self.name, value=time.perf_counter() - started)
+        self.errors += sum(isinstance(result, Exception) for result in results)
+        for (_, future), result in zip(batch, results):
+            if future.done():
+                continue
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+    def stats(self) -> GroupCommitStatsSchema:
+        return GroupCommitStatsSchema(
+            queue_depth=self._queue.qsize() if self._queue is not None else 0,
+            batches=self.batches,
+            items=self.items,
+            errors=self.errors,
+            mean_batch_size=self.items / self.batches if self.batches else 0.0,
+            max_batch_size=self.max_batch_size,
+            interval=self.interval,
+        )
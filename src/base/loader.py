@@ -0,0 +1,113 @@
+import asyncio
+import contextvars
+
+from typing import Awaitable
+from typing import Callable
+from typing import Generic
+from typing import Hashable
+from typing import TypeVar
+
+from src.base.schemas import BatchLoaderStatsSchema
+from src.conf.query_budget import QueryTracker
+from src.conf.query_budget import query_tracker
+
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class BatchLoader(Generic[K, V]):
+    """
+    Dataloader-style batcher of lookups by key across concurrent requests.
+
+    Keys requested within `window` seconds (or within one event loop tick if `window` is 0) are resolved
+    with a single `load_many` call, a batch is dispatched right away once it reaches `max_batch_size` keys.
+    `load_many` gets a list of unique keys and returns values by key, missing keys resolve to None. If it raises,
+    the keys of the batch are loaded one by one, so only the failing keys get the exception.
+
+    A batch runs in a context of its own rather than the one of the request that happened to dispatch it, and its
+    SQL statements are charged once to the query budget of every request waiting for it.
+    """
+
+    def __init__(self, load_many: Callable[[list[K]], Awaitable[dict[K, V]]], window: float, max_batch_size: int):
+        self.load_many = load_many
+        self.window = window
+        self.max_batch_size = max_batch_size
+        self.batches = 0
+        self.keys = 0
+        self.errors = 0
+        self.largest_batch_size = 0
+        # number of batches by the power of two their size is rounded up to
+        self.batch_sizes: dict[int, int] = {}
+        self._pending: dict[K, asyncio.Future] = {}
+        self._handle: asyncio.Handle | None = None
+        self._tasks: set[asyncio.Task] = set()
+
+    async def load(self, key: K) -> V | None:
+        """Get value by key, batched with keys requested by other coroutines"""
+        future = self._pending.get(key)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = self._pending[key] = loop.create_future()
+            if len(self._pending) >= self.max_batch_size:
+                self._dispatch()
+            elif self._handle is None:
+                self._handle = (
+                    loop.call_later(self.window, self._dispatch) if self.window > 0 else loop.call_soon(self._dispatch)
+                )
+        # a cancelled waiter must not cancel the result other waiters of the key are waiting for
+        value, batch_tracker = await asyncio.shield(future)
+        if (tracker := query_tracker.get()) is not None:
+            tracker.merge(batch_tracker)
+        return value
+
+    def _dispatch(self) -> None:
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+        batch, self._pending = self._pending, {}
+        if not batch:
+            return
+        task = asyncio.get_running_loop().create_task(self._load_batch(batch), context=contextvars.Context())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _load_batch(self, batch: dict[K, asyncio.Future]) -> None:
+        size = len(batch)
+        self.batches += 1
+        self.keys += size
+        self.largest_batch_size = max(self.largest_batch_size, size)
+        bucket = 1 << (size - 1).bit_length()
+        self.batch_sizes[bucket] = self.batch_sizes.get(bucket, 0) + 1
+        tracker = QueryTracker()
+        query_tracker.set(tracker)
+        await self._resolve(batch, tracker)
+
+    async def _resolve(self, batch: dict[K, asyncio.Future], tracker: QueryTracker) -> None:
+        try:
+            values = await self.load_many(list(batch))
+        except Exception as e:
+            self.errors += 1
+            if len(batch) > 1:
+                # a key the lookup rejects must not fail the keys batched with it, they are loaded one by one
+                await asyncio.gather(*(self._resolve({key: future}, tracker) for key, future in batch.items()))
+                return
+            for future in batch.values():
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for key, future in batch.items():
+            if not future.done():
+                future.set_result((values.get(key), tracker))
+
+    def stats(self) -> BatchLoaderStatsSchema:
+        return BatchLoaderStatsSchema(
+            batches=self.batches,
+            keys=self.keys,
+            errors=self.errors,
+            mean_batch_size=self.keys / self.batches if self.batches else 0.0,
+            largest_batch_size=self.largest_batch_size,
+            max_batch_size=self.max_batch_size,
+            window=self.window,
+            batch_sizes=dict(sorted(self.batch_sizes.items())),
+        )
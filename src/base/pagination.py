@@ -0,0 +1,24 @@
+import base64
+import binascii
+import json
+
+from typing import Any
+from typing import Dict
+
+from src.conf.exceptions import BadRequestException
+
+
+def encode_cursor(data: Dict[str, Any]) -> str:
+    """Encode cursor data into an opaque URL-safe string"""
+    return base64.urlsafe_b64encode(json.dumps(data, separators=(",", ":")).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Dict[str, Any]:
+    """Decode an opaque cursor produced by `encode_cursor`"""
+    try:
+        data = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except (binascii.Error, ValueError) as e:
+        raise BadRequestException("Invalid cursor") from e
+    if not isinstance(data, dict):
+        raise BadRequestException("Invalid cursor")
+    return data
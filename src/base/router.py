@@ -4,12 +4,20 @@ from typing import Annotated
 
 from fastapi import APIRouter
 from fastapi import Depends
+from fastapi import Request
+from fastapi.responses import JSONResponse
+from fastapi.responses import PlainTextResponse
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from starlette import status
 
 from src.base.dependencies import get_db_session
 from src.base.schemas import PingResponseSchema
+from src.base.schemas import ReadinessResponseSchema
+from src.conf.db import ping_database
+from src.conf.db import replica_router
+from src.conf.metrics import metrics
+from src.conf.settings import settings
 
 
 router = APIRouter(prefix="/base")
@@ -21,3 +29,28 @@ logger = logging.getLogger(__name__)
 async def ping(db_session: Annotated["AsyncSession", Depends(get_db_session)]) -> PingResponseSchema:
     await db_session.execute(select(1))
     return PingResponseSchema(OK=db_session.is_active)
+
+
+@router.get(
+    "/ready",
+    responses={
+        status.HTTP_200_OK: {"model": ReadinessResponseSchema},
+        status.HTTP_503_SERVICE_UNAVAILABLE: {"model": ReadinessResponseSchema},
+    },
+)
+async def ready(request: Request):
+    engine = request.app.state.db_engine
+    ok = await ping_database(engine, settings.DB_READY_CHECK_INTERVAL)
+    response = ReadinessResponseSchema(
+        OK=ok,
+        pool=engine.pool.stats(),
+        replicas=len(replica_router.replicas),
+        healthy_replicas=len(replica_router.healthy),
+    )
+    status_code = status.HTTP_200_OK if ok else status.HTTP_503_SERVICE_UNAVAILABLE
+    return JSONResponse(response.model_dump(), status_code=status_code)
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def metrics_view():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
@@ -1,7 +1,56 @@
 from pydantic import BaseModel
+from pydantic import Field
+
+from src.conf.schemas import PoolStatsSchema
 
 
 class PingResponseSchema(BaseModel):
     """Ping response schema"""
 
     OK: bool
+
+
+class ReadinessResponseSchema(BaseModel):
+    """Readiness response schema"""
+
+    OK: bool
+    pool: PoolStatsSchema
+    replicas: int = 0
+    healthy_replicas: int = 0
+
+
+class CacheStatsSchema(BaseModel):
+    """In-process cache statistics schema"""
+
+    hits: int
+    misses: int
+    hit_rate: float
+    evictions: int
+    items: int
+    size: int | None = Field(None, description="Total size of the values, for caches bounded by size")
+    max_size: int
+
+
+class BatchLoaderStatsSchema(BaseModel):
+    """Batch loader statistics schema"""
+
+    batches: int
+    keys: int
+    errors: int
+    mean_batch_size: float
+    largest_batch_size: int
+    max_batch_size: int
+    window: float
+    batch_sizes: dict[int, int]
+
+
+class GroupCommitStatsSchema(BaseModel):
+    """Group commit queue statistics schema"""
+
+    queue_depth: int
+    batches: int
+    items: int
+    errors: int
+    mean_batch_size: float
+    max_batch_size: int
+    interval: float
@@ -1,4 +1,5 @@
 import datetime
+import json
 
 from typing import Any
 from typing import Callable
@@ -6,11 +7,19 @@ from typing import Dict
 from typing import Sequence
 from typing import Type
 
+from sqlalchemy import Column
+from sqlalchemy import Row
+from sqlalchemy import Select
 from sqlalchemy import select
+from sqlalchemy import tuple_
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.sql.functions import count
 
 from src.base.models import BaseModel
+from src.base.pagination import decode_cursor
+from src.base.pagination import encode_cursor
+from src.conf.db import Explain
+from src.conf.exceptions import BadRequestException
 
 
 class BaseService:
@@ -53,22 +62,99 @@ class BaseService:
         limit: int = None,
         offset: int = None,
         order_by: str = None,
-    ) -> Sequence[BaseModel]:
-        """Fetch all obj from database"""
-        query = select(self.MODEL).where(*filters).options(*options)
+        columns: Sequence = (),
+    ) -> Sequence[BaseModel] | Sequence[Row]:
+        """Fetch all obj from database, or rows of `columns` if provided"""
+        query = self._select(columns).where(*filters).options(*options)
         if limit:
             query = query.limit(limit)
         if offset:
             query = query.offset(offset)
         if order_by:
-            if order_by.startswith("-"):
-                order_by = order_by[1:]
-                order_by = self.MODEL.__table__.columns[order_by].desc()
-            else:
-                order_by = self.MODEL.__table__.columns[order_by]
-            query = query.order_by(order_by)
+            # id breaks ties, e.g. checks created in one transaction share created_at
+            column, descending = self._get_order_column(order_by)
+            query = query.order_by(*(c.desc() if descending else c for c in (column, self.MODEL.id)))
+        return await self._fetch_all(query, columns)
+
+    def _select(self, columns: Sequence = ()) -> Select:
+        return select(*columns) if columns else select(self.MODEL)
+
+    async def _fetch_all(self, query: Select, columns: Sequence = ()) -> Sequence[BaseModel] | Sequence[Row]:
+        if columns:
+            return (await self._db_call(self.session.execute, query)).all()
         return await self._db_call(self.session.scalars, query)
 
+    def _get_order_column(self, order_by: str) -> tuple[Column, bool]:
+        """Get the column and direction for `order_by` in "field"/"-field" notation"""
+        if order_by.startswith("-"):
+            return self.MODEL.__table__.columns[order_by[1:]], True
+        return self.MODEL.__table__.columns[order_by], False
+
+    async def fetch_keyset(
+        self,
+        filters: Sequence,
+        options: Sequence = (),
+        limit: int = None,
+        order_by: str = "id",
+        cursor: str | None = None,
+        columns: Sequence = (),
+    ) -> tuple[list[BaseModel] | list[Row], str | None, str | None]:
+        """
+        Fetch a page of obj, or rows of `columns` if provided, using keyset pagination over (order_by, id).
+
+        Returns the page with opaque cursors for the next and previous pages. Unlike offset pagination,
+        every page costs the same, because the cursor turns into an index range condition.
+        Rows must include the `order_by` and `id` columns.
+        """
+        column, descending = self._get_order_column(order_by)
+        key, backwards = None, False
+        if cursor:
+            data = decode_cursor(cursor)
+            if data.get("o") != order_by or not isinstance(data.get("k"), list) or len(data["k"]) != 2:
+                raise BadRequestException("Cursor does not match the requested ordering")
+            key, backwards = self._parse_cursor_key(column, data["k"]), data.get("d") == "prev"
+
+        key_columns = (column, self.MODEL.id)
+        scan_descending = descending != backwards
+        query = self._select(columns).where(*filters).options(*options)
+        if key is not None:
+            keyset = tuple_(*key_columns)
+            query = query.where(keyset < key if scan_descending else keyset > key)
+        query = query.order_by(*(c.desc() if scan_descending else c for c in key_columns))
+        if limit:
+            query = query.limit(limit + 1)
+
+        items = list(await self._fetch_all(query, columns))
+        has_more = bool(limit) and len(items) > limit
+        items = items[:limit] if limit else items
+        if backwards:
+            items.reverse()
+        if not items:
+            return items, None, None
+
+        has_next, has_prev = (key is not None, has_more) if backwards else (has_more, key is not None)
+        next_cursor = self._build_cursor(order_by, column, items[-1], "next") if has_next else None
+        prev_cursor = self._build_cursor(order_by, column, items[0], "prev") if has_prev else None
+        return items, next_cursor, prev_cursor
+
+    @staticmethod
+    def _build_cursor(order_by: str, column: Column, obj: BaseModel | Row, direction: str) -> str:
+        value = getattr(obj, column.key)
+        value = value.isoformat() if isinstance(value, datetime.datetime) else str(value)
+        return encode_cursor({"o": order_by, "k": [value, obj.id], "d": direction})
+
+    @staticmethod
+    def _parse_cursor_key(column: Column, key: list) -> tuple:
+        value, pk = key
+        try:
+            if column.type.python_type is datetime.datetime:
+                value = datetime.datetime.fromisoformat(value)
+            else:
+                value = column.type.python_type(value)
+            return value, int(pk)
+        except (TypeError, ValueError, ArithmeticError) as e:
+            raise BadRequestException("Invalid cursor") from e
+
     async def count(self, filters: Sequence):
         """
         Counts the number of entries in the database that satisfy the given filters.
@@ -76,6 +162,16 @@ class BaseService:
         query = select(count(self.MODEL.id)).where(*filters)
         return await self._db_call(self.session.scalar, query)
 
+    async def count_estimate(self, filters: Sequence) -> int:
+        """
+        Estimates the number of entries that satisfy the given filters from the query planner statistics.
+        """
+        query = select(self.MODEL.id).where(*filters)
+        plan = await self._db_call(self.session.scalar, Explain(query))
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]["Plan"]["Plan Rows"])
+
     async def update(self, obj: BaseModel, values: dict):
         """Update obj in DB"""
         for key, value in values.items():
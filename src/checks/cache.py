@@ -0,0 +1,99 @@
+import sys
+
+from typing import Iterable
+from typing import Iterator
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from sqlalchemy.orm import SessionTransaction
+
+from src.base.cache import LRUCache
+from src.conf.metrics import metrics
+from src.conf.settings import settings
+from src.users.models import User
+
+
+def sizeof_lines(lines: tuple[str, ...]) -> int:
+    return sys.getsizeof(lines) + sum(map(sys.getsizeof, lines))
+
+
+# Rendered receipt lines by `receipt_key`, grouped by user id. Receipts never change once created, except for the
+# user's name and `check_symbols`, which are part of the key, so other workers never serve a receipt of outdated user
+# data.
+receipt_cache = LRUCache(settings.RECEIPT_CACHE_MAX_SIZE, sizeof=sizeof_lines, group=lambda key: key[1])
+metrics.register_stats(
+    "cache", "receipts", receipt_cache.stats, gauges=("items", "size"), counters=("hits", "misses", "evictions")
+)
+
+
+def receipt_key(check_id: int, user: User) -> tuple:
+    """Cache key of a rendered receipt"""
+    return check_id, user.id, user.check_symbols, user.first_name, user.last_name
+
+
+def cache_receipt_lines(key: tuple, lines: Iterable[str]) -> Iterator[str]:
+    """Pass receipt lines through as they are laid out, caching the receipt once all lines are consumed"""
+    rendered = []
+    for line in lines:
+        rendered.append(line)
+        yield line
+    receipt_cache.set(key, tuple(rendered))
+
+
+@event.listens_for(User, "after_update")
+def invalidate_user_receipts(mapper, connection, target: User) -> None:
+    """Drop receipts of an updated user, they will never be requested with the old key again"""
+    receipt_cache.invalidate(target.id)
+
+
+# Ids of interned product names by name. Names are never renamed or deleted, so cached ids never go stale. Ids a
+# transaction inserts or reads wait in `session.info` by the savepoint they were got in until the transaction commits,
+# as a read may see names inserted by an earlier savepoint of the same transaction. A rolled back savepoint takes the
+# names of its own and of the savepoints within it.
+product_name_cache = LRUCache(settings.PRODUCT_NAME_CACHE_MAX_SIZE, sizeof=lambda id: 1)
+metrics.register_stats(
+    "cache",
+    "product_names",
+    product_name_cache.stats,
+    gauges=("items", "size"),
+    counters=("hits", "misses", "evictions"),
+)
+PENDING_PRODUCT_NAMES = "product_names"
+
+
+def get_pending_product_names(session: Session) -> dict[str, int]:
+    """Ids of names inserted or read by the open transaction of the session"""
+    return {name: id for ids in session.info.get(PENDING_PRODUCT_NAMES, {}).values() for name, id in ids.items()}
+
+
+def add_pending_product_names(session: Session, ids: dict[str, int]) -> None:
+    """Keep ids got in the innermost savepoint of the session until the transaction commits"""
+    transaction = session.get_nested_transaction() or session.get_transaction()
+    session.info.setdefault(PENDING_PRODUCT_NAMES, {}).setdefault(transaction, {}).update(ids)
+
+
+@event.listens_for(Session, "after_commit")
+def cache_committed_product_names(session: Session) -> None:
+    # also dispatched when a savepoint is released, its names are cached with the transaction
+    if session.in_nested_transaction():
+        return
+    for ids in session.info.pop(PENDING_PRODUCT_NAMES, {}).values():
+        for name, id in ids.items():
+            product_name_cache.set(name, id)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def forget_rolled_back_product_names(session: Session, previous_transaction: SessionTransaction) -> None:
+    pending = session.info.get(PENDING_PRODUCT_NAMES, {})
+    for transaction in list(pending):
+        ancestor = transaction
+        while ancestor is not None and ancestor is not previous_transaction:
+            ancestor = ancestor.parent
+        if ancestor is not None:
+            del pending[transaction]
+
+
+@event.listens_for(Session, "after_transaction_end")
+def forget_uncommitted_product_names(session: Session, transaction: SessionTransaction) -> None:
+    if transaction.parent is None:
+        session.info.pop(PENDING_PRODUCT_NAMES, None)
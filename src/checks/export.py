@@ -0,0 +1,242 @@
+import csv
+import enum
+import io
+
+from abc import ABC
+from abc import abstractmethod
+from itertools import groupby
+from operator import itemgetter
+from typing import Iterable
+from typing import Iterator
+
+from sqlalchemy import ColumnElement
+from sqlalchemy import literal_column
+
+from src.checks.models import Check
+from src.checks.models import CheckProduct
+from src.checks.models import ProductName
+from src.checks.money import MONEY_PLACES
+from src.checks.money import QUANTITY_PLACES
+from src.checks.money import format_minor
+from src.checks.records import as_text
+from src.checks.records import dump_json
+
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+
+class ExportFormat(str, enum.Enum):
+    csv = "csv"
+    parquet = "parquet"
+
+
+EXPORT_MEDIA_TYPES = {
+    ExportFormat.csv: "text/csv; charset=utf-8",
+    ExportFormat.parquet: "application/vnd.apache.parquet",
+}
+
+CHECK_EXPORT_FIELDS = ("id", "created_at", "payment_type", "paid_amount", "total", "rest", "comment", "products_count")
+PRODUCT_EXPORT_FIELDS = ("name", "price", "quantity", "total")
+
+
+def export_columns(export_format: ExportFormat) -> tuple[ColumnElement, ...]:
+    """Columns of the export query: check columns followed by the columns of one of its products and its name"""
+
+    def numeric(column: ColumnElement, places: int = MONEY_PLACES) -> ColumnElement:
+        """Integer amount as a decimal string, or as a numeric of the Parquet decimal scale"""
+        if export_format == ExportFormat.parquet:
+            return column * literal_column(format_minor(1, places))
+        return as_text(column, places)
+
+    return (
+        Check.id,
+        Check.created_at,
+        Check.payment_type,
+        numeric(Check.paid_amount),
+        numeric(Check.total),
+        numeric(Check.rest),
+        Check.comment,
+        Check.products_count,
+        ProductName.name,
+        numeric(CheckProduct.price),
+        numeric(CheckProduct.quantity, QUANTITY_PLACES),
+        numeric(CheckProduct.total),
+    )
+
+
+def iter_checks(rows: Iterable[tuple]) -> Iterator[tuple[tuple, list[tuple]]]:
+    """Group rows of consecutive products of a check into the check and its products"""
+    width = len(CHECK_EXPORT_FIELDS)
+    for _, check_rows in groupby(rows, itemgetter(0)):
+        check_rows = list(check_rows)
+        yield check_rows[0][:width], [row[width:] for row in check_rows if row[width] is not None]
+
+
+class Exporter(ABC):
+    """
+    Encoder of export rows, fed with chunks of rows ordered by check and returning encoded bytes for each of them.
+
+    In nested mode the rows of the last check of a chunk are held back until the next chunk or `close`,
+    as the rest of its products may come with the next chunk.
+    """
+
+    def __init__(self, nested: bool):
+        self.nested = nested
+        self.pending: list[tuple] = []
+
+    def header(self) -> bytes:
+        return b""
+
+    def write(self, rows: list[tuple]) -> bytes:
+        if not self.nested:
+            return self.write_rows(rows) if rows else b""
+        rows = self.pending + rows
+        split = len(rows)
+        while split > 0 and rows[split - 1][0] == rows[-1][0]:
+            split -= 1
+        self.pending = rows[split:]
+        return self.write_checks(list(iter_checks(rows[:split]))) if split else b""
+
+    def close(self) -> bytes:
+        if self.nested and self.pending:
+            data = self.write_checks(list(iter_checks(self.pending)))
+            self.pending = []
+            return data
+        return b""
+
+    @abstractmethod
+    def write_rows(self, rows: list[tuple]) -> bytes:
+        """Encode rows with one product each"""
+
+    @abstractmethod
+    def write_checks(self, checks: list[tuple[tuple, list[tuple]]]) -> bytes:
+        """Encode checks with all their products"""
+
+
+class CsvExporter(Exporter):
+    """CSV with one line per product, check columns repeated, or one line per check with products as JSON"""
+
+    def __init__(self, nested: bool):
+        super().__init__(nested)
+        self.buffer = io.StringIO()
+        self.writer = csv.writer(self.buffer)
+
+    def header(self) -> bytes:
+        products = ("products",) if self.nested else tuple(f"product_{field}" for field in PRODUCT_EXPORT_FIELDS)
+        self.writer.writerow((*CHECK_EXPORT_FIELDS, *products))
+        return self._drain()
+
+    def write_rows(self, rows: list[tuple]) -> bytes:
+        width = len(CHECK_EXPORT_FIELDS)
+        writerow = self.writer.writerow
+        for row in rows:
+            writerow((*self._check_values(row[:width]), *row[width:]))
+        return self._drain()
+
+    def write_checks(self, checks: list[tuple[tuple, list[tuple]]]) -> bytes:
+        writerow = self.writer.writerow
+        for check, products in checks:
+            products = [dict(zip(PRODUCT_EXPORT_FIELDS, product)) for product in products]
+            writerow((*self._check_values(check), dump_json(products).decode()))
+        return self._drain()
+
+    @staticmethod
+    def _check_values(check: tuple) -> tuple:
+        id, created_at, payment_type, *values = check
+        return id, created_at.isoformat(), payment_type.value, *values
+
+    def _drain(self) -> bytes:
+        data = self.buffer.getvalue().encode()
+        self.buffer.seek(0)
+        self.buffer.truncate()
+        return data
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file collecting what the Parquet writer writes until it is drained"""
+
+    def __init__(self):
+        self.chunks: list[bytes] = []
+        self.position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self.chunks.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self.position
+
+    def drain(self) -> bytes:
+        data = b"".join(self.chunks)
+        self.chunks.clear()
+        return data
+
+
+class ParquetExporter(Exporter):
+    """Parquet with a row group per chunk, products flattened into product_* columns or nested in a list column"""
+
+    def __init__(self, nested: bool):
+        super().__init__(nested)
+        money = pyarrow.decimal128(38, MONEY_PLACES)
+        check_fields = [
+            pyarrow.field("id", pyarrow.int64(), nullable=False),
+            pyarrow.field("created_at", pyarrow.timestamp("us"), nullable=False),
+            pyarrow.field("payment_type", pyarrow.string(), nullable=False),
+            pyarrow.field("paid_amount", money, nullable=False),
+            pyarrow.field("total", money, nullable=False),
+            pyarrow.field("rest", money, nullable=False),
+            pyarrow.field("comment", pyarrow.string()),
+            pyarrow.field("products_count", pyarrow.int32(), nullable=False),
+        ]
+        product_fields = [
+            pyarrow.field("name", pyarrow.string()),
+            pyarrow.field("price", money),
+            pyarrow.field("quantity", pyarrow.decimal128(38, QUANTITY_PLACES)),
+            pyarrow.field("total", money),
+        ]
+        if nested:
+            products = [pyarrow.field("products", pyarrow.list_(pyarrow.struct(product_fields)), nullable=False)]
+        else:
+            products = [field.with_name(f"product_{field.name}") for field in product_fields]
+        self.schema = pyarrow.schema(check_fields + products)
+        self.sink = _ChunkSink()
+        self.writer = pyarrow.parquet.ParquetWriter(self.sink, self.schema, compression="zstd")
+
+    def header(self) -> bytes:
+        return self.sink.drain()
+
+    def write_rows(self, rows: list[tuple]) -> bytes:
+        return self._write_row_group(rows)
+
+    def write_checks(self, checks: list[tuple[tuple, list[tuple]]]) -> bytes:
+        return self._write_row_group(
+            [
+                (*check, [dict(zip(PRODUCT_EXPORT_FIELDS, product)) for product in products])
+                for check, products in checks
+            ]
+        )
+
+    def close(self) -> bytes:
+        data = super().close()
+        self.writer.close()
+        return data + self.sink.drain()
+
+    def _write_row_group(self, rows: list[tuple]) -> bytes:
+        columns = dict(zip(self.schema.names, (list(column) for column in zip(*rows))))
+        columns["payment_type"] = [payment_type.value for payment_type in columns["payment_type"]]
+        self.writer.write_table(pyarrow.Table.from_pydict(columns, schema=self.schema))
+        return self.sink.drain()
+
+
+EXPORTERS = {
+    ExportFormat.csv: CsvExporter,
+    ExportFormat.parquet: ParquetExporter,
+}
@@ -0,0 +1,134 @@
+from functools import lru_cache
+from typing import Iterator
+
+from src.checks.models import Check
+from src.checks.models import CheckProduct
+from src.checks.models import PaymentTypeEnum
+from src.checks.money import format_amount
+from src.checks.money import format_money
+from src.checks.money import format_quantity
+from src.users.models import User
+
+
+class ReceiptLayout:
+    """
+    Single-pass receipt layout for a fixed receipt width.
+
+    Separators and padding are built once per width, every receipt line is produced in one pass
+    over the check, so rendering time is linear in the number of products.
+    """
+
+    def __init__(self, width: int):
+        self.width = width
+        self.separator = "-" * width
+        self.double_separator = "=" * width
+        self._spaces = tuple(" " * count for count in range(width + 1))
+
+    @classmethod
+    @lru_cache(maxsize=None)
+    def for_width(cls, width: int) -> "ReceiptLayout":
+        """Get shared layout for the width"""
+        return cls(width)
+
+    def pad(self, count: int) -> str:
+        return self._spaces[count] if count > 0 else ""
+
+    def left(self, text: str) -> str:
+        text = text.strip()
+        return f"{text}{self.pad(self.width - len(text))}"
+
+    def center(self, text: str) -> str:
+        text = text.strip()
+        spaces = self.pad((self.width - len(text)) // 2)
+        return f"{spaces}{text}{spaces}"
+
+    def justify(self, left: str, right: str) -> str:
+        """Put `left` and `right` texts to the opposite edges of the line"""
+        return f"{left}{self.pad(self.width - len(left) - len(right))}{right}"
+
+    def split(self, text: str, indentation: int = 0) -> list[str]:
+        step = self.width - indentation
+        return [text[i : i + step] for i in range(0, len(text), step)]
+
+    def render(self, check: Check) -> list[str]:
+        """Receipt lines of the check"""
+        buffer = []
+        self.write_header(buffer, check.user)
+        self.write_products(buffer, check.products)
+        self.write_payment(buffer, check)
+        self.write_footer(buffer, check)
+        return buffer
+
+    def iter_lines(self, check: Check, chunk_size: int = 256) -> Iterator[str]:
+        """Receipt lines of the check, laid out `chunk_size` products at a time"""
+        buffer = []
+        self.write_header(buffer, check.user)
+        yield from buffer
+        products = check.products
+        for start in range(0, max(len(products), 1), chunk_size):
+            buffer = []
+            self.write_products(buffer, products[start : start + chunk_size], start + chunk_size >= len(products))
+            yield from buffer
+        buffer = []
+        self.write_payment(buffer, check)
+        self.write_footer(buffer, check)
+        yield from buffer
+
+    def write_header(self, buffer: list[str], user: User) -> None:
+        header = f"ФОП {user.last_name} {user.first_name}"
+        if len(header) <= self.width:
+            buffer.append(self.center(header))
+        else:
+            line = ""
+            for part in header.split(" "):
+                if len(line) + 1 + len(part) <= self.width:
+                    line = f"{line} {part}"
+                    continue
+                if line:
+                    buffer.append(self.center(line))
+                line = ""
+                if len(part) <= self.width:
+                    line = part
+                else:
+                    buffer.extend(self.center(part_line) for part_line in self.split(part))
+            buffer.append(self.center(line))
+        buffer.append(self.double_separator)
+
+    def write_products(self, buffer: list[str], products: list[CheckProduct], last_chunk: bool = True) -> None:
+        width, spaces, append, separator = self.width, self._spaces, buffer.append, self.separator
+        for product in products:
+            total_price = f"= {format_money(product.total)}"
+            total_price_length = len(total_price)
+            name = product.name
+            if len(name) + total_price_length <= width:
+                # inlined `left` and `justify`, the lines are known to fit the width here
+                name = name.strip()
+                append(f"{name}{spaces[width - len(name)]}")
+            else:
+                buffer.extend(self.split(name, total_price_length))
+
+            price_formation = f"{format_quantity(product.quantity)} x {format_amount(product.price)}"
+            if len(price_formation) + total_price_length <= width:
+                append(f"{price_formation}{spaces[width - len(price_formation) - total_price_length]}{total_price}")
+            else:
+                lines = [line for part in price_formation.split(" ") for line in self.split(part, total_price_length)]
+                lines[-1] = self.justify(lines[-1], total_price)
+                buffer.extend(lines)
+            append(separator)
+
+        if products and last_chunk:
+            buffer[-1] = self.double_separator
+        elif last_chunk:
+            append(self.double_separator)
+
+    def write_payment(self, buffer: list[str], check: Check) -> None:
+        payment_type = "Картка" if check.payment.type == PaymentTypeEnum.card else "Готівка"
+        buffer.append(self.justify("Сума", format_money(check.total)))
+        buffer.append(self.justify(payment_type, format_money(check.payment.amount)))
+        buffer.append(self.justify("Решта", format_money(check.rest)))
+        buffer.append(self.double_separator)
+
+    def write_footer(self, buffer: list[str], check: Check) -> None:
+        buffer.append(self.center("Дякуємо за покупку!"))
+        buffer.append(self.center(str(check.created_at.replace(microsecond=0))))
+        buffer.extend(self.center(part) for part in self.split(check.comment or ""))
@@ -1,9 +1,17 @@
 import enum
 
-from decimal import Decimal
+from datetime import date
+from datetime import datetime
 from typing import Optional
 
+from sqlalchemy import BigInteger
 from sqlalchemy import ForeignKey
+from sqlalchemy import ForeignKeyConstraint
+from sqlalchemy import Index
+from sqlalchemy import PrimaryKeyConstraint
+from sqlalchemy import UniqueConstraint
+from sqlalchemy.ext.associationproxy import AssociationProxy
+from sqlalchemy.ext.associationproxy import association_proxy
 from sqlalchemy.orm import Mapped
 from sqlalchemy.orm import mapped_column
 from sqlalchemy.orm import relationship
@@ -17,35 +25,89 @@ class PaymentTypeEnum(enum.Enum):
     card = "card"
 
 
+class ProductName(BaseModel):
+    """Interned product name, check products refer to their names by id"""
+
+    __tablename__ = "product_names"
+    # substring and similarity search of names, needs the pg_trgm extension
+    __table_args__ = (
+        Index("ix_product_names_name_trgm", "name", postgresql_using="gin", postgresql_ops={"name": "gin_trgm_ops"}),
+    )
+
+    name: Mapped[str] = mapped_column(unique=True)
+
+
 class CheckProduct(BaseModel):
     __tablename__ = "check_products"
-
-    name: Mapped[str]
-    price: Mapped[Decimal]
-    quantity: Mapped[Decimal]
-    total: Mapped[Decimal]
-    check_id: Mapped[int] = mapped_column(ForeignKey("checks.id"))
+    __table_args__ = (
+        PrimaryKeyConstraint("id", "check_created_at"),
+        ForeignKeyConstraint(["check_id", "check_created_at"], ["checks.id", "checks.created_at"]),
+        Index("ix_check_products_check_id", "check_id"),
+        Index("ix_check_products_name_id_check_id_check_created_at", "name_id", "check_id", "check_created_at"),
+        {"postgresql_partition_by": "RANGE (check_created_at)"},
+    )
+    __mapper_args__ = {"primary_key": ["id"]}
+
+    id: Mapped[int] = mapped_column(autoincrement=True)
+    name_id: Mapped[int] = mapped_column(ForeignKey("product_names.id"))
+    # kopecks, quantity in thousandths, see src.checks.money
+    price: Mapped[int] = mapped_column(BigInteger)
+    quantity: Mapped[int] = mapped_column(BigInteger)
+    total: Mapped[int] = mapped_column(BigInteger)
+    check_id: Mapped[int]
+    # partition key, co-partitioned with the check
+    check_created_at: Mapped[datetime]
 
     check: Mapped["Check"] = relationship("Check", back_populates="products")
+    # joined on load, products are written with `name_id` of the interned name
+    product_name: Mapped["ProductName"] = relationship("ProductName", lazy="joined", innerjoin=True)
+    name: AssociationProxy[str] = association_proxy("product_name", "name")
 
 
 class CheckPayment(BaseModel):
     __tablename__ = "check_payments"
+    __table_args__ = (
+        PrimaryKeyConstraint("id", "check_created_at"),
+        ForeignKeyConstraint(["check_id", "check_created_at"], ["checks.id", "checks.created_at"]),
+        Index("ix_check_payments_check_id_type", "check_id", "type"),
+        {"postgresql_partition_by": "RANGE (check_created_at)"},
+    )
+    __mapper_args__ = {"primary_key": ["id"]}
 
+    id: Mapped[int] = mapped_column(autoincrement=True)
     type: Mapped[PaymentTypeEnum]
-    amount: Mapped[Decimal]
-    check_id: Mapped[int] = mapped_column(ForeignKey("checks.id"))
+    amount: Mapped[int] = mapped_column(BigInteger)  # kopecks
+    check_id: Mapped[int]
+    # partition key, co-partitioned with the check
+    check_created_at: Mapped[datetime]
 
     check: Mapped["Check"] = relationship("Check", back_populates="payment")
 
 
 class Check(BaseModel):
     __tablename__ = "checks"
+    __table_args__ = (
+        PrimaryKeyConstraint("id", "created_at"),
+        Index("ix_checks_user_id_created_at_id", "user_id", "created_at", "id"),
+        Index("ix_checks_user_id_total_id", "user_id", "total", "id"),
+        Index("ix_checks_user_id_payment_type_created_at_id", "user_id", "payment_type", "created_at", "id"),
+        # monthly partitions, see src.checks.partitions
+        {"postgresql_partition_by": "RANGE (created_at)"},
+    )
+    # the partition key is a part of the table primary key, checks are still identified by id alone
+    __mapper_args__ = {"primary_key": ["id"]}
+
+    id: Mapped[int] = mapped_column(autoincrement=True)
 
     comment: Mapped[Optional[str]] = mapped_column(server_default="Тут могло бути передбачення з Сільпо))")
-    total: Mapped[Decimal]
-    rest: Mapped[Decimal]
+    # kopecks, see src.checks.money
+    total: Mapped[int] = mapped_column(BigInteger)
+    rest: Mapped[int] = mapped_column(BigInteger)
     user_id: Mapped[int] = mapped_column(ForeignKey("users.id"))
+    # summary of the payment and products, filled on creation to filter and list checks without child tables
+    payment_type: Mapped[PaymentTypeEnum]
+    paid_amount: Mapped[int] = mapped_column(BigInteger)
+    products_count: Mapped[int]
 
     user: Mapped["User"] = relationship("User", backref="checks")
     payment: Mapped["CheckPayment"] = relationship("CheckPayment", back_populates="check")
@@ -53,4 +115,31 @@ class Check(BaseModel):
         "CheckProduct",
         back_populates="check",
         cascade="all, delete-orphan",
+        order_by="CheckProduct.id",
     )
+
+
+class CheckDailyStat(BaseModel):
+    """Checks count and revenue per user, day and payment type, maintained on check creation"""
+
+    __tablename__ = "check_daily_stats"
+    __table_args__ = (UniqueConstraint("user_id", "day", "payment_type"),)
+
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id"))
+    day: Mapped[date]
+    payment_type: Mapped[PaymentTypeEnum]
+    checks_count: Mapped[int]
+    total_amount: Mapped[int] = mapped_column(BigInteger)  # kopecks
+
+
+class CheckMonthlyStat(BaseModel):
+    """Checks count and revenue per user, month and payment type, maintained on check creation"""
+
+    __tablename__ = "check_monthly_stats"
+    __table_args__ = (UniqueConstraint("user_id", "month", "payment_type"),)
+
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id"))
+    month: Mapped[date]  # first day of the month
+    payment_type: Mapped[PaymentTypeEnum]
+    checks_count: Mapped[int]
+    total_amount: Mapped[int] = mapped_column(BigInteger)  # kopecks
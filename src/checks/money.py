@@ -0,0 +1,98 @@
+from decimal import Decimal
+from decimal import InvalidOperation
+from functools import partial
+from typing import Annotated
+from typing import Any
+
+from pydantic import BeforeValidator
+from pydantic import PlainSerializer
+from pydantic import WithJsonSchema
+
+
+# money is stored in kopecks and quantities in thousandths, as integers
+MONEY_PLACES = 2
+QUANTITY_PLACES = 3
+MONEY_SCALE = 10**MONEY_PLACES
+QUANTITY_SCALE = 10**QUANTITY_PLACES
+# limits of request amounts and of check totals, a product total of the largest price and quantity still fits a BIGINT
+MONEY_LIMIT = 10**12
+QUANTITY_LIMIT = 10**9
+
+
+def to_minor(value: Any, places: int, limit: int) -> int:
+    """Decimal number, or its string, as an integer count of `10 ** -places` units not exceeding `limit` by modulus"""
+    if isinstance(value, bool):
+        raise ValueError("A decimal number is expected")
+    try:
+        # floats by their shortest repr, 12.35 is "12.35" rather than its binary value
+        number = Decimal(repr(value) if isinstance(value, float) else value)
+    except (InvalidOperation, TypeError, ValueError) as e:
+        raise ValueError("A decimal number is expected") from e
+    if not number.is_finite():
+        raise ValueError("A finite decimal number is expected")
+    # bounded before scaling, so huge exponents neither overflow nor allocate huge integers
+    if number.copy_abs() > Decimal(limit).scaleb(-places):
+        raise ValueError(f"The modulus must not exceed {format_minor(limit, places)}")
+    rounded = number.quantize(Decimal(1).scaleb(-places))
+    if rounded != number:
+        raise ValueError(f"At most {places} decimal places are allowed")
+    return int(rounded.scaleb(places))
+
+
+def format_minor(value: int, places: int) -> str:
+    """Integer count of `10 ** -places` units as a decimal string with `places` decimal places, "12.35" for 1235"""
+    whole, fraction = divmod(abs(value), 10**places)
+    return f"{'-' if value < 0 else ''}{whole}.{fraction:0{places}d}"
+
+
+def to_decimal(value: int, places: int) -> Decimal:
+    return Decimal(value).scaleb(-places)
+
+
+def product_total(price: int, quantity: int) -> int:
+    """Kopecks of `quantity` thousandths at `price` kopecks, rounded half up"""
+    return (price * quantity + QUANTITY_SCALE // 2) // QUANTITY_SCALE
+
+
+# fractional parts by remainder, amounts are formatted for every product of receipts and pages
+_MONEY_FRACTIONS = tuple(f".{fraction:0{MONEY_PLACES}d}" for fraction in range(MONEY_SCALE))
+_SHORT_MONEY_FRACTIONS = tuple(fraction.rstrip("0").rstrip(".") for fraction in _MONEY_FRACTIONS)
+_SHORT_QUANTITY_FRACTIONS = tuple(
+    f".{fraction:0{QUANTITY_PLACES}d}".rstrip("0").rstrip(".") for fraction in range(QUANTITY_SCALE)
+)
+
+
+def format_money(value: int) -> str:
+    """Kopecks as a decimal string with `MONEY_PLACES` decimal places, the way receipts print totals"""
+    if value < 0:
+        return "-" + format_money(-value)
+    return str(value // MONEY_SCALE) + _MONEY_FRACTIONS[value % MONEY_SCALE]
+
+
+def format_amount(value: int) -> str:
+    """Kopecks as the shortest decimal string, "12.5" for 1250 and "12" for 1200, the way prices were sent"""
+    if value < 0:
+        return "-" + format_amount(-value)
+    return str(value // MONEY_SCALE) + _SHORT_MONEY_FRACTIONS[value % MONEY_SCALE]
+
+
+def format_quantity(value: int) -> str:
+    """Thousandths as the shortest decimal string, "1.5" for 1500 and "2" for 2000"""
+    if value < 0:
+        return "-" + format_quantity(-value)
+    return str(value // QUANTITY_SCALE) + _SHORT_QUANTITY_FRACTIONS[value % QUANTITY_SCALE]
+
+
+_DECIMAL_INPUT_SCHEMA = WithJsonSchema({"anyOf": [{"type": "number"}, {"type": "string"}]})
+_DECIMAL_OUTPUT_SCHEMA = WithJsonSchema({"type": "string", "format": "decimal"})
+
+# request amounts, decimal numbers or strings parsed to kopecks and thousandths
+MoneyInput = Annotated[
+    int, BeforeValidator(partial(to_minor, places=MONEY_PLACES, limit=MONEY_LIMIT)), _DECIMAL_INPUT_SCHEMA
+]
+QuantityInput = Annotated[
+    int, BeforeValidator(partial(to_minor, places=QUANTITY_PLACES, limit=QUANTITY_LIMIT)), _DECIMAL_INPUT_SCHEMA
+]
+# response amounts, kopecks and thousandths serialized as the shortest decimal strings
+Money = Annotated[int, PlainSerializer(format_amount, return_type=str), _DECIMAL_OUTPUT_SCHEMA]
+Quantity = Annotated[int, PlainSerializer(format_quantity, return_type=str), _DECIMAL_OUTPUT_SCHEMA]
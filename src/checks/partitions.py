@@ -0,0 +1,145 @@
+"""
+Monthly partitions of checks, check_payments and check_products.
+
+Detaching old months also deletes their rows of the check_daily_stats and check_monthly_stats rollups, so counts,
+totals and analytics served from the rollups cover the attached checks only.
+"""
+
+import asyncio
+import logging
+import re
+
+from datetime import date
+from datetime import datetime
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+
+logger = logging.getLogger(__name__)
+
+# co-partitioned by month of the check creation time, the referenced checks table first
+PARTITIONED_TABLES = ("checks", "check_payments", "check_products")
+PARTITION_NAME = re.compile(rf"^(?:{'|'.join(PARTITIONED_TABLES)})_p(\d{{4}})(\d{{2}})$")
+# serializes partition changes of the workers
+PARTITIONS_LOCK_KEY = 0x636865636B73
+
+
+def add_months(month: date, months: int) -> date:
+    """First day of the month `months` after the month of `month`"""
+    year, month_index = divmod(month.year * 12 + month.month - 1 + months, 12)
+    return date(year, month_index + 1, 1)
+
+
+def partition_name(table: str, month: date) -> str:
+    return f"{table}_p{month:%Y%m}"
+
+
+def partition_month(name: str) -> date | None:
+    """Month of a partition of the partitioned tables, None for other tables"""
+    match = PARTITION_NAME.match(name)
+    return date(int(match[1]), int(match[2]), 1) if match else None
+
+
+async def get_partitions(connection: AsyncConnection) -> dict[str, list[date]]:
+    """Attached partitions of the partitioned tables by table, in month order"""
+    rows = await connection.execute(
+        text(
+            """
+            SELECT parent.relname, child.relname
+            FROM pg_inherits
+            JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+            JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+            WHERE parent.relname = ANY(:tables) AND parent.relnamespace = 'public'::regnamespace
+            """
+        ),
+        {"tables": list(PARTITIONED_TABLES)},
+    )
+    partitions = {table: [] for table in PARTITIONED_TABLES}
+    for table, name in rows:
+        if (month := partition_month(name)) is not None:
+            partitions[table].append(month)
+    return {table: sorted(months) for table, months in partitions.items()}
+
+
+async def create_partitions(engine: AsyncEngine, months_ahead: int) -> list[str]:
+    """Create missing partitions from the current month to `months_ahead` months later, returns their names"""
+    current_month = datetime.now(tz=None).date().replace(day=1)
+    months = [add_months(current_month, offset) for offset in range(months_ahead + 1)]
+    created = []
+    async with engine.begin() as connection:
+        await connection.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": PARTITIONS_LOCK_KEY})
+        partitions = await get_partitions(connection)
+        for month in months:
+            for table in PARTITIONED_TABLES:
+                if month in partitions[table]:
+                    continue
+                name = partition_name(table, month)
+                await connection.execute(
+                    text(
+                        f"CREATE TABLE {name} PARTITION OF {table} "
+                        f"FOR VALUES FROM ('{month.isoformat()}') TO ('{add_months(month, 1).isoformat()}')"
+                    )
+                )
+                created.append(name)
+    if created:
+        logger.info("Created partitions %s", ", ".join(created))
+    return created
+
+
+async def detach_partitions(engine: AsyncEngine, before: date, drop: bool = False) -> list[str]:
+    """
+    Detach partitions of the months before `before` from all partitioned tables, returns their names.
+
+    Partitions are detached CONCURRENTLY, without blocking queries of the other months. Detached tables of the child
+    tables lose their foreign keys to checks, so the detached months stay as standalone tables until they are dropped,
+    with `drop` right away. Rollups of the detached months are deleted under the same lock, also if an earlier run
+    failed after detaching.
+    """
+    # the first month that is not detached
+    cutoff = before if before.day == 1 else add_months(before, 1)
+    detached = []
+    async with engine.connect() as connection:
+        connection = await connection.execution_options(isolation_level="AUTOCOMMIT")
+        await connection.execute(text("SELECT pg_advisory_lock(:key)"), {"key": PARTITIONS_LOCK_KEY})
+        try:
+            partitions = await get_partitions(connection)
+            # child tables first, detached rows of checks must not be referenced by attached partitions
+            for table in reversed(PARTITIONED_TABLES):
+                for month in partitions[table]:
+                    if month >= before:
+                        break
+                    name = partition_name(table, month)
+                    await connection.execute(text(f"ALTER TABLE {table} DETACH PARTITION {name} CONCURRENTLY"))
+                    if table != "checks":
+                        constraints = await connection.scalars(
+                            text(
+                                "SELECT conname FROM pg_constraint "
+                                "WHERE conrelid = CAST(:name AS regclass) AND contype = 'f'"
+                            ),
+                            {"name": name},
+                        )
+                        for constraint in constraints.all():
+                            await connection.execute(text(f'ALTER TABLE {name} DROP CONSTRAINT "{constraint}"'))
+                    detached.append(name)
+            for table, column in (("check_daily_stats", "day"), ("check_monthly_stats", "month")):
+                await connection.execute(text(f"DELETE FROM {table} WHERE {column} < :cutoff"), {"cutoff": cutoff})
+            if drop:
+                for name in detached:
+                    await connection.execute(text(f"DROP TABLE {name}"))
+        finally:
+            await connection.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": PARTITIONS_LOCK_KEY})
+    if detached:
+        logger.info("%s partitions %s", "Dropped" if drop else "Detached", ", ".join(detached))
+    return detached
+
+
+async def create_partitions_periodically(engine: AsyncEngine, months_ahead: int, interval: float) -> None:
+    """Keep partitions of the next months created, so inserts never miss a partition"""
+    while True:
+        try:
+            await create_partitions(engine, months_ahead)
+        except Exception:
+            logger.exception("Creating partitions failed")
+        await asyncio.sleep(interval)
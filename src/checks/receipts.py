@@ -0,0 +1,69 @@
+import enum
+
+from typing import Iterable
+from typing import Iterator
+
+from src.conf.settings import settings
+
+
+class ReceiptFormat(str, enum.Enum):
+    html = "html"
+    text = "text"
+    escpos = "escpos"
+    json = "json"
+
+
+RECEIPT_MEDIA_TYPES = {
+    ReceiptFormat.html: "text/html",
+    ReceiptFormat.text: "text/plain",
+    ReceiptFormat.escpos: "application/vnd.escpos",
+    ReceiptFormat.json: "application/json",
+}
+
+ESCPOS_INIT = b"\x1b@"  # ESC @, reset printer
+ESCPOS_CODEPAGE = b"\x1bt"  # ESC t n, select character code table
+ESCPOS_FEED_AND_CUT = b"\x1bd\x04\x1dV\x01"  # ESC d 4, feed 4 lines; GS V 1, partial cut
+# Ukrainian letters missing in cp866, the default printer code page
+ESCPOS_TRANSLATION = str.maketrans("ІіҐґ", "IiГг")
+
+
+def negotiate_receipt_format(receipt_format: ReceiptFormat | None, accept: str | None) -> ReceiptFormat:
+    """Pick receipt format from the query parameter, or from the Accept header by its quality values"""
+    if receipt_format is not None:
+        return receipt_format
+
+    best_format, best_quality = ReceiptFormat.html, 0.0
+    for media_range in (accept or "").split(","):
+        media_type, *params = (part.strip() for part in media_range.split(";"))
+        quality = 1.0
+        for param in params:
+            if param.startswith("q="):
+                try:
+                    quality = float(param[2:])
+                except ValueError:
+                    quality = 0.0
+        for candidate, candidate_media_type in RECEIPT_MEDIA_TYPES.items():
+            if media_type == candidate_media_type and quality > best_quality:
+                best_format, best_quality = candidate, quality
+    return best_format
+
+
+def iter_text_receipt(lines: Iterable[str]) -> Iterator[bytes]:
+    """Stream receipt lines as UTF-8 plain text"""
+    for line in lines:
+        yield f"{line}\n".encode()
+
+
+def iter_escpos_receipt(lines: Iterable[str]) -> Iterator[bytes]:
+    """Stream receipt lines as raw ESC/POS commands for thermal printers"""
+    encoding = settings.RECEIPT_ESCPOS_ENCODING
+    yield ESCPOS_INIT + ESCPOS_CODEPAGE + bytes((settings.RECEIPT_ESCPOS_CODEPAGE,))
+    for line in lines:
+        yield f"{line.translate(ESCPOS_TRANSLATION)}\n".encode(encoding, errors="replace")
+    yield ESCPOS_FEED_AND_CUT
+
+
+RECEIPT_ENCODERS = {
+    ReceiptFormat.text: iter_text_receipt,
+    ReceiptFormat.escpos: iter_escpos_receipt,
+}
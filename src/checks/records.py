@@ -0,0 +1,219 @@
+import enum
+import json
+
+from datetime import datetime
+from decimal import Decimal
+from typing import Any
+
+from sqlalchemy import ColumnElement
+from sqlalchemy import Text
+from sqlalchemy import case
+from sqlalchemy import cast
+from sqlalchemy import func
+from sqlalchemy import literal_column
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import aggregate_order_by
+
+from src.checks.models import Check
+from src.checks.models import CheckProduct
+from src.checks.models import ProductName
+from src.checks.money import MONEY_PLACES
+from src.checks.money import QUANTITY_PLACES
+from src.checks.money import format_amount
+from src.checks.money import format_minor
+from src.checks.money import format_quantity
+from src.conf.settings import settings
+
+
+# columns of the lean read path, in the order of `CheckRecord.__init__` arguments
+CHECK_RECORD_COLUMNS = (
+    Check.id,
+    Check.comment,
+    Check.total,
+    Check.rest,
+    Check.created_at,
+    Check.updated_at,
+    Check.payment_type,
+    Check.paid_amount,
+    Check.products_count,
+)
+PRODUCT_RECORD_COLUMNS = (
+    CheckProduct.check_id,
+    ProductName.name,
+    CheckProduct.price,
+    CheckProduct.quantity,
+    CheckProduct.total,
+)
+
+
+class CheckRecord:
+    """
+    Read-only check of the lean read path.
+
+    Built from plain rows without ORM state, products are kept as `(name, price, quantity, total)` tuples.
+    `full` and `summary` give the fields of `CheckDTOResponseSchema` and `CheckSummaryDTOResponseSchema`
+    in their order, amounts formatted like `Money` and `Quantity`, so the serialized records are identical
+    to the serialized schemas.
+    """
+
+    __slots__ = (
+        "id",
+        "comment",
+        "total",
+        "rest",
+        "created_at",
+        "updated_at",
+        "payment_type",
+        "paid_amount",
+        "products_count",
+        "products",
+    )
+
+    def __init__(
+        self,
+        id: int,
+        comment: str | None,
+        total: int,
+        rest: int,
+        created_at: datetime,
+        updated_at: datetime,
+        payment_type: enum.Enum,
+        paid_amount: int,
+        products_count: int,
+    ):
+        self.id = id
+        self.comment = comment
+        self.total = total
+        self.rest = rest
+        self.created_at = created_at
+        self.updated_at = updated_at
+        self.payment_type = payment_type
+        self.paid_amount = paid_amount
+        self.products_count = products_count
+        self.products: list[tuple] = []
+
+    @property
+    def url(self) -> str:
+        return f"http://localhost:{settings.PORT}/api/v1/checks/{self.id}"
+
+    def full(self) -> dict:
+        return {
+            "id": self.id,
+            "products": [
+                {
+                    "name": name,
+                    "price": format_amount(price),
+                    "quantity": format_quantity(quantity),
+                    "total": format_amount(total),
+                }
+                for name, price, quantity, total in self.products
+            ],
+            "payment": {"type": self.payment_type, "amount": format_amount(self.paid_amount)},
+            "comment": self.comment,
+            "total": format_amount(self.total),
+            "rest": format_amount(self.rest),
+            "created_at": self.created_at,
+            "updated_at": self.updated_at,
+            "url": self.url,
+        }
+
+    def summary(self) -> dict:
+        return {
+            "id": self.id,
+            "payment_type": self.payment_type,
+            "paid_amount": format_amount(self.paid_amount),
+            "products_count": self.products_count,
+            "comment": self.comment,
+            "total": format_amount(self.total),
+            "rest": format_amount(self.rest),
+            "created_at": self.created_at,
+            "updated_at": self.updated_at,
+            "url": self.url,
+        }
+
+
+def encode_value(value: Any) -> Any:
+    """Encode values the way pydantic serializes them to JSON"""
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, enum.Enum):
+        return value.value
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+json_encoder = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"), default=encode_value)
+
+
+def dump_json(data: Any) -> bytes:
+    return json_encoder.encode(data).encode()
+
+
+def dump_page_json(total: int, estimated: bool, next: str | None, prev: str | None, results: list[str]) -> bytes:
+    """`ChecksWithPaginationResponseSchema` document around results that are JSON already"""
+    header = dump_json({"total": total, "estimated": estimated, "next": next, "prev": prev})
+    return b"".join((header[:-1], b',"results":[', ",".join(results).encode(), b"]}"))
+
+
+def json_object(**fields: ColumnElement) -> ColumnElement:
+    """`json_build_object` keeping the order of `fields`"""
+    return func.json_build_object(
+        *(arg for key, value in fields.items() for arg in (literal_column(f"'{key}'"), value))
+    )
+
+
+def as_text(column: ColumnElement, places: int = MONEY_PLACES) -> ColumnElement:
+    """Integer count of `10 ** -places` units as a JSON string, formatted like `format_amount` and `format_quantity`"""
+    # an integer times 0.01 is a numeric of scale 2, trim_scale drops its trailing zeros
+    return cast(func.trim_scale(column * literal_column(format_minor(1, places))), Text)
+
+
+def as_isoformat(column: ColumnElement) -> ColumnElement:
+    """Timestamp formatted like `datetime.isoformat`, with all 6 digits of microseconds unless they are 0"""
+    microseconds = case((func.date_trunc("second", column) == column, ""), else_=func.to_char(column, ".US"))
+    return func.concat(func.to_char(column, 'YYYY-MM-DD"T"HH24:MI:SS'), microseconds)
+
+
+def check_json(view: str) -> ColumnElement:
+    """
+    JSON of a check built by Postgres, with the fields of `CheckRecord.full` or `CheckRecord.summary`.
+
+    Amounts and timestamps are rendered as strings the way pydantic serializes them, so the document parses
+    to the same data as the serialized schema, only the whitespace differs.
+    """
+    if view == "summary":
+        fields = {
+            "id": Check.id,
+            "payment_type": Check.payment_type,
+            "paid_amount": as_text(Check.paid_amount),
+            "products_count": Check.products_count,
+        }
+    else:
+        product = json_object(
+            name=ProductName.name,
+            price=as_text(CheckProduct.price),
+            quantity=as_text(CheckProduct.quantity, QUANTITY_PLACES),
+            total=as_text(CheckProduct.total),
+        )
+        products = (
+            select(func.coalesce(func.json_agg(aggregate_order_by(product, CheckProduct.id)), literal_column("'[]'")))
+            .select_from(CheckProduct)
+            .join(ProductName, ProductName.id == CheckProduct.name_id)
+            .where(CheckProduct.check_id == Check.id, CheckProduct.check_created_at == Check.created_at)
+            .scalar_subquery()
+        )
+        fields = {
+            "id": Check.id,
+            "products": products,
+            "payment": json_object(type=Check.payment_type, amount=as_text(Check.paid_amount)),
+        }
+    fields |= {
+        "comment": Check.comment,
+        "total": as_text(Check.total),
+        "rest": as_text(Check.rest),
+        "created_at": as_isoformat(Check.created_at),
+        "updated_at": as_isoformat(Check.updated_at),
+        "url": func.concat(f"http://localhost:{settings.PORT}/api/v1/checks/", Check.id),
+    }
+    return cast(json_object(**fields), Text)
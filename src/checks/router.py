@@ -3,21 +3,48 @@ import logging
 from typing import Annotated
 
 from fastapi import APIRouter
+from fastapi import HTTPException
 from fastapi import Request
+from fastapi import Response
 from fastapi.params import Depends
 from fastapi.params import Query
 from fastapi.responses import HTMLResponse
+from fastapi.responses import StreamingResponse
+from fastapi.security import HTTPAuthorizationCredentials
+from sqlalchemy.exc import DataError
+from sqlalchemy.exc import IntegrityError
 from starlette.templating import Jinja2Templates
 
+from src.base.dependencies import query_budget
+from src.base.schemas import CacheStatsSchema
+from src.checks.cache import receipt_cache
 from src.checks.dependencies import get_check_service
+from src.checks.export import EXPORT_MEDIA_TYPES
+from src.checks.export import ExportFormat
+from src.checks.export import pyarrow
+from src.checks.receipts import RECEIPT_ENCODERS
+from src.checks.receipts import RECEIPT_MEDIA_TYPES
+from src.checks.receipts import ReceiptFormat
+from src.checks.receipts import negotiate_receipt_format
+from src.checks.schemas import CheckBatchDTOCreateSchema
+from src.checks.schemas import CheckBatchItemResultSchema
+from src.checks.schemas import CheckBatchResponseSchema
 from src.checks.schemas import CheckDTOCreateSchema
 from src.checks.schemas import CheckDTOResponseSchema
+from src.checks.schemas import CheckPrintRequestSchema
 from src.checks.schemas import ChecksWithPaginationResponseSchema
+from src.checks.schemas import ExportParams
 from src.checks.schemas import FilterParams
+from src.checks.schemas import SalesAnalyticsParams
+from src.checks.schemas import SalesAnalyticsResponseSchema
 from src.checks.service import CheckService
-from src.checks.service import MarkupService
+from src.conf.exceptions import BadRequestException
+from src.conf.exceptions import DoesNotExistException
 from src.users.dependencies import get_authenticated_user
+from src.users.dependencies import get_user_service
+from src.users.dependencies import optional_auth_scheme
 from src.users.models import User
+from src.users.service import UserService
 
 
 logger = logging.getLogger(__name__)
@@ -26,29 +53,139 @@ router = APIRouter(prefix="/checks")
 
 templates = Jinja2Templates(directory="src/checks/templates")
 
+# messages of checks of a batch failed by the database, by error type
+BATCH_ITEM_ERRORS = (
+    (IntegrityError, "Check could not be created, it conflicts with stored data"),
+    (DataError, "Check could not be created, a value is out of range"),
+)
+
 
 @router.get(
     "/",
     responses={
         200: {"model": ChecksWithPaginationResponseSchema},
     },
+    dependencies=[Depends(query_budget(5))],
 )
 async def checks_list(
     user: Annotated[User, Depends(get_authenticated_user)],
     service: Annotated[CheckService, Depends(get_check_service)],
     query_params: Annotated[FilterParams, Query()],
 ):
-    return await service.get_user_checks(user, query_params)
+    checks = await service.get_user_checks(user, query_params)
+    if isinstance(checks, bytes):
+        return Response(checks, media_type="application/json")
+    return checks
+
+
+@router.post(
+    "/print",
+    response_class=StreamingResponse,
+    responses={
+        200: {"content": {"text/plain": {}, "application/vnd.escpos": {}}},
+    },
+)
+async def print_checks(
+    user: Annotated[User, Depends(get_authenticated_user)],
+    request_data: CheckPrintRequestSchema,
+):
+    return StreamingResponse(
+        CheckService.iter_printed_receipts(user, request_data),
+        media_type=RECEIPT_MEDIA_TYPES[request_data.format],
+    )
+
+
+@router.get(
+    "/export",
+    response_class=StreamingResponse,
+    responses={
+        200: {"content": {media_type.split(";")[0]: {} for media_type in EXPORT_MEDIA_TYPES.values()}},
+        400: {"model": None},
+    },
+)
+async def export_checks(
+    user: Annotated[User, Depends(get_authenticated_user)],
+    params: Annotated[ExportParams, Query()],
+):
+    if params.format == ExportFormat.parquet and pyarrow is None:
+        raise BadRequestException("Parquet export is not available, pyarrow is not installed")
+    return StreamingResponse(
+        CheckService.iter_export(user, params),
+        media_type=EXPORT_MEDIA_TYPES[params.format],
+        headers={"Content-Disposition": f'attachment; filename="checks.{params.format.value}"'},
+    )
+
+
+@router.get(
+    "/receipts/cache",
+    responses={
+        200: {"model": CacheStatsSchema},
+    },
+    dependencies=[Depends(get_authenticated_user)],
+)
+async def receipts_cache_stats():
+    return receipt_cache.stats()
+
+
+@router.get(
+    "/analytics",
+    responses={
+        200: {"model": SalesAnalyticsResponseSchema},
+    },
+    dependencies=[Depends(query_budget(2))],
+)
+async def sales_analytics(
+    user: Annotated[User, Depends(get_authenticated_user)],
+    service: Annotated[CheckService, Depends(get_check_service)],
+    params: Annotated[SalesAnalyticsParams, Query()],
+):
+    return await service.get_sales_analytics(user, params)
+
+
+@router.get(
+    "/{id}",
+    response_class=HTMLResponse,
+    responses={
+        200: {"content": {"text/plain": {}, "application/vnd.escpos": {}, "application/json": {}}},
+        403: {"model": None},
+        404: {"model": None},
+    },
+    dependencies=[Depends(query_budget(5))],
+)
+async def check_detail(
+    request: Request,
+    id: int,
+    service: Annotated[CheckService, Depends(get_check_service)],
+    token: Annotated[HTTPAuthorizationCredentials | None, Depends(optional_auth_scheme)],
+    user_service: Annotated[UserService, Depends(get_user_service)],
+    format: Annotated[ReceiptFormat | None, Query(description="Overrides the format negotiated by Accept")] = None,
+):
+    receipt_format = negotiate_receipt_format(format, request.headers.get("accept"))
+    if receipt_format == ReceiptFormat.html:
+        return templates.TemplateResponse(
+            request,
+            name="check.html",
+            context={
+                "data": await service.get_check_markup(id),
+            },
+        )
 
+    if receipt_format == ReceiptFormat.json:
+        # the receipt is public by id, the full record of the check only for its owner
+        if token is None:
+            raise HTTPException(status_code=403, detail="Not authenticated")
+        user = await get_authenticated_user(token, user_service)
+        document = await service.get_check_json(id, user)
+        if document is None:
+            raise DoesNotExistException("Check with provided id not found")
+        return Response(document, media_type=RECEIPT_MEDIA_TYPES[receipt_format])
 
-@router.get("/{id}", response_class=HTMLResponse)
-async def check_detail(request: Request, id: int, service: Annotated[CheckService, Depends(get_check_service)]):
-    return templates.TemplateResponse(
-        request,
-        name="check.html",
-        context={
-            "data": MarkupService(await service.get_check(id)).build_markup(),
-        },
+    lines = await service.get_receipt_lines(id)
+    if lines is None:
+        raise DoesNotExistException("Check with provided id not found")
+    return StreamingResponse(
+        RECEIPT_ENCODERS[receipt_format](lines),
+        media_type=RECEIPT_MEDIA_TYPES[receipt_format],
     )
 
 
@@ -57,6 +194,7 @@ async def check_detail(request: Request, id: int, service: Annotated[CheckServic
     responses={
         201: {"model": CheckDTOResponseSchema},
     },
+    dependencies=[Depends(query_budget(8, commits=True))],
 )
 async def create_check(
     user: Annotated[User, Depends(get_authenticated_user)],
@@ -65,3 +203,31 @@ async def create_check(
 ):
     check = await service.create_check(user, request_data)
     return CheckDTOResponseSchema.model_validate(check)
+
+
+@router.post(
+    "/batch",
+    responses={
+        200: {"model": CheckBatchResponseSchema},
+    },
+)
+async def create_checks_batch(
+    user: Annotated[User, Depends(get_authenticated_user)],
+    request_data: CheckBatchDTOCreateSchema,
+    service: Annotated[CheckService, Depends(get_check_service)],
+):
+    results = []
+    for index, check in enumerate(await service.create_checks(user, request_data.checks)):
+        if isinstance(check, Exception):
+            # database errors name tables, columns and constraints, clients get a stable message instead
+            logger.error("Check %d of a batch of user %d was not created", index, user.id, exc_info=check)
+            error = next(
+                (message for error_type, message in BATCH_ITEM_ERRORS if isinstance(check, error_type)),
+                "Check could not be created",
+            )
+            result = CheckBatchItemResultSchema(index=index, created=False, error=error)
+        else:
+            result = CheckBatchItemResultSchema(index=index, created=True, check=check)
+        results.append(result)
+    created = sum(result.created for result in results)
+    return CheckBatchResponseSchema(created=created, failed=len(results) - created, results=results)
@@ -1,46 +1,73 @@
+from datetime import date
 from datetime import datetime
-from decimal import Decimal
+from datetime import time
+from datetime import timedelta
+from typing import Annotated
+from typing import Iterator
 from typing import Literal
 
 from pydantic import AnyHttpUrl
 from pydantic import BaseModel
 from pydantic import ConfigDict
 from pydantic import Field
+from pydantic import field_validator
 from pydantic import model_validator
 
+from src.checks.export import ExportFormat
 from src.checks.models import PaymentTypeEnum
+from src.checks.money import MONEY_LIMIT
+from src.checks.money import MONEY_PLACES
+from src.checks.money import Money
+from src.checks.money import MoneyInput
+from src.checks.money import Quantity
+from src.checks.money import QuantityInput
+from src.checks.money import format_minor
+from src.checks.money import product_total
+from src.checks.receipts import ReceiptFormat
 from src.conf.settings import settings
 
 
 class CheckProductDTOCreateSchema(BaseModel):
     name: str
-    price: Decimal
-    quantity: Decimal
+    price: MoneyInput
+    quantity: QuantityInput
 
 
 class CheckPaymentDTOCreateSchema(BaseModel):
     type: PaymentTypeEnum
-    amount: Decimal
+    amount: MoneyInput
 
 
 class CheckDTOCreateSchema(BaseModel):
-    products: list[CheckProductDTOCreateSchema]
+    products: list[CheckProductDTOCreateSchema] = Field(max_length=settings.CHECK_MAX_PRODUCTS)
     payment: CheckPaymentDTOCreateSchema
     comment: str | None = None
 
+    @model_validator(mode="after")
+    def check_total(self) -> "CheckDTOCreateSchema":
+        # the total and the rest are bounded like request amounts, so they and their rollups fit BIGINT columns
+        total = sum(product_total(product.price, product.quantity) for product in self.products)
+        if abs(total) > MONEY_LIMIT:
+            raise ValueError(f"The check total must not exceed {format_minor(MONEY_LIMIT, MONEY_PLACES)} by modulus")
+        return self
+
+
+class CheckBatchDTOCreateSchema(BaseModel):
+    checks: list[CheckDTOCreateSchema] = Field(min_length=1, max_length=settings.CHECKS_BATCH_MAX_SIZE)
+
 
 class CheckProductDTOReadSchema(BaseModel):
     name: str
-    price: Decimal
-    quantity: Decimal
-    total: Decimal
+    price: Money
+    quantity: Quantity
+    total: Money
 
     model_config = ConfigDict(from_attributes=True)
 
 
 class CheckPaymentDTOReadSchema(BaseModel):
     type: PaymentTypeEnum
-    amount: Decimal
+    amount: Money
 
     model_config = ConfigDict(from_attributes=True)
 
@@ -50,8 +77,8 @@ class CheckDTOResponseSchema(BaseModel):
     products: list[CheckProductDTOReadSchema]
     payment: CheckPaymentDTOReadSchema
     comment: str | None = None
-    total: Decimal
-    rest: Decimal
+    total: Money
+    rest: Money
     created_at: datetime
     updated_at: datetime
     url: AnyHttpUrl | str | None = Field(None, description="URL to check details")
@@ -64,17 +91,182 @@ class CheckDTOResponseSchema(BaseModel):
         return self
 
 
-class FilterParams(BaseModel):
-    limit: int = Field(100, gt=0, le=100)
-    offset: int = Field(0, ge=0)
-    order_by: Literal["created_at", "-created_at"] = "created_at"
+class CheckSummaryDTOResponseSchema(BaseModel):
+    id: int
+    payment_type: PaymentTypeEnum
+    paid_amount: Money
+    products_count: int
+    comment: str | None = None
+    total: Money
+    rest: Money
+    created_at: datetime
+    updated_at: datetime
+    url: AnyHttpUrl | str | None = Field(None, description="URL to check details")
+
+    model_config = ConfigDict(from_attributes=True)
+
+    @model_validator(mode="after")
+    def set_url(self):
+        self.url = f"http://localhost:{settings.PORT}/api/v1/checks/{self.id}"
+        return self
+
+
+# an upper bound of the creation time from this time of the day on covers the day to its end
+END_OF_DAY = time(23, 59, 59)
+
+
+class CheckFiltersSchema(BaseModel):
     created_at_gte: datetime | None = None
-    created_at_lte: datetime | None = None
-    total_gte: Decimal | None = None
-    total_lte: Decimal | None = None
+    created_at_lte: datetime | None = Field(
+        None, description=f"A time of the day from {END_OF_DAY} on includes the checks up to the end of the day"
+    )
+    total_gte: MoneyInput | None = None
+    total_lte: MoneyInput | None = None
     payment_type: PaymentTypeEnum | None = None
+    product_name: str | None = Field(None, min_length=1, description="Checks with a product matching the name")
+    product_name_match: Literal["substring", "fuzzy"] = Field(
+        "substring",
+        description="`substring` matches names containing `product_name` in any case, "
+        "`fuzzy` matches names with a word similar to it, e.g. misspelled",
+    )
+
+    @field_validator("created_at_lte")
+    @classmethod
+    def extend_to_end_of_day(cls, value: datetime | None) -> datetime | None:
+        """Extend a whole second bound at the end of the day to the end, so it is answered from the daily counters"""
+        if value is not None and value.tzinfo is None and value.time() >= END_OF_DAY:
+            return datetime.combine(value.date(), time.max)
+        return value
+
+
+class FilterParams(CheckFiltersSchema):
+    limit: int = Field(100, gt=0, le=100)
+    offset: int = Field(0, ge=0)
+    order_by: Literal["created_at", "-created_at", "total", "-total"] = "created_at"
+    pagination: Literal["offset", "cursor"] = Field(
+        "offset",
+        description="`cursor` pages by the `next`/`prev` cursors of the previous page instead of `offset`",
+    )
+    cursor: str | None = None
+    view: Literal["full", "summary"] = Field(
+        "full",
+        description="`summary` lists checks with payment and products summary instead of the full payment and products",
+    )
+    total_mode: Literal["exact", "estimated"] = Field(
+        "exact",
+        description="`estimated` returns a planner estimate when `total` cannot be taken from the daily counters",
+    )
+    mode: Literal["orm", "lean", "postgres"] = Field(
+        "orm",
+        description=(
+            "`lean` reads plain rows and serializes them without ORM objects and per-row validation, "
+            "`postgres` has the database build the JSON of every check"
+        ),
+    )
+
+
+class ExportParams(CheckFiltersSchema):
+    format: ExportFormat = ExportFormat.csv
+    products: Literal["flat", "nested"] = Field(
+        "flat",
+        description="`flat` repeats the check columns for every product, `nested` puts the products of a check in one "
+        "column, a JSON array in CSV and a list of structs in Parquet",
+    )
 
 
 class ChecksWithPaginationResponseSchema(BaseModel):
     total: int
-    results: list[CheckDTOResponseSchema]
+    estimated: bool = Field(False, description="Whether `total` is a planner estimate")
+    next: str | None = Field(None, description="Cursor of the next page in `cursor` pagination")
+    prev: str | None = Field(None, description="Cursor of the previous page in `cursor` pagination")
+    results: list[Annotated[CheckDTOResponseSchema | CheckSummaryDTOResponseSchema, Field(union_mode="left_to_right")]]
+
+
+class CheckBatchItemResultSchema(BaseModel):
+    index: int = Field(description="Position of the check in the request")
+    created: bool
+    check: CheckDTOResponseSchema | None = None
+    error: str | None = None
+
+
+class CheckBatchResponseSchema(BaseModel):
+    created: int
+    failed: int
+    results: list[CheckBatchItemResultSchema]
+
+
+class CheckPrintRequestSchema(BaseModel):
+    ids: list[int] | None = Field(
+        None,
+        max_length=settings.CHECKS_PRINT_MAX_IDS,
+        description="Checks to print, in this order. Checks matching `filters` are printed if not provided",
+    )
+    filters: CheckFiltersSchema = CheckFiltersSchema()
+    format: Literal[ReceiptFormat.text, ReceiptFormat.escpos] = ReceiptFormat.text
+
+
+class SalesAnalyticsParams(BaseModel):
+    period: Literal["day", "month"] = "day"
+    date_from: date | None = Field(None, description="30 days or 12 months before `date_to` by default")
+    date_to: date | None = Field(None, description="Today by default")
+
+    @model_validator(mode="after")
+    def set_range(self):
+        """Default the range and align it to the period"""
+        date_to = self.date_to or datetime.now(tz=None).date()
+        if self.period == "day":
+            date_from = self.date_from or date_to - timedelta(days=29)
+            buckets = (date_to - date_from).days + 1
+        else:
+            date_to = date_to.replace(day=1)
+            date_from = self.date_from or date(date_to.year - 1, date_to.month, 1) + timedelta(days=31)
+            date_from = date_from.replace(day=1)
+            buckets = (date_to.year - date_from.year) * 12 + date_to.month - date_from.month + 1
+        if date_from > date_to:
+            raise ValueError("date_from must not be after date_to")
+        if buckets > settings.CHECKS_ANALYTICS_MAX_BUCKETS:
+            raise ValueError(f"The range must not exceed {settings.CHECKS_ANALYTICS_MAX_BUCKETS} {self.period}s")
+        self.date_from, self.date_to = date_from, date_to
+        return self
+
+    def iter_buckets(self) -> Iterator[date]:
+        """First days of the days or months in the range"""
+        bucket = self.date_from
+        while bucket <= self.date_to:
+            yield bucket
+            if self.period == "day":
+                bucket += timedelta(days=1)
+            else:
+                bucket = (bucket + timedelta(days=31)).replace(day=1)
+
+
+class SalesPaymentSchema(BaseModel):
+    checks_count: int = 0
+    total_amount: Money = 0
+
+
+class SalesBucketSchema(BaseModel):
+    start: date = Field(description="First day of the bucket")
+    checks_count: int = 0
+    total_amount: Money = 0
+    average_check: Money = 0
+    cash: SalesPaymentSchema = Field(default_factory=SalesPaymentSchema)
+    card: SalesPaymentSchema = Field(default_factory=SalesPaymentSchema)
+
+    def add(self, payment_type: PaymentTypeEnum, checks_count: int, total_amount: int) -> None:
+        """Add a rollup row to the bucket"""
+        payment = getattr(self, payment_type.value)
+        payment.checks_count += checks_count
+        payment.total_amount += total_amount
+        self.checks_count += checks_count
+        self.total_amount += total_amount
+        # kopecks rounded half up
+        self.average_check = (2 * self.total_amount + self.checks_count) // (2 * self.checks_count)
+
+
+class SalesAnalyticsResponseSchema(BaseModel):
+    period: Literal["day", "month"]
+    date_from: date
+    date_to: date
+    total: SalesBucketSchema = Field(description="The whole range")
+    buckets: list[SalesBucketSchema]
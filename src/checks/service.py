@@ -1,55 +1,396 @@
+import re
+
+from collections import defaultdict
+from datetime import date
 from datetime import datetime
-from decimal import Decimal
+from datetime import time
+from typing import AsyncIterator
+from typing import Iterable
+from typing import Iterator
+from typing import Sequence
 
 from markupsafe import Markup
+from sqlalchemy import ColumnElement
+from sqlalchemy import Date
+from sqlalchemy import Select
+from sqlalchemy import and_
+from sqlalchemy import cast
+from sqlalchemy import delete
+from sqlalchemy import exists
+from sqlalchemy import func
+from sqlalchemy import insert
+from sqlalchemy import literal
+from sqlalchemy import select
+from sqlalchemy import text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import InstrumentedAttribute
 from sqlalchemy.orm import selectinload
+from sqlalchemy.orm.attributes import set_committed_value
 
+from src.base.group_commit import GroupCommitQueue
 from src.base.models import BaseModel
 from src.base.service import BaseService
+from src.checks.cache import add_pending_product_names
+from src.checks.cache import cache_receipt_lines
+from src.checks.cache import get_pending_product_names
+from src.checks.cache import product_name_cache
+from src.checks.cache import receipt_cache
+from src.checks.cache import receipt_key
+from src.checks.export import EXPORTERS
+from src.checks.export import export_columns
+from src.checks.layout import ReceiptLayout
 from src.checks.models import Check
+from src.checks.models import CheckDailyStat
+from src.checks.models import CheckMonthlyStat
 from src.checks.models import CheckPayment
 from src.checks.models import CheckProduct
+from src.checks.models import PaymentTypeEnum
+from src.checks.models import ProductName
+from src.checks.money import product_total
+from src.checks.receipts import RECEIPT_ENCODERS
+from src.checks.receipts import ReceiptFormat
+from src.checks.records import CHECK_RECORD_COLUMNS
+from src.checks.records import PRODUCT_RECORD_COLUMNS
+from src.checks.records import CheckRecord
+from src.checks.records import check_json
+from src.checks.records import dump_json
+from src.checks.records import dump_page_json
 from src.checks.schemas import CheckDTOCreateSchema
+from src.checks.schemas import CheckFiltersSchema
+from src.checks.schemas import CheckPrintRequestSchema
+from src.checks.schemas import CheckSummaryDTOResponseSchema
 from src.checks.schemas import ChecksWithPaginationResponseSchema
+from src.checks.schemas import ExportParams
 from src.checks.schemas import FilterParams
+from src.checks.schemas import SalesAnalyticsParams
+from src.checks.schemas import SalesAnalyticsResponseSchema
+from src.checks.schemas import SalesBucketSchema
+from src.conf.db import async_session
+from src.conf.db import replica_router
+from src.conf.metrics import metrics
+from src.conf.settings import settings
 from src.users.models import User
 
 
+LIKE_SPECIAL = re.compile(r"[\\%_]")
+
+
 class CheckService(BaseService):
     MODEL = Check
 
-    async def create_check(self, user: User, request_data: CheckDTOCreateSchema) -> Check:
+    async def insert_checks(self, items: Sequence[tuple[int, CheckDTOCreateSchema]]) -> list[Check]:
+        """
+        Insert checks of `(user id, check)` items together with their payments and products without committing.
+
+        Every table gets one multi-row INSERT ... RETURNING, so the number of statements does not grow
+        with the number of checks or products, or with the number of users they belong to.
+        """
         now = datetime.now(tz=None)
 
-        products = [
-            CheckProduct(
-                name=product.name,
-                price=product.price,
-                quantity=product.quantity,
-                total=Decimal(product.price * product.quantity),
-                updated_at=now,
+        check_values = []
+        product_totals = []
+        for user_id, request_data in items:
+            totals = [product_total(product.price, product.quantity) for product in request_data.products]
+            product_totals.append(totals)
+            total_price = sum(totals)
+            check_values.append(
+                {
+                    "user_id": user_id,
+                    "comment": request_data.comment,
+                    "total": total_price,
+                    "rest": request_data.payment.amount - total_price,
+                    "payment_type": request_data.payment.type,
+                    "paid_amount": request_data.payment.amount,
+                    "products_count": len(request_data.products),
+                    "updated_at": now,
+                }
+            )
+        checks = (
+            await self.session.scalars(
+                insert(self.MODEL).returning(self.MODEL, sort_by_parameter_order=True),
+                check_values,
             )
-            for product in request_data.products
+        ).all()
+
+        payments = (
+            await self.session.scalars(
+                insert(CheckPayment).returning(CheckPayment, sort_by_parameter_order=True),
+                [
+                    {
+                        "check_id": check.id,
+                        "check_created_at": check.created_at,
+                        "type": request_data.payment.type,
+                        "amount": request_data.payment.amount,
+                        "updated_at": now,
+                    }
+                    for check, (_, request_data) in zip(checks, items)
+                ],
+            )
+        ).all()
+
+        await self._increment_stats(checks)
+
+        name_ids = await self.get_product_name_ids(
+            product.name for _, request_data in items for product in request_data.products
+        )
+        product_values = [
+            {
+                "check_id": check.id,
+                "check_created_at": check.created_at,
+                "name_id": name_ids[product.name],
+                "price": product.price,
+                "quantity": product.quantity,
+                "total": total,
+                "updated_at": now,
+            }
+            for check, (_, request_data), totals in zip(checks, items, product_totals)
+            for product, total in zip(request_data.products, totals)
         ]
-        payment = CheckPayment(
-            type=request_data.payment.type,
-            amount=request_data.payment.amount,
-            updated_at=now,
+        products = []
+        if product_values:
+            products = (
+                await self.session.scalars(
+                    insert(CheckProduct).returning(CheckProduct, sort_by_parameter_order=True),
+                    product_values,
+                )
+            ).all()
+
+        products_by_check = {check.id: [] for check in checks}
+        names = {id: ProductName(id=id, name=name) for name, id in name_ids.items()}
+        for product in products:
+            set_committed_value(product, "product_name", names[product.name_id])
+            products_by_check[product.check_id].append(product)
+        for check, payment in zip(checks, payments):
+            set_committed_value(check, "payment", payment)
+            set_committed_value(check, "products", products_by_check[check.id])
+        return list(checks)
+
+    async def get_product_name_ids(self, names: Iterable[str]) -> dict[str, int]:
+        """
+        Ids of the product names by name, interning new names in the current transaction.
+
+        Names are looked up in the product names cache first, the rest take a SELECT, and an INSERT of the names
+        that are not in the dictionary yet.
+        """
+        session = self.session.sync_session
+        pending = get_pending_product_names(session)
+        ids = {}
+        missing = []
+        for name in set(names):
+            id = pending.get(name) or product_name_cache.get(name)
+            if id is None:
+                missing.append(name)
+            else:
+                ids[name] = id
+        if not missing:
+            return ids
+
+        # ids read here may be of names an earlier savepoint inserted, they are cached once the transaction commits
+        query = select(ProductName.name, ProductName.id).where(ProductName.name.in_(missing))
+        found = dict((await self.session.execute(query)).all())
+        new_names = sorted(name for name in missing if name not in found)
+        if new_names:
+            now = datetime.now(tz=None)
+            # sorted names keep concurrent inserts of the same names from deadlocking
+            statement = (
+                pg_insert(ProductName)
+                .values([{"name": name, "updated_at": now} for name in new_names])
+                .on_conflict_do_nothing(index_elements=[ProductName.name])
+                .returning(ProductName.name, ProductName.id)
+            )
+            inserted = dict((await self.session.execute(statement)).all())
+            found |= inserted
+            if len(inserted) < len(new_names):
+                # names inserted by concurrent transactions in the meantime
+                query = select(ProductName.name, ProductName.id).where(
+                    ProductName.name.in_([name for name in new_names if name not in inserted])
+                )
+                found |= dict((await self.session.execute(query)).all())
+        add_pending_product_names(session, found)
+        return ids | found
+
+    async def _increment_stats(self, checks: Sequence[Check]) -> None:
+        """Add created checks to the per-user daily and monthly rollups in the current transaction"""
+        daily = defaultdict(lambda: [0, 0])
+        for check in checks:
+            stat = daily[check.user_id, check.created_at.date(), check.payment_type]
+            stat[0] += 1
+            stat[1] += check.total
+        monthly = defaultdict(lambda: [0, 0])
+        for (user_id, day, payment_type), (checks_count, total_amount) in daily.items():
+            stat = monthly[user_id, day.replace(day=1), payment_type]
+            stat[0] += checks_count
+            stat[1] += total_amount
+        await self._upsert_stats(CheckDailyStat, CheckDailyStat.day, daily)
+        await self._upsert_stats(CheckMonthlyStat, CheckMonthlyStat.month, monthly)
+
+    async def _upsert_stats(
+        self,
+        model: type[CheckDailyStat | CheckMonthlyStat],
+        bucket: InstrumentedAttribute,
+        stats: dict[tuple[int, date, PaymentTypeEnum], list],
+    ) -> None:
+        """Add checks counts and amounts to the rollup rows of (user, bucket, payment type)"""
+        if not stats:
+            return
+        now = datetime.now(tz=None)
+        # a stable row order keeps concurrent upserts of the same rows from deadlocking
+        rows = sorted(stats.items(), key=lambda item: (item[0][0], item[0][1], item[0][2].value))
+        statement = pg_insert(model).values(
+            [
+                {
+                    "user_id": user_id,
+                    bucket.key: day,
+                    "payment_type": payment_type,
+                    "checks_count": checks_count,
+                    "total_amount": total_amount,
+                    "updated_at": now,
+                }
+                for (user_id, day, payment_type), (checks_count, total_amount) in rows
+            ]
+        )
+        statement = statement.on_conflict_do_update(
+            index_elements=[model.user_id, bucket, model.payment_type],
+            set_={
+                "checks_count": model.checks_count + statement.excluded.checks_count,
+                "total_amount": model.total_amount + statement.excluded.total_amount,
+                "updated_at": statement.excluded.updated_at,
+            },
+        )
+        await self.session.execute(statement)
+
+    async def rebuild_stats(self, user_ids: Sequence[int] | None = None) -> int:
+        """
+        Recompute the daily and monthly rollups of the users, all users if None, from their checks and commit.
+
+        The rollup tables are locked against writes until the commit, so checks created meanwhile are added
+        to the rebuilt rows once it is done. Returns the number of daily rows.
+        """
+        now = datetime.now(tz=None)
+        await self.session.execute(text("LOCK TABLE check_daily_stats, check_monthly_stats IN EXCLUSIVE MODE"))
+        day = cast(self.MODEL.created_at, Date)
+        daily = select(
+            self.MODEL.user_id,
+            day,
+            self.MODEL.payment_type,
+            func.count(),
+            func.sum(self.MODEL.total),
+            literal(now),
+        ).group_by(self.MODEL.user_id, day, self.MODEL.payment_type)
+        month = cast(func.date_trunc("month", CheckDailyStat.day), Date)
+        monthly = select(
+            CheckDailyStat.user_id,
+            month,
+            CheckDailyStat.payment_type,
+            func.sum(CheckDailyStat.checks_count),
+            func.sum(CheckDailyStat.total_amount),
+            literal(now),
+        ).group_by(CheckDailyStat.user_id, month, CheckDailyStat.payment_type)
+        if user_ids is not None:
+            daily = daily.where(self.MODEL.user_id.in_(user_ids))
+            monthly = monthly.where(CheckDailyStat.user_id.in_(user_ids))
+
+        rows = await self._replace_stats(CheckDailyStat, CheckDailyStat.day, daily, user_ids)
+        await self._replace_stats(CheckMonthlyStat, CheckMonthlyStat.month, monthly, user_ids)
+        await self._commit()
+        return rows
+
+    async def _replace_stats(
+        self,
+        model: type[CheckDailyStat | CheckMonthlyStat],
+        bucket: InstrumentedAttribute,
+        query: Select,
+        user_ids: Sequence[int] | None,
+    ) -> int:
+        """Replace the rollup rows of the users with the rows selected by `query`"""
+        statement = delete(model)
+        if user_ids is not None:
+            statement = statement.where(model.user_id.in_(user_ids))
+        await self.session.execute(statement)
+        columns = (model.user_id, bucket, model.payment_type, model.checks_count, model.total_amount, model.updated_at)
+        result = await self.session.execute(insert(model).from_select([column.key for column in columns], query))
+        return result.rowcount
+
+    async def get_sales_analytics(self, user: User, params: SalesAnalyticsParams) -> SalesAnalyticsResponseSchema:
+        """
+        Revenue, checks count, average check and payment type split of the user per day or month.
+
+        Answered from the rollups: the cost depends on the number of buckets in the range, not on the number of checks.
+        """
+        if params.period == "day":
+            model, bucket = CheckDailyStat, CheckDailyStat.day
+        else:
+            model, bucket = CheckMonthlyStat, CheckMonthlyStat.month
+        query = select(bucket, model.payment_type, model.checks_count, model.total_amount).where(
+            model.user_id == user.id,
+            bucket >= params.date_from,
+            bucket <= params.date_to,
         )
-        total_price = Decimal(sum([product.total for product in products]))
-        check = self.MODEL(
-            user=user,
-            products=products,
-            payment=payment,
-            comment=request_data.comment,
-            total=total_price,
-            rest=Decimal(payment.amount - total_price),
+        rows = (await self._db_call(self.session.execute, query)).all()
+
+        buckets = {start: SalesBucketSchema(start=start) for start in params.iter_buckets()}
+        total = SalesBucketSchema(start=params.date_from)
+        for start, payment_type, checks_count, total_amount in rows:
+            for stat in (buckets[start], total):
+                stat.add(payment_type, checks_count, total_amount)
+        return SalesAnalyticsResponseSchema(
+            period=params.period,
+            date_from=params.date_from,
+            date_to=params.date_to,
+            total=total,
+            buckets=list(buckets.values()),
         )
 
-        check: Check = await self.insert_obj(check)
+    async def create_check(self, user: User, request_data: CheckDTOCreateSchema) -> Check:
+        """Create a check, committed together with checks of concurrent requests in the group commit mode"""
+        if check_commit_queue.running:
+            check = await check_commit_queue.submit((user.id, request_data))
+        else:
+            (check,) = await self.insert_checks([(user.id, request_data)])
+            await self._commit()
+        replica_router.stick(user.id)
         return check
 
-    async def get_user_checks(self, user: User, filter_params: FilterParams) -> ChecksWithPaginationResponseSchema:
+    async def create_checks(self, user: User, items: Sequence[CheckDTOCreateSchema]) -> list[Check | Exception]:
+        """
+        Create many checks in a single transaction.
+
+        The whole batch is inserted at once; if that fails, it is retried item by item inside savepoints,
+        so one broken check does not reject the rest. Returns a created check or an error for every item.
+        """
+        checks = await self._insert_each([(user.id, request_data) for request_data in items])
+        await self._commit()
+        replica_router.stick(user.id)
+        return checks
+
+    @classmethod
+    async def commit_checks(cls, items: list[tuple[int, CheckDTOCreateSchema]]) -> list[Check | Exception]:
+        """Create checks of many users in one transaction of a session of its own, the group commit"""
+        async with async_session(info={"primary": True}) as session:
+            service = cls(session)
+            checks = await service._insert_each(items)
+            await service._commit()
+            return checks
+
+    async def _insert_each(self, items: Sequence[tuple[int, CheckDTOCreateSchema]]) -> list[Check | Exception]:
+        """Insert all checks at once, or one by one inside savepoints if that fails"""
+        try:
+            async with self.session.begin_nested():
+                return await self.insert_checks(items)
+        except SQLAlchemyError:
+            checks = []
+            for item in items:
+                try:
+                    async with self.session.begin_nested():
+                        (check,) = await self.insert_checks([item])
+                except SQLAlchemyError as e:
+                    check = e
+                checks.append(check)
+            return checks
+
+    def build_filters(self, user: User, filter_params: CheckFiltersSchema) -> tuple:
+        """Build query filters of the user checks"""
         filters = (self.MODEL.user_id == user.id,)
 
         if filter_params.created_at_gte:
@@ -61,19 +402,317 @@ class CheckService(BaseService):
         if filter_params.total_lte:
             filters += (self.MODEL.total <= filter_params.total_lte,)
         if filter_params.payment_type:
-            filters += (self.MODEL.payment.has(CheckPayment.type == filter_params.payment_type),)
+            filters += (self.MODEL.payment_type == filter_params.payment_type,)
+        if filter_params.product_name:
+            filters += (self._get_product_name_filter(filter_params.product_name, filter_params.product_name_match),)
+        return filters
+
+    def _get_product_name_filter(self, product_name: str, match: str) -> ColumnElement:
+        """
+        Semi-join of checks having a product with a matching name.
+
+        Names are searched in the product_names dictionary by its trigram index, products are only probed by the ids
+        of the matching names, so no product is loaded.
+        """
+        if match == "fuzzy":
+            # word_similarity(product_name, name) above pg_trgm.word_similarity_threshold
+            names = ProductName.name.op("%>")(product_name)
+        else:
+            pattern = LIKE_SPECIAL.sub(r"\\\g<0>", product_name)
+            names = ProductName.name.ilike(f"%{pattern}%", escape="\\")
+        return exists().where(
+            CheckProduct.check_id == self.MODEL.id,
+            CheckProduct.check_created_at == self.MODEL.created_at,
+            CheckProduct.name_id.in_(select(ProductName.id).where(names)),
+        )
 
-        options = (selectinload(self.MODEL.products), selectinload(self.MODEL.payment))
+    async def get_user_checks(
+        self, user: User, filter_params: FilterParams
+    ) -> ChecksWithPaginationResponseSchema | bytes:
+        """List user checks, as JSON bytes in the `lean` mode"""
+        filters = self.build_filters(user, filter_params)
+        total, estimated = await self.count_user_checks(user, filter_params, filters)
+        if filter_params.mode == "lean":
+            return await self._get_user_checks_lean(filter_params, filters, total, estimated)
+        if filter_params.mode == "postgres":
+            return await self._get_user_checks_postgres(filter_params, filters, total, estimated)
+
+        options = ()
+        if filter_params.view == "full":
+            options = (selectinload(self.MODEL.products), selectinload(self.MODEL.payment))
+
+        next_cursor = prev_cursor = None
+        if filter_params.pagination == "cursor":
+            items, next_cursor, prev_cursor = await self.fetch_keyset(
+                filters,
+                options,
+                filter_params.limit,
+                filter_params.order_by,
+                filter_params.cursor,
+            )
+        else:
+            items = await self.fetch(
+                filters,
+                options,
+                filter_params.limit,
+                filter_params.offset,
+                filter_params.order_by,
+            )
+        if filter_params.view == "summary":
+            items = [CheckSummaryDTOResponseSchema.model_validate(item) for item in items]
+        return ChecksWithPaginationResponseSchema(
+            total=total,
+            estimated=estimated,
+            next=next_cursor,
+            prev=prev_cursor,
+            results=items,
+        )
+
+    async def _get_user_checks_lean(
+        self, filter_params: FilterParams, filters: Sequence, total: int, estimated: bool
+    ) -> bytes:
+        """
+        Read-only checks list serialized straight to JSON.
+
+        Selects only the listed columns into `CheckRecord`s, so neither the identity map nor per-row validation
+        is involved. The payment comes from the check summary columns, products take one more query.
+        """
+        next_cursor = prev_cursor = None
+        if filter_params.pagination == "cursor":
+            rows, next_cursor, prev_cursor = await self.fetch_keyset(
+                filters,
+                limit=filter_params.limit,
+                order_by=filter_params.order_by,
+                cursor=filter_params.cursor,
+                columns=CHECK_RECORD_COLUMNS,
+            )
+        else:
+            rows = await self.fetch(
+                filters,
+                limit=filter_params.limit,
+                offset=filter_params.offset,
+                order_by=filter_params.order_by,
+                columns=CHECK_RECORD_COLUMNS,
+            )
+        records = [CheckRecord(*row) for row in rows]
 
-        total = await self.count(filters)
-        items = await self.fetch(
-            filters,
-            options,
-            filter_params.limit,
-            filter_params.offset,
-            filter_params.order_by,
+        if filter_params.view == "summary":
+            results = [record.summary() for record in records]
+        else:
+            if records:
+                records_by_id = {record.id: record for record in records}
+                created_at = [record.created_at for record in records]
+                query = (
+                    select(*PRODUCT_RECORD_COLUMNS)
+                    .join(ProductName, ProductName.id == CheckProduct.name_id)
+                    .where(
+                        CheckProduct.check_id.in_(records_by_id),
+                        # prunes partitions of months outside of the page
+                        CheckProduct.check_created_at.between(min(created_at), max(created_at)),
+                    )
+                    .order_by(CheckProduct.check_id, CheckProduct.id)
+                )
+                for row in await self._db_call(self.session.execute, query):
+                    records_by_id[row[0]].products.append(tuple(row[1:]))
+            results = [record.full() for record in records]
+
+        return dump_json(
+            {"total": total, "estimated": estimated, "next": next_cursor, "prev": prev_cursor, "results": results}
+        )
+
+    async def _get_user_checks_postgres(
+        self, filter_params: FilterParams, filters: Sequence, total: int, estimated: bool
+    ) -> bytes:
+        """
+        Checks list with the JSON of every check built by Postgres.
+
+        One query returns a ready JSON document per check, products aggregated with `json_agg`, the documents are
+        joined into the page without being parsed.
+        """
+        columns = (self.MODEL.id, self.MODEL.created_at, self.MODEL.total, check_json(filter_params.view))
+        next_cursor = prev_cursor = None
+        if filter_params.pagination == "cursor":
+            rows, next_cursor, prev_cursor = await self.fetch_keyset(
+                filters,
+                limit=filter_params.limit,
+                order_by=filter_params.order_by,
+                cursor=filter_params.cursor,
+                columns=columns,
+            )
+        else:
+            rows = await self.fetch(
+                filters,
+                limit=filter_params.limit,
+                offset=filter_params.offset,
+                order_by=filter_params.order_by,
+                columns=columns,
+            )
+        return dump_page_json(total, estimated, next_cursor, prev_cursor, [row[-1] for row in rows])
+
+    async def count_user_checks(self, user: User, filter_params: FilterParams, filters: Sequence) -> tuple[int, bool]:
+        """
+        Count user checks for the list, returns the count and whether it is estimated.
+
+        Filters aligned to whole days are answered from the daily counters. Any other filter needs an exact count,
+        or a planner estimate if the client asked for `estimated` totals.
+        """
+        stats_filters = self._get_daily_stats_filters(user, filter_params)
+        if stats_filters is not None:
+            query = select(func.coalesce(func.sum(CheckDailyStat.checks_count), 0)).where(*stats_filters)
+            return await self._db_call(self.session.scalar, query), False
+        if filter_params.total_mode == "estimated":
+            return await self.count_estimate(filters), True
+        return await self.count(filters), False
+
+    @staticmethod
+    def _get_daily_stats_filters(user: User, filter_params: FilterParams) -> tuple | None:
+        """Translate filters to daily counters filters, None if they can not be answered from the counters"""
+        if filter_params.total_gte or filter_params.total_lte or filter_params.product_name:
+            return None
+
+        filters = (CheckDailyStat.user_id == user.id,)
+        if created_at_gte := filter_params.created_at_gte:
+            if created_at_gte.tzinfo or created_at_gte.time() != time.min:
+                return None
+            filters += (CheckDailyStat.day >= created_at_gte.date(),)
+        if created_at_lte := filter_params.created_at_lte:
+            if created_at_lte.tzinfo or created_at_lte.time() != time.max:
+                return None
+            filters += (CheckDailyStat.day <= created_at_lte.date(),)
+        if filter_params.payment_type:
+            filters += (CheckDailyStat.payment_type == filter_params.payment_type,)
+        return filters
+
+    async def iter_user_checks(
+        self,
+        user: User,
+        ids: Sequence[int] | None,
+        filter_params: CheckFiltersSchema,
+        batch_size: int,
+    ) -> AsyncIterator[Check]:
+        """
+        Iterate user checks with products and payments, loading them in batches.
+
+        Yields checks in the order of `ids`, or all checks matching the filters by id. Every batch is expunged from
+        the session once consumed, so memory does not grow with the number of checks.
+        """
+        options = (selectinload(self.MODEL.products), selectinload(self.MODEL.payment))
+        filters = self.build_filters(user, filter_params)
+        if ids is not None:
+            for start in range(0, len(ids), batch_size):
+                batch_ids = ids[start : start + batch_size]
+                batch = await self.fetch(filters + (self.MODEL.id.in_(batch_ids),), options)
+                checks = {check.id: check for check in batch}
+                for id in batch_ids:
+                    if id in checks:
+                        yield checks[id]
+                self.session.expunge_all()
+            return
+
+        last_id = 0
+        while True:
+            checks = list(await self.fetch(filters + (self.MODEL.id > last_id,), options, batch_size, order_by="id"))
+            for check in checks:
+                yield check
+            self.session.expunge_all()
+            if len(checks) < batch_size:
+                return
+            last_id = checks[-1].id
+
+    @classmethod
+    async def iter_export(cls, user: User, params: ExportParams) -> AsyncIterator[bytes]:
+        """
+        Stream user checks matching the filters as CSV or Parquet.
+
+        Rows are read from a server-side cursor and encoded `CHECKS_EXPORT_CHUNK_SIZE` at a time, so memory does not
+        grow with the number of checks. Runs in a session of its own, like `iter_printed_receipts`.
+        """
+        exporter = EXPORTERS[params.format](params.products == "nested")
+        yield exporter.header()
+        async with async_session(info={"primary": replica_router.is_sticky(user.id)}) as session:
+            service = cls(session)
+            query = (
+                select(*export_columns(params.format))
+                .outerjoin(
+                    CheckProduct,
+                    and_(CheckProduct.check_id == cls.MODEL.id, CheckProduct.check_created_at == cls.MODEL.created_at),
+                )
+                .outerjoin(ProductName, ProductName.id == CheckProduct.name_id)
+                .where(*service.build_filters(user, params))
+                .order_by(cls.MODEL.created_at, cls.MODEL.id, CheckProduct.id)
+                .execution_options(yield_per=settings.CHECKS_EXPORT_CHUNK_SIZE)
+            )
+            result = await session.stream(query)
+            async for rows in result.partitions():
+                if data := exporter.write(rows):
+                    yield data
+        yield exporter.close()
+
+    @classmethod
+    async def iter_printed_receipts(cls, user: User, request_data: CheckPrintRequestSchema) -> AsyncIterator[bytes]:
+        """
+        Stream rendered receipts of many user checks as one response body.
+
+        Runs in a session of its own, the request session is closed by the time a streaming response is sent.
+        """
+        encode = RECEIPT_ENCODERS[request_data.format]
+        async with async_session(info={"primary": replica_router.is_sticky(user.id)}) as session:
+            service = cls(session)
+            checks = service.iter_user_checks(
+                user,
+                request_data.ids,
+                request_data.filters,
+                settings.CHECKS_PRINT_BATCH_SIZE,
+            )
+            first = True
+            async for check in checks:
+                set_committed_value(check, "user", user)
+                if not first and request_data.format == ReceiptFormat.text:
+                    yield b"\n"
+                first = False
+                for chunk in encode(MarkupService(check).iter_lines()):
+                    yield chunk
+
+    async def get_receipt_lines(self, id: int) -> Iterable[str] | None:
+        """
+        Get receipt lines of the check, None if it does not exist.
+
+        Lines come from the receipts cache if the user did not change since rendering. Otherwise they are laid out
+        lazily while being consumed, so streaming a large receipt starts before it is fully rendered.
+        """
+        query = (
+            select(User.id, User.check_symbols, User.first_name, User.last_name)
+            .join(self.MODEL, self.MODEL.user_id == User.id)
+            .where(self.MODEL.id == id)
         )
-        return ChecksWithPaginationResponseSchema(total=total, results=items)
+        user = (await self._db_call(self.session.execute, query)).one_or_none()
+        if user is None:
+            # a check created moments ago may not have reached the replica yet
+            if self.session.sync_session.fall_back_to_primary():
+                return await self.get_receipt_lines(id)
+            return None
+        lines = receipt_cache.get(receipt_key(id, user))
+        if lines is None:
+            check = await self.get_check(id)
+            lines = cache_receipt_lines(receipt_key(id, check.user), MarkupService(check).iter_lines())
+        return lines
+
+    async def get_check_markup(self, id: int) -> Markup:
+        """Get rendered receipt of the check"""
+        lines = await self.get_receipt_lines(id)
+        if lines is None:
+            return Markup()
+        return Markup("<br>".join(lines))
+
+    async def get_check_json(self, id: int, user: User) -> bytes | None:
+        """Get JSON of the user check built by Postgres, None if the user has no such check"""
+        query = select(check_json("full")).where(self.MODEL.id == id, self.MODEL.user_id == user.id)
+        document = await self._db_call(self.session.scalar, query)
+        if document is None:
+            if self.session.sync_session.fall_back_to_primary():
+                return await self.get_check_json(id, user)
+            return None
+        return document.encode()
 
     async def get_check(self, id: int) -> Check | BaseModel:
         return await self.fetch_one(
@@ -92,130 +731,34 @@ class MarkupService:
         if check:
             self.max_symbols = check.user.check_symbols or 50
 
-    class ALIGN:
-        LEFT = "left"
-        RIGHT = "right"
-        CENTER = "center"
-
-    def get_spaces(self, text: str, align=ALIGN.LEFT) -> tuple[str, str]:
-        left_spaces = ""
-        right_spaces = ""
-        empty_space_count = self.max_symbols - len(text)
-
-        if align == self.ALIGN.LEFT:
-            return left_spaces, " " * empty_space_count
-        elif align == self.ALIGN.RIGHT:
-            return " " * empty_space_count, right_spaces
-        elif align == self.ALIGN.CENTER:
-            return " " * int(empty_space_count / 2), " " * int(empty_space_count / 2)
-
-    def get_line(self, text, align=ALIGN.LEFT):
-        text = text.strip()
-        left_spaces, right_spaces = self.get_spaces(text, align)
-        return f"{left_spaces}{text}{right_spaces}"
-
-    def split_text(self, text: str, indentation: int = 0) -> list[str]:
-        return [
-            text[i : i + self.max_symbols - indentation] for i in range(0, len(text), self.max_symbols - indentation)
-        ]
-
-    def build_header(self):
-        base_header = f"ФОП {self.check.user.last_name} {self.check.user.first_name}"
-        align = self.ALIGN.CENTER
-        markup_lines = []
-        # build header
-        if len(base_header) > self.max_symbols:
-            parts = base_header.split(" ")
-            part_line = ""
-            for part in parts:
-                if len(" ".join((part_line, part))) <= self.max_symbols:
-                    part_line = " ".join((part_line, part))
-                else:
-                    markup_lines.append(self.get_line(part_line, align)) if part_line else ""
-                    part_line = ""
-                    if len(part) <= self.max_symbols:
-                        part_line = part
-                    else:
-                        for part_sub in self.split_text(part):
-                            markup_lines.append(self.get_line(part_sub, align))
-            else:
-                markup_lines.append(self.get_line(part_line, align))
-        else:
-            markup_lines.append(self.get_line(base_header, align))
-
-        markup_lines.append("=" * self.max_symbols)
-
-        return markup_lines
-
-    def build_products(self):
-        markup_lines = []
-
-        for product in self.check.products:
-            total_price = f"= {round(product.total, 2)}"
-            if len(product.name) + len(total_price) <= self.max_symbols:
-                markup_lines.append(self.get_line(product.name))
-            else:
-                markup_lines.extend(self.split_text(product.name, len(total_price)))
-
-            product_price_formation = f"{product.quantity} x {product.price}"
-            base_product_details_line = (
-                f"{product_price_formation}{self.get_spaces(product_price_formation+total_price)[1]}{total_price}"
-            )
-
-            if len(base_product_details_line) <= self.max_symbols:
-                markup_lines.append(base_product_details_line)
-            else:
-                product_price_formation = product_price_formation.split(" ")
-                lines = list()
-                for part in product_price_formation:
-                    lines.extend(self.split_text(part, len(total_price)))
-                lines[-1] = f"{lines[-1]}{self.get_spaces(lines[-1]+total_price)[1]}{total_price}"
-                markup_lines.extend(lines)
-
-            if self.check.products[-1] != product:
-                markup_lines.append("-" * self.max_symbols)
-
-        markup_lines.append("=" * self.max_symbols)
-        return markup_lines
-
-    def build_payment(self):
-        markup_lines = []
-
-        check_amount = str(round(self.check.total, 2))
-        check_amount_line = f"Сума{self.get_spaces('Сума'+check_amount)[1]}{check_amount}"
-        markup_lines.append(check_amount_line)
-
-        payment_amount_type = "Картка" if self.check.payment.type == "card" else "Готівка"
-        payment_amount = str(round(self.check.payment.amount, 2))
-        payment_amount_line = (
-            f"{payment_amount_type}{self.get_spaces(payment_amount_type+payment_amount)[1]}{payment_amount}"
-        )
-        markup_lines.append(payment_amount_line)
-
-        rest_amount = str(round(self.check.rest, 2))
-        rest_amount_line = f"Решта{self.get_spaces('Решта'+rest_amount)[1]}{rest_amount}"
-        markup_lines.append(rest_amount_line)
-
-        markup_lines.append("=" * self.max_symbols)
-        return markup_lines
-
-    def build_footer(self):
-        markup_lines = []
-        align = self.ALIGN.CENTER
-
-        markup_lines.append(self.get_line("Дякуємо за покупку!", align))
-        markup_lines.append(self.get_line(str(self.check.created_at.replace(microsecond=0)), align))
-        markup_lines.extend(self.get_line(part, align) for part in self.split_text(self.check.comment))
+    def build_lines(self) -> list[str]:
+        """Receipt lines, laid out in a single pass"""
+        if not self.check:
+            return []
+        return ReceiptLayout.for_width(self.max_symbols).render(self.check)
 
-        return markup_lines
+    def iter_lines(self) -> Iterator[str]:
+        """Receipt lines, laid out lazily in chunks of products"""
+        if not self.check:
+            return iter(())
+        return ReceiptLayout.for_width(self.max_symbols).iter_lines(self.check)
 
     def build_markup(self) -> Markup:
         if not self.check:
             return Markup()
 
-        markup_lines = self.build_header()
-        markup_lines.extend(self.build_products())
-        markup_lines.extend(self.build_payment())
-        markup_lines.extend(self.build_footer())
-
-        return Markup("<br>".join(markup_lines))
+        return Markup("<br>".join(self.build_lines()))
+
+
+# Checks of `POST /checks/create` committed in groups by a flusher task of the worker, if CHECKS_GROUP_COMMIT is set.
+# Requests wait for their group, so a created check is as durable as in its own transaction.
+check_commit_queue = GroupCommitQueue(
+    "checks",
+    CheckService.commit_checks,
+    settings.CHECKS_GROUP_COMMIT_MAX_SIZE,
+    settings.CHECKS_GROUP_COMMIT_INTERVAL,
+    settings.CHECKS_GROUP_COMMIT_QUEUE_SIZE,
+)
+metrics.register_stats(
+    "group_commit", "checks", check_commit_queue.stats, gauges=("queue_depth",), counters=("batches", "items", "errors")
+)
@@ -1,13 +1,24 @@
+import asyncio
 import importlib.metadata
 import logging
 
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
+from sqlalchemy.ext.asyncio import AsyncEngine
 from sqlalchemy.ext.asyncio import create_async_engine
 
 from src.base.models import metadata
+from src.checks.partitions import create_partitions_periodically
+from src.checks.service import check_commit_queue
+from src.conf.db import InstrumentedAsyncPool
 from src.conf.db import async_session
+from src.conf.db import replica_router
 from src.conf.exception_handlers import init_exception_handlers
+from src.conf.metrics import init_metrics
+from src.conf.metrics import metrics
 from src.conf.middlewares import init_middlewares
+from src.conf.query_budget import init_query_budget
 from src.conf.routers import init_routers
 from src.conf.settings import Settings
 from src.conf.settings import settings
@@ -22,17 +33,69 @@ except importlib.metadata.PackageNotFoundError:
     __version__ = "unknown"
 
 
-def init_db(app_settings: Settings):
-    """Init database"""
-    engine = create_async_engine(app_settings.sqlalchemy_database_uri)
+def create_engine(app_settings: Settings, url: str) -> AsyncEngine:
+    """Create engine with the pool settings of a worker"""
+    return create_async_engine(
+        url,
+        poolclass=InstrumentedAsyncPool,
+        pool_size=app_settings.db_pool_size,
+        max_overflow=app_settings.db_max_overflow,
+        pool_recycle=app_settings.DB_POOL_RECYCLE,
+        pool_pre_ping=app_settings.DB_POOL_PRE_PING,
+        pool_timeout=app_settings.DB_POOL_TIMEOUT,
+        connect_args={
+            "prepared_statement_cache_size": app_settings.DB_STATEMENT_CACHE_SIZE,
+            "statement_cache_size": app_settings.DB_STATEMENT_CACHE_SIZE,
+        },
+    )
+
+
+def init_db(app_settings: Settings) -> AsyncEngine:
+    """Init database, the primary engine and read replicas"""
+    engine = create_engine(app_settings, app_settings.sqlalchemy_database_uri)
+    replicas = [create_engine(app_settings, url) for url in app_settings.DATABASE_REPLICA_URLS]
     async_session.configure(bind=engine)
+    replica_router.configure(replicas, app_settings.DB_REPLICA_STICKINESS)
     metadata.bind = engine
+    init_metrics(engine)
+    init_query_budget(engine)
+    for number, replica in enumerate(replicas):
+        init_metrics(replica, f"replica_{number}")
+        init_query_budget(replica)
+    return engine
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Write metric snapshots of the worker, check read replicas and create check partitions in the background,
+    commit created checks in groups if enabled. Queued checks are committed before the worker exits.
+    """
+    flush_task = asyncio.create_task(metrics.flush_periodically(settings.METRICS_FLUSH_INTERVAL))
+    replica_check_task = asyncio.create_task(
+        replica_router.check_health_periodically(settings.DB_REPLICA_CHECK_INTERVAL, settings.DB_REPLICA_CHECK_TIMEOUT)
+    )
+    partitions_task = asyncio.create_task(
+        create_partitions_periodically(
+            app.state.db_engine,
+            settings.CHECKS_PARTITIONS_AHEAD,
+            settings.CHECKS_PARTITIONS_CHECK_INTERVAL,
+        )
+    )
+    if settings.CHECKS_GROUP_COMMIT:
+        check_commit_queue.start()
+    yield
+    await check_commit_queue.close()
+    partitions_task.cancel()
+    replica_check_task.cancel()
+    flush_task.cancel()
+    metrics.flush()
 
 
 def create_app(app_settings: Settings | None = None) -> "FastAPI":
     """Create app with including configurations"""
     app_settings = app_settings if app_settings is not None else settings
-    init_db(app_settings)
+    engine = init_db(app_settings)
     app = FastAPI(
         title="Fiscal checks API",
         debug=app_settings.DEBUG,
@@ -40,7 +103,9 @@ def create_app(app_settings: Settings | None = None) -> "FastAPI":
         redoc_url=settings.PREFIX + "/redoc",
         openapi_url=f"{settings.PREFIX}/openapi.json",
         version=__version__,
+        lifespan=lifespan,
     )
+    app.state.db_engine = engine
     init_middlewares(app)
     init_routers(app)
     init_exception_handlers(app)
@@ -1,12 +1,231 @@
+import asyncio
+import hashlib
+import hmac
+import itertools
+import logging
+import time
+
+from contextvars import ContextVar
+
+from sqlalchemy import Select
 from sqlalchemy import create_engine
+from sqlalchemy import exc
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import Session as BaseSession
 from sqlalchemy.orm import scoped_session
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from sqlalchemy.pool import PoolProxiedConnection
+from sqlalchemy.sql.base import Executable
+from sqlalchemy.sql.elements import ClauseElement
+from sqlalchemy.sql.visitors import InternalTraversal
 
+from src.conf.schemas import PoolStatsSchema
 from src.conf.settings import settings
 
 
-async_session = sessionmaker(None, expire_on_commit=False, class_=AsyncSession)
+logger = logging.getLogger(__name__)
+
+
+class InstrumentedAsyncPool(AsyncAdaptedQueuePool):
+    """Connection pool recording how long checkouts wait for a connection"""
+
+    checkouts = 0
+    timeouts = 0
+    wait_time = 0.0
+    max_wait_time = 0.0
+    pinged_at = float("-inf")
+    ping_ok = False
+
+    def stats(self) -> PoolStatsSchema:
+        return PoolStatsSchema(
+            size=self.size(),
+            max_overflow=self._max_overflow,
+            checked_out=self.checkedout(),
+            idle=self.checkedin(),
+            overflow=max(self.overflow(), 0),
+            checkouts=self.checkouts,
+            timeouts=self.timeouts,
+            wait_time=self.wait_time,
+            mean_wait_time=self.wait_time / self.checkouts if self.checkouts else 0.0,
+            max_wait_time=self.max_wait_time,
+        )
+
+    def connect(self) -> PoolProxiedConnection:
+        started = time.perf_counter()
+        try:
+            return super().connect()
+        except exc.TimeoutError:
+            self.timeouts += 1
+            raise
+        finally:
+            elapsed = time.perf_counter() - started
+            self.checkouts += 1
+            self.wait_time += elapsed
+            self.max_wait_time = max(self.max_wait_time, elapsed)
+
+
+async def ping_database(engine: AsyncEngine, interval: float) -> bool:
+    """Check the database with a pooled connection, at most once per `interval` seconds"""
+    pool = engine.pool
+    if time.monotonic() - pool.pinged_at >= interval:
+        pool.pinged_at = time.monotonic()
+        try:
+            async with engine.connect() as connection:
+                await connection.execute(text("SELECT 1"))
+            pool.ping_ok = True
+        except Exception:
+            pool.ping_ok = False
+    return pool.ping_ok
+
+
+# cookie carrying the stickiness of reads to the primary between requests of a client
+STICKY_COOKIE = "read_primary"
+
+
+class StickyReads:
+    """Stickiness of one request: the user of a valid cookie, and the user whose writes the response sticks"""
+
+    def __init__(self, user_id: int | None):
+        self.user_id = user_id
+        self.written_user_id: int | None = None
+
+
+sticky_reads: ContextVar[StickyReads | None] = ContextVar("sticky_reads", default=None)
+
+
+class ReplicaRouter:
+    """
+    Healthy read replicas in rotation, and users whose reads stick to the primary for a while after their writes.
+
+    Stickiness travels with the client in a signed cookie rather than in the worker memory, so it holds whichever
+    worker serves the next request. `StickyReadsMiddleware` reads the cookie and sets it in responses to writes.
+    """
+
+    def __init__(self):
+        self.replicas: list[AsyncEngine] = []
+        self.healthy: list[AsyncEngine] = []
+        self.stickiness = 0.0
+        self._rotation = itertools.count()
+
+    def configure(self, replicas: list[AsyncEngine], stickiness: float) -> None:
+        self.replicas = replicas
+        self.healthy = []
+        self.stickiness = stickiness
+
+    def pick(self) -> AsyncEngine | None:
+        """Next healthy replica, None if there is none"""
+        healthy = self.healthy
+        return healthy[next(self._rotation) % len(healthy)] if healthy else None
+
+    def stick(self, user_id: int) -> None:
+        """Send reads of the user to the primary until their writes reach the replicas"""
+        if self.replicas and (request := sticky_reads.get()) is not None:
+            request.written_user_id = user_id
+
+    def is_sticky(self, user_id: int) -> bool:
+        request = sticky_reads.get()
+        return request is not None and user_id in (request.user_id, request.written_user_id)
+
+    def sticky_cookie(self, user_id: int) -> str:
+        """Signed cookie value sticking reads of the user to the primary for `stickiness` seconds"""
+        value = f"{user_id}.{round((time.time() + self.stickiness) * 1000)}"
+        return f"{value}.{self._sign(value)}"
+
+    def sticky_user(self, cookie: str) -> int | None:
+        """User of a cookie made by `sticky_cookie`, None if it is forged or expired"""
+        value, _, signature = cookie.rpartition(".")
+        if not hmac.compare_digest(signature, self._sign(value)):
+            return None
+        user_id, _, until = value.partition(".")
+        try:
+            return int(user_id) if int(until) > time.time() * 1000 else None
+        except ValueError:
+            return None
+
+    @staticmethod
+    def _sign(value: str) -> str:
+        # a key of its own, so the cookie is never valid as a token signed with SECRET_KEY
+        key = f"{settings.SECRET_KEY}:{STICKY_COOKIE}".encode()
+        return hmac.new(key, value.encode(), hashlib.sha256).hexdigest()
+
+    async def check_health(self, timeout: float) -> None:
+        """Take replicas failing `SELECT 1` within `timeout` seconds out of rotation, put recovered ones back"""
+        healthy = []
+        for replica in self.replicas:
+            try:
+                async with asyncio.timeout(timeout):
+                    async with replica.connect() as connection:
+                        await connection.execute(text("SELECT 1"))
+            except Exception:
+                if replica in self.healthy:
+                    logger.warning("Replica %s is out of rotation", replica.url.render_as_string())
+                continue
+            if replica not in self.healthy:
+                logger.info("Replica %s is back in rotation", replica.url.render_as_string())
+            healthy.append(replica)
+        self.healthy = healthy
+
+    async def check_health_periodically(self, interval: float, timeout: float) -> None:
+        """Replicas join the rotation after their first successful check"""
+        while self.replicas:
+            await self.check_health(timeout)
+            await asyncio.sleep(interval)
+
+
+replica_router = ReplicaRouter()
+
+
+class Explain(Executable, ClauseElement):
+    """`EXPLAIN (FORMAT JSON)` of a SELECT, with the parameters of the query bound, routed like the query itself"""
+
+    inherit_cache = True
+    _traverse_internals = [("query", InternalTraversal.dp_clauseelement)]
+
+    def __init__(self, query: Select):
+        self.query = query
+
+
+@compiles(Explain)
+def _compile_explain(element: Explain, compiler, **kw) -> str:
+    return f"EXPLAIN (FORMAT JSON) {compiler.process(element.query, **kw)}"
+
+
+class RoutingSession(BaseSession):
+    """
+    Session reading from a healthy replica and writing to the primary.
+
+    Once the session writes, or if it is marked with `info["primary"]`, every following statement goes to the primary,
+    so the session reads its own writes. Only plain SELECTs go to replicas, all of them to the replica picked for the
+    first one, so the queries of a session never see a row on one replica and miss it on a lagging other one. An
+    `Explain` goes where the query it explains would.
+    """
+
+    def get_bind(self, mapper=None, *, clause=None, **kw):
+        if isinstance(clause, Explain):
+            clause = clause.query
+        if not self.info.get("primary"):
+            if isinstance(clause, Select) and clause._for_update_arg is None and not self._flushing:
+                if "replica" not in self.info:
+                    self.info["replica"] = replica_router.pick()
+                if self.info["replica"] is not None:
+                    return self.info["replica"].sync_engine
+            elif clause is not None or self._flushing:
+                self.info["primary"] = True
+        return super().get_bind(mapper, clause=clause, **kw)
+
+    def fall_back_to_primary(self) -> bool:
+        """Send the following statements to the primary, False if the session has not been reading from a replica"""
+        if self.info.get("primary") or self.info.get("replica") is None:
+            return False
+        self.info["primary"] = True
+        return True
+
+
+async_session = sessionmaker(None, expire_on_commit=False, class_=AsyncSession, sync_session_class=RoutingSession)
 session_factory = sessionmaker(None)
 
 sync_engine = create_engine(url=settings.sqlalchemy_database_uri)
@@ -6,6 +6,7 @@ from starlette.requests import Request
 from starlette.responses import Response
 
 from src.conf.exceptions import AlreadyExistsException
+from src.conf.exceptions import BadRequestException
 from src.conf.exceptions import DoesNotExistException
 
 
@@ -21,6 +22,13 @@ async def already_exists_exception_handler(request: Request, exc: AlreadyExistsE
     )
 
 
+async def bad_request_exception_handler(request: Request, exc: BadRequestException) -> Response:
+    return await http_exception_handler(
+        request=request, exc=HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc))
+    )
+
+
 def init_exception_handlers(app: FastAPI) -> None:
     app.exception_handler(DoesNotExistException)(does_not_exist_exception_handler)
     app.exception_handler(AlreadyExistsException)(already_exists_exception_handler)
+    app.exception_handler(BadRequestException)(bad_request_exception_handler)
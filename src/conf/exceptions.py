@@ -4,3 +4,11 @@ class DoesNotExistException(Exception):
 
 class AlreadyExistsException(Exception):
     pass
+
+
+class BadRequestException(Exception):
+    pass
+
+
+class QueryBudgetExceededException(Exception):
+    pass
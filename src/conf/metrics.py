@@ -0,0 +1,322 @@
+import asyncio
+import json
+import logging
+import os
+import re
+import time
+
+from functools import lru_cache
+from pathlib import Path
+from typing import Any
+from typing import Callable
+
+from pydantic import BaseModel
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+from starlette.types import ASGIApp
+from starlette.types import Message
+from starlette.types import Receive
+from starlette.types import Scope
+from starlette.types import Send
+
+from src.conf.settings import settings
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+TABLE_PATTERN = re.compile(r'\b(?:FROM|INTO|UPDATE|JOIN)\s+"?(\w+)', re.IGNORECASE)
+
+
+class Metric:
+    TYPE = "untyped"
+
+    def __init__(self, name: str, help: str, label_names: tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.label_names = label_names
+        self.values: dict[tuple[str, ...], Any] = {}
+
+    def dump(self) -> dict:
+        return {"type": self.TYPE, "help": self.help, "labels": self.label_names, "values": list(self.values.items())}
+
+    @staticmethod
+    def merge(value: Any, other: Any) -> Any:
+        return value + other
+
+
+class Counter(Metric):
+    TYPE = "counter"
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        self.values[labels] = self.values.get(labels, 0) + amount
+
+    def set(self, *labels: str, value: float) -> None:
+        """Set the total counted by the source itself, e.g. hits of a cache"""
+        self.values[labels] = value
+
+
+class Gauge(Metric):
+    """Gauge summed over workers, so it must be additive, e.g. a number of items rather than a rate"""
+
+    TYPE = "gauge"
+
+    def set(self, *labels: str, value: float) -> None:
+        self.values[labels] = value
+
+
+class Histogram(Metric):
+    """Histogram with values of `[count per bucket..., count above the last bucket, sum]`"""
+
+    TYPE = "histogram"
+
+    def __init__(self, name: str, help: str, label_names: tuple[str, ...] = (), buckets: tuple = DEFAULT_BUCKETS):
+        super().__init__(name, help, label_names)
+        self.buckets = buckets
+
+    def dump(self) -> dict:
+        return super().dump() | {"buckets": self.buckets}
+
+    def observe(self, *labels: str, value: float) -> None:
+        counts = self.values.get(labels)
+        if counts is None:
+            counts = self.values[labels] = [0] * (len(self.buckets) + 2)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                counts[i] += 1
+                break
+        else:
+            counts[-2] += 1
+        counts[-1] += value
+
+    @staticmethod
+    def merge(value: list, other: list) -> list:
+        return [a + b for a, b in zip(value, other)]
+
+
+class MetricsRegistry:
+    """
+    Metrics of the worker process, aggregated over all workers in Prometheus text format.
+
+    With `directory` set, every worker periodically writes a snapshot of its metrics to `<directory>/<pid>.json`,
+    and a scrape served by any worker sums the snapshots of all workers. The directory is cleared by the gunicorn
+    master on start, a snapshot is removed once its worker exits.
+    """
+
+    def __init__(self, directory: str | None = None):
+        self.directory = Path(directory) if directory else None
+        self.metrics: dict[str, Metric] = {}
+        self.collectors: list[Callable[[], None]] = []
+
+    def register(self, metric: Metric) -> Metric:
+        self.metrics[metric.name] = metric
+        return metric
+
+    def register_stats(
+        self,
+        prefix: str,
+        name: str,
+        stats: Callable[[], BaseModel],
+        gauges: tuple[str, ...] = (),
+        counters: tuple[str, ...] = (),
+    ) -> None:
+        """
+        Export additive fields of a stats schema with the `name` label, current values as `<prefix>_<field>` gauges
+        and totals since the worker start as `<prefix>_<field>_total` counters
+        """
+        exported = {}
+        for fields, metric_class, suffix in ((gauges, Gauge, ""), (counters, Counter, "_total")):
+            for field in fields:
+                metric_name = f"{prefix}_{field}{suffix}"
+                exported[field] = self.metrics.get(metric_name) or self.register(
+                    metric_class(
+                        metric_name, f"{prefix.replace('_', ' ').capitalize()} {field.replace('_', ' ')}", ("name",)
+                    )
+                )
+
+        def collect() -> None:
+            values = stats().model_dump()
+            for field, metric in exported.items():
+                metric.set(name, value=values[field])
+
+        self.collectors.append(collect)
+
+    def snapshot(self) -> dict:
+        for collect in self.collectors:
+            collect()
+        return {name: metric.dump() for name, metric in self.metrics.items()}
+
+    def snapshot_path(self, pid: int) -> Path:
+        return self.directory / f"{pid}.json"
+
+    def flush(self) -> None:
+        """Write snapshot of the worker's metrics"""
+        if self.directory is None:
+            return
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self.snapshot_path(os.getpid())
+        temporary_path = path.with_suffix(".tmp")
+        temporary_path.write_text(json.dumps(self.snapshot()))
+        temporary_path.replace(path)
+
+    async def flush_periodically(self, interval: float) -> None:
+        while self.directory is not None:
+            await asyncio.sleep(interval)
+            try:
+                self.flush()
+            except OSError:
+                logger.exception("Failed to write metrics snapshot")
+
+    def remove_snapshot(self, pid: int) -> None:
+        if self.directory is not None:
+            self.snapshot_path(pid).unlink(missing_ok=True)
+
+    def clear_snapshots(self) -> None:
+        if self.directory is not None and self.directory.exists():
+            for path in self.directory.glob("*.json"):
+                path.unlink(missing_ok=True)
+
+    def collect(self) -> dict:
+        """Metrics of all workers"""
+        if self.directory is None:
+            return json.loads(json.dumps(self.snapshot()))
+        self.flush()
+        merged = {}
+        for path in self.directory.glob("*.json"):
+            try:
+                snapshot = json.loads(path.read_text())
+            except (OSError, ValueError):
+                continue
+            for name, dump in snapshot.items():
+                metric = merged.setdefault(name, dump | {"values": {}})
+                merge = self.metrics[name].merge if name in self.metrics else Metric.merge
+                for labels, value in dump["values"]:
+                    labels = tuple(labels)
+                    metric["values"][labels] = (
+                        merge(metric["values"][labels], value) if labels in metric["values"] else value
+                    )
+        for metric in merged.values():
+            metric["values"] = list(metric["values"].items())
+        return merged
+
+    def render(self) -> str:
+        lines = []
+        for name, metric in sorted(self.collect().items()):
+            lines.append(f"# HELP {name} {metric['help']}")
+            lines.append(f"# TYPE {name} {metric['type']}")
+            for labels, value in metric["values"]:
+                pairs = [f'{label_name}="{escape(label)}"' for label_name, label in zip(metric["labels"], labels)]
+                if metric["type"] == "histogram":
+                    cumulative = 0
+                    for bound, count in zip([*metric["buckets"], "+Inf"], value[:-1]):
+                        cumulative += count
+                        bucket_labels = format_labels([*pairs, f'le="{bound}"'])
+                        lines.append(f"{name}_bucket{bucket_labels} {cumulative}")
+                    lines.append(f"{name}_sum{format_labels(pairs)} {value[-1]}")
+                    lines.append(f"{name}_count{format_labels(pairs)} {cumulative}")
+                else:
+                    lines.append(f"{name}{format_labels(pairs)} {value}")
+        return "\n".join(lines) + "\n"
+
+
+def escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def format_labels(pairs: list[str]) -> str:
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+@lru_cache(maxsize=1024)
+def statement_labels(statement: str) -> tuple[str, str]:
+    """Operation and the first table of a statement, to keep the number of label values small"""
+    operation = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else ""
+    match = TABLE_PATTERN.search(statement)
+    return operation, match.group(1) if match else ""
+
+
+metrics = MetricsRegistry(settings.METRICS_DIR)
+
+http_requests = metrics.register(
+    Counter("http_requests_total", "HTTP requests by route and status", ("method", "route", "status"))
+)
+http_request_duration = metrics.register(
+    Histogram("http_request_duration_seconds", "HTTP request latency by route", ("method", "route"))
+)
+db_statement_duration = metrics.register(
+    Histogram("db_statement_duration_seconds", "SQL statement latency by operation and table", ("operation", "table"))
+)
+db_statement_rows = metrics.register(
+    Counter("db_statement_rows_total", "Rows returned or affected by SQL statements", ("operation", "table"))
+)
+group_commit_batch_size = metrics.register(
+    Histogram(
+        "group_commit_batch_size",
+        "Items written by one group commit",
+        ("name",),
+        buckets=(1, 2, 5, 10, 20, 50, 100, 200, 500, 1000),
+    )
+)
+group_commit_duration = metrics.register(
+    Histogram("group_commit_duration_seconds", "Latency of group commits, writes included", ("name",))
+)
+
+
+class MetricsMiddleware:
+    """Record latency and status of HTTP requests by route template, the response body included"""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            route_path = getattr(route, "path", "unmatched")
+            http_request_duration.observe(scope["method"], route_path, value=time.perf_counter() - started)
+            http_requests.inc(scope["method"], route_path, str(status_code))
+
+
+def init_metrics(engine: AsyncEngine, name: str = "default") -> None:
+    """Record SQL statements of the engine and export its pool statistics"""
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def start_statement_timer(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("metrics_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine.sync_engine, "after_cursor_execute")
+    def record_statement(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["metrics_started"].pop()
+        labels = statement_labels(statement)
+        db_statement_duration.observe(*labels, value=elapsed)
+        if cursor.rowcount > 0:
+            db_statement_rows.inc(*labels, amount=cursor.rowcount)
+
+    @event.listens_for(engine.sync_engine, "handle_error")
+    def drop_statement_timer(exception_context):
+        if exception_context.connection is not None:
+            started = exception_context.connection.info.get("metrics_started")
+            if started:
+                started.pop()
+
+    metrics.register_stats(
+        "db_pool",
+        name,
+        lambda: engine.pool.stats(),
+        gauges=("size", "checked_out", "idle", "overflow"),
+        counters=("checkouts", "timeouts", "wait_time"),
+    )
@@ -1,11 +1,56 @@
 import logging
+import math
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from starlette.datastructures import MutableHeaders
+from starlette.requests import HTTPConnection
+from starlette.types import ASGIApp
+from starlette.types import Message
+from starlette.types import Receive
+from starlette.types import Scope
+from starlette.types import Send
+
+from src.conf.db import STICKY_COOKIE
+from src.conf.db import StickyReads
+from src.conf.db import replica_router
+from src.conf.db import sticky_reads
+from src.conf.metrics import MetricsMiddleware
+
 
 logger = logging.getLogger(__name__)
 
 
+class StickyReadsMiddleware:
+    """Read the stickiness cookie of the request, and set it in the response if the request wrote for a user"""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not replica_router.replicas:
+            await self.app(scope, receive, send)
+            return
+
+        cookie = HTTPConnection(scope).cookies.get(STICKY_COOKIE)
+        request = StickyReads(replica_router.sticky_user(cookie) if cookie else None)
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start" and request.written_user_id is not None:
+                MutableHeaders(scope=message).append(
+                    "set-cookie",
+                    f"{STICKY_COOKIE}={replica_router.sticky_cookie(request.written_user_id)}; "
+                    f"Max-Age={math.ceil(replica_router.stickiness)}; Path=/; HttpOnly; SameSite=lax",
+                )
+            await send(message)
+
+        token = sticky_reads.set(request)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            sticky_reads.reset(token)
+
+
 def init_middlewares(app: FastAPI) -> None:
     app.add_middleware(
         CORSMiddleware,
@@ -14,3 +59,5 @@ def init_middlewares(app: FastAPI) -> None:
         allow_methods=["*"],
         allow_headers=["*"],
     )
+    app.add_middleware(StickyReadsMiddleware)
+    app.add_middleware(MetricsMiddleware)
@@ -0,0 +1,91 @@
+import logging
+import time
+
+from collections import Counter
+from contextvars import ContextVar
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from src.conf.exceptions import QueryBudgetExceededException
+from src.conf.settings import QueryBudgetMode
+
+
+logger = logging.getLogger(__name__)
+
+
+class QueryTracker:
+    """SQL statements and database time of one request"""
+
+    def __init__(self):
+        self.statements: Counter[str] = Counter()
+        self.duration = 0.0
+        self._merged: set["QueryTracker"] = set()
+
+    @property
+    def count(self) -> int:
+        return self.statements.total()
+
+    def record(self, statement: str, duration: float) -> None:
+        self.statements[statement] += 1
+        self.duration += duration
+
+    def merge(self, other: "QueryTracker") -> None:
+        """Charge statements tracked elsewhere on behalf of this request once, e.g. of a shared batch"""
+        if other in self._merged:
+            return
+        self._merged.add(other)
+        self.statements.update(other.statements)
+        self.duration += other.duration
+
+    def violations(self, max_statements: int, max_repeats: int, max_duration: float | None) -> list[str]:
+        """Describe how the tracked statements exceed the budget"""
+        violations = []
+        if self.count > max_statements:
+            statement, _ = self.statements.most_common(1)[0]
+            violations.append(f"{self.count} statements exceed the budget of {max_statements}, e.g. {statement!r}")
+        for statement, count in self.statements.items():
+            if count > max_repeats:
+                violations.append(f"statement repeated {count} times, possible N+1: {statement!r}")
+        if max_duration is not None and self.duration > max_duration:
+            violations.append(f"{self.duration:.3f}s of database time exceed the budget of {max_duration:.3f}s")
+        return violations
+
+    def check(
+        self, name: str, mode: QueryBudgetMode, max_statements: int, max_repeats: int, max_duration: float | None
+    ) -> None:
+        """Log or raise budget violations depending on `mode`"""
+        violations = self.violations(max_statements, max_repeats, max_duration)
+        if not violations:
+            logger.debug("%s: %d statements, %.3fs of database time", name, self.count, self.duration)
+            return
+        message = f"{name} exceeded its query budget: " + "; ".join(violations)
+        if mode == QueryBudgetMode.RAISE:
+            raise QueryBudgetExceededException(message)
+        logger.warning(message)
+
+
+query_tracker: ContextVar[QueryTracker | None] = ContextVar("query_tracker", default=None)
+
+
+def init_query_budget(engine: AsyncEngine) -> None:
+    """Record statements of the engine into the query tracker of the current request"""
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def start_tracked_statement(conn, cursor, statement, parameters, context, executemany):
+        if query_tracker.get() is not None:
+            conn.info.setdefault("query_budget_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine.sync_engine, "after_cursor_execute")
+    def record_tracked_statement(conn, cursor, statement, parameters, context, executemany):
+        tracker = query_tracker.get()
+        started = conn.info.get("query_budget_started")
+        if tracker is not None and started:
+            tracker.record(statement, time.perf_counter() - started.pop())
+
+    @event.listens_for(engine.sync_engine, "handle_error")
+    def drop_tracked_statement(exception_context):
+        if exception_context.connection is not None:
+            started = exception_context.connection.info.get("query_budget_started")
+            if started:
+                started.pop()
@@ -38,3 +38,18 @@ class ResponseLogSchema(BaseLogSchema):
     def prepare_message(self):
         self.url = f"Response from {self.url}"
         return self
+
+
+class PoolStatsSchema(BaseModel):
+    """Database connection pool statistics schema"""
+
+    size: int
+    max_overflow: int
+    checked_out: int
+    idle: int
+    overflow: int
+    checkouts: int
+    timeouts: int
+    wait_time: float
+    mean_wait_time: float
+    max_wait_time: float
@@ -1,3 +1,5 @@
+import multiprocessing
+
 from enum import Enum
 
 from pydantic_settings import BaseSettings
@@ -18,6 +20,12 @@ class LogLevel(str, Enum):
     CRITICAL = "CRITICAL"
 
 
+class QueryBudgetMode(str, Enum):
+    OFF = "OFF"
+    LOG = "LOG"
+    RAISE = "RAISE"
+
+
 class Settings(BaseSettings):
     PREFIX: str = "/api/v1"
     PORT: int = 8000
@@ -31,7 +39,59 @@ class Settings(BaseSettings):
     DATABASE_USER: str
     DATABASE_PASSWORD: str
     DATABASE_HOST: str
+    WEB_CONCURRENCY: int | None = None  # gunicorn workers, 2 per CPU core by default
+    DB_POOL_SIZE: int = 5  # connections per worker
+    DB_MAX_OVERFLOW: int = 5  # connections per worker on top of DB_POOL_SIZE
+    DB_MAX_CONNECTIONS: int | None = None  # connections of all workers, caps the per worker pool if set
+    DB_POOL_RECYCLE: int = 1800  # seconds, -1 never recycles connections
+    DB_POOL_PRE_PING: bool = True
+    DB_POOL_TIMEOUT: float = 30  # seconds
+    DB_STATEMENT_CACHE_SIZE: int = 100  # prepared statements per connection, 0 behind pgbouncer in transaction mode
+    DB_READY_CHECK_INTERVAL: float = 5  # seconds between database round trips of the readiness probe
+    DATABASE_REPLICA_URLS: list[str] = []  # JSON list of read replica SQLAlchemy URLs, reads go to the primary if empty
+    DB_REPLICA_STICKINESS: float = 5  # seconds a user reads from the primary after writing, above the replication lag
+    DB_REPLICA_CHECK_INTERVAL: float = 5  # seconds between replica health checks
+    DB_REPLICA_CHECK_TIMEOUT: float = 1  # seconds, slower replicas are taken out of rotation
+    METRICS_DIR: str | None = None  # metric snapshots of gunicorn workers, metrics of one process if not set
+    METRICS_FLUSH_INTERVAL: float = 1  # seconds
+    QUERY_BUDGET_MODE: QueryBudgetMode = QueryBudgetMode.OFF  # LOG or RAISE on routes exceeding their query budget
     SECRET_KEY: str = "super_secret_key"
+    AUTH_CACHE_TTL: float = 60  # seconds
+    AUTH_CACHE_MAX_SIZE: int = 100_000
+    USER_LOADER_WINDOW: float = 0.002  # seconds, 0 batches lookups of one event loop tick
+    USER_LOADER_MAX_BATCH_SIZE: int = 100
+    CHECKS_BATCH_MAX_SIZE: int = 500
+    CHECK_MAX_PRODUCTS: int = 1000  # product lines of one check
+    CHECKS_PRINT_MAX_IDS: int = 10_000
+    CHECKS_PRINT_BATCH_SIZE: int = 200
+    CHECKS_EXPORT_CHUNK_SIZE: int = 5000  # rows fetched from the server-side cursor at once, a Parquet row group
+    CHECKS_PARTITIONS_AHEAD: int = 3  # months of partitions created in advance
+    CHECKS_PARTITIONS_CHECK_INTERVAL: float = 3600  # seconds between checks for missing partitions
+    CHECKS_ANALYTICS_MAX_BUCKETS: int = 366  # days or months in one analytics response
+    CHECKS_GROUP_COMMIT: bool = False  # commit created checks of concurrent requests together, see GroupCommitQueue
+    CHECKS_GROUP_COMMIT_MAX_SIZE: int = 100  # checks per group commit
+    CHECKS_GROUP_COMMIT_INTERVAL: float = 0.005  # seconds a group waits for more checks after its first one
+    CHECKS_GROUP_COMMIT_QUEUE_SIZE: int = 10_000  # checks waiting for their group, requests wait for room beyond it
+    PRODUCT_NAME_CACHE_MAX_SIZE: int = 100_000  # product name ids cached per worker
+    RECEIPT_CACHE_MAX_SIZE: int = 64 * 1024 * 1024  # bytes
+    RECEIPT_ESCPOS_ENCODING: str = "cp866"
+    RECEIPT_ESCPOS_CODEPAGE: int = 17  # ESC t code table of the encoding, PC866 on Epson printers
+
+    @property
+    def web_concurrency(self) -> int:
+        return self.WEB_CONCURRENCY or max(2 * multiprocessing.cpu_count(), 2)
+
+    @property
+    def db_pool_size(self) -> int:
+        if self.DB_MAX_CONNECTIONS is None:
+            return self.DB_POOL_SIZE
+        return max(min(self.DB_POOL_SIZE, self.DB_MAX_CONNECTIONS // self.web_concurrency), 1)
+
+    @property
+    def db_max_overflow(self) -> int:
+        if self.DB_MAX_CONNECTIONS is None:
+            return self.DB_MAX_OVERFLOW
+        return max(min(self.DB_MAX_OVERFLOW, self.DB_MAX_CONNECTIONS // self.web_concurrency - self.db_pool_size), 0)
 
     @property
     def sqlalchemy_database_uri(self) -> str:
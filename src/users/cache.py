@@ -0,0 +1,97 @@
+import time
+
+from sqlalchemy import event
+from sqlalchemy import inspect
+from sqlalchemy.orm import make_transient_to_detached
+
+from src.base.schemas import CacheStatsSchema
+from src.conf.metrics import metrics
+from src.conf.settings import settings
+from src.users.models import User
+
+
+class AuthCache:
+    """
+    In-process TTL cache of verified access tokens and their users.
+
+    Users are kept as detached snapshots, to be merged into a request session without a query. A token entry
+    remembers the password hash its signature was verified with and is rejected once the snapshot has another one.
+    Only the worker that changes a user drops its snapshot at once, other workers keep accepting tokens signed with
+    the old password, and serving the old profile, until their snapshot expires after `ttl` seconds at most.
+    """
+
+    def __init__(self, ttl: float, max_size: int):
+        self.ttl = ttl
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._tokens: dict[str, tuple[float, int, str]] = {}
+        self._users: dict[int, tuple[float, User]] = {}
+
+    def get_token(self, token: str) -> tuple[int, str] | None:
+        """Get id of the user and the password hash the token was verified with"""
+        entry = self._tokens.get(token)
+        if entry is None or entry[0] <= time.monotonic():
+            self._tokens.pop(token, None)
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry[1], entry[2]
+
+    def set_token(self, token: str, expires_at: float, user: User) -> None:
+        """Cache a verified token until it expires, but not longer than `ttl`"""
+        expires_in = min(self.ttl, expires_at - time.time())
+        if expires_in <= 0:
+            return
+        self._tokens[token] = (time.monotonic() + expires_in, user.id, user.password)
+        self._evict(self._tokens)
+        self.set_user(user)
+
+    def get_user(self, user_id: int) -> User | None:
+        """Get detached snapshot of the user"""
+        entry = self._users.get(user_id)
+        if entry is None or entry[0] <= time.monotonic():
+            self._users.pop(user_id, None)
+            return None
+        return entry[1]
+
+    def set_user(self, user: User) -> None:
+        snapshot = User(**{attr.key: getattr(user, attr.key) for attr in inspect(User).column_attrs})
+        make_transient_to_detached(snapshot)
+        self._users[user.id] = (time.monotonic() + self.ttl, snapshot)
+        self._evict(self._users)
+
+    def invalidate_user(self, user_id: int) -> None:
+        """Drop snapshot of the user, his tokens are verified against the fresh user on their next use"""
+        self._users.pop(user_id, None)
+
+    def _evict(self, entries: dict) -> None:
+        while len(entries) > self.max_size:
+            del entries[next(iter(entries))]
+            self.evictions += 1
+
+    def clear(self) -> None:
+        self._tokens.clear()
+        self._users.clear()
+
+    def stats(self) -> CacheStatsSchema:
+        requests = self.hits + self.misses
+        return CacheStatsSchema(
+            hits=self.hits,
+            misses=self.misses,
+            hit_rate=self.hits / requests if requests else 0.0,
+            evictions=self.evictions,
+            items=len(self._tokens),
+            max_size=self.max_size,
+        )
+
+
+auth_cache = AuthCache(settings.AUTH_CACHE_TTL, settings.AUTH_CACHE_MAX_SIZE)
+metrics.register_stats("cache", "auth", auth_cache.stats, gauges=("items",), counters=("hits", "misses", "evictions"))
+
+
+@event.listens_for(User, "after_update")
+def invalidate_user_snapshot(mapper, connection, target: User) -> None:
+    """Drop snapshot of an updated user, e.g. after a password change outside of UserService.update"""
+    auth_cache.invalidate_user(target.id)
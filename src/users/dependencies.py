@@ -7,10 +7,13 @@ from fastapi.security import HTTPBearer
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.base.dependencies import get_db_session
+from src.conf.db import replica_router
 from src.users.service import UserService
 
 
 auth_scheme = HTTPBearer()
+# for routes public in some representations, the credentials are only checked where the route needs the user
+optional_auth_scheme = HTTPBearer(auto_error=False)
 
 
 async def get_user_service(session: Annotated[AsyncSession, Depends(get_db_session)]) -> UserService:
@@ -27,6 +30,9 @@ async def get_authenticated_user(
         user = await user_service.verify_jwt_access_token(token.credentials)
         if not user:
             raise HTTPException(status_code=401, detail="Invalid or expired token")
+        if replica_router.is_sticky(user.id):
+            # read your own writes until they reach the replicas
+            user_service.session.sync_session.info["primary"] = True
         return user
     except Exception as e:
         raise HTTPException(status_code=401, detail="Token validation failed") from e
@@ -0,0 +1,20 @@
+from sqlalchemy import select
+
+from src.base.loader import BatchLoader
+from src.conf.db import async_session
+from src.conf.metrics import metrics
+from src.conf.settings import settings
+from src.users.models import User
+
+
+async def load_users(ids: list[int]) -> dict[int, User]:
+    """Get detached users by ids with a single query, from the primary as tokens are checked against passwords"""
+    async with async_session(info={"primary": True}) as session:
+        users = await session.scalars(select(User).where(User.id.in_(ids)))
+        return {user.id: user for user in users}
+
+
+# Users by id, loaded in their own session: only committed users are visible, and the loaded instances are shared
+# by all waiters of the batch, so they must be merged into the caller's session before use.
+user_loader = BatchLoader(load_users, settings.USER_LOADER_WINDOW, settings.USER_LOADER_MAX_BATCH_SIZE)
+metrics.register_stats("batch_loader", "users", user_loader.stats, counters=("batches", "keys", "errors"))
@@ -7,9 +7,13 @@ from fastapi.params import Depends
 from fastapi.security import HTTPAuthorizationCredentials
 from starlette import status
 
+from src.base.schemas import BatchLoaderStatsSchema
+from src.base.schemas import CacheStatsSchema
+from src.users.cache import auth_cache
 from src.users.dependencies import auth_scheme
 from src.users.dependencies import get_authenticated_user
 from src.users.dependencies import get_user_service
+from src.users.loader import user_loader
 from src.users.models import User
 from src.users.schemas import JWTResponseSchema
 from src.users.schemas import UserDTOCreateSchema
@@ -94,3 +98,25 @@ async def update(
 ):
     await service.update(user, request_data.model_dump(mode="json", exclude_none=True, exclude_unset=True))
     return 200
+
+
+@router.get(
+    "/auth/cache",
+    responses={
+        status.HTTP_200_OK: {"model": CacheStatsSchema},
+    },
+    dependencies=[Depends(get_authenticated_user)],
+)
+async def auth_cache_stats():
+    return auth_cache.stats()
+
+
+@router.get(
+    "/loader",
+    responses={
+        status.HTTP_200_OK: {"model": BatchLoaderStatsSchema},
+    },
+    dependencies=[Depends(get_authenticated_user)],
+)
+async def user_loader_stats():
+    return user_loader.stats()
@@ -4,22 +4,37 @@ from datetime import timedelta
 
 import jwt
 
+from jwt.algorithms import HMACAlgorithm
+
 from src.base.service import BaseService
+from src.conf.db import replica_router
 from src.conf.exceptions import AlreadyExistsException
 from src.conf.exceptions import DoesNotExistException
 from src.conf.settings import settings
 from src.users.auth import Hasher
+from src.users.cache import auth_cache
+from src.users.loader import user_loader
 from src.users.models import User
 from src.users.schemas import UserDTOCreateSchema
 from src.users.schemas import UserDTOSignInSchema
 
 
+ACCESS_TOKEN_ALGORITHM = HMACAlgorithm(HMACAlgorithm.SHA256)
+# user ids are int4 primary keys
+MAX_USER_ID = 2**31 - 1
+
+
 class UserService(BaseService):
     MODEL = User
 
     async def get_user(self, pk: int = None, username: str = None) -> User | None:
         """Get user by his primary key or username."""
         assert pk or username, 'One of "pk" or "username" must be provided'
+        if pk and not username:
+            user = await user_loader.load(pk)
+            if not user:
+                raise DoesNotExistException("User with provided data not found")
+            return await self.session.merge(user, load=False)
         filters = ()
         if pk:
             filters += (self.MODEL.id == pk,)
@@ -53,14 +68,50 @@ class UserService(BaseService):
         refresh_token = jwt.encode(refresh_payload, settings.SECRET_KEY, algorithm="HS256")
         return access_token, refresh_token
 
+    async def update(self, obj: User, values: dict) -> User:
+        """Update user in DB and drop his cached snapshot"""
+        obj = await super().update(obj, values)
+        auth_cache.invalidate_user(obj.id)
+        replica_router.stick(obj.id)
+        return obj
+
     async def verify_jwt_access_token(self, token: str) -> bool | User:
         """Verify the validity of a JWT token."""
+        cached = auth_cache.get_token(token)
+        if cached:
+            user_id, password = cached
+            if snapshot := auth_cache.get_user(user_id):
+                if snapshot.password != password:
+                    return False
+                return await self.session.merge(snapshot, load=False)
+            user = await self.get_user(user_id)
+            if user.password != password:
+                return False
+            auth_cache.set_user(user)
+            return user
+
         try:
-            raw_data = jwt.decode(token, algorithms=["HS256"], options={"verify_signature": False})
-            user = await self.get_user(raw_data["iss"])
-            jwt.decode(token, user.password, algorithms=["HS256"])
+            # the signing key is the user's password hash, so the token is decoded once without the signature
+            # check to get the user, and the signature is checked against the already decoded segments
+            decoded = jwt.api_jwt.decode_complete(
+                token,
+                algorithms=["HS256"],
+                options={"verify_signature": False, "verify_exp": True, "verify_nbf": True, "verify_iat": True},
+            )
+            if decoded["header"].get("alg") != "HS256":
+                return False
+            # the claim is not signed yet, it is checked before it joins the user lookups batched with other requests
+            user_id = decoded["payload"]["iss"]
+            if type(user_id) is not int or not 0 < user_id <= MAX_USER_ID:
+                return False
+            user = await self.get_user(user_id)
+            signing_input = token.rsplit(".", 1)[0].encode()
+            key = ACCESS_TOKEN_ALGORITHM.prepare_key(user.password)
+            if not ACCESS_TOKEN_ALGORITHM.verify(signing_input, key, decoded["signature"]):
+                return False
         except (jwt.ExpiredSignatureError, jwt.InvalidTokenError, KeyError):
             return False
+        auth_cache.set_token(token, decoded["payload"].get("exp", float("inf")), user)
         return user
 
     async def verify_jwt_refresh_token(self, token: str) -> bool:
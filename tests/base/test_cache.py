@@ -0,0 +1,62 @@
+from src.base.cache import LRUCache
+
+
+def test_get_set():
+    cache = LRUCache(10, sizeof=lambda value: 1)
+    assert cache.get("a") is None
+    cache.set("a", 1)
+    assert cache.get("a") == 1
+    stats = cache.stats()
+    assert (stats.hits, stats.misses, stats.items, stats.size) == (1, 1, 1, 1)
+
+
+def test_evicts_least_recently_used():
+    cache = LRUCache(3, sizeof=lambda value: 1)
+    for key in "abc":
+        cache.set(key, key)
+    cache.get("a")
+    cache.set("d", "d")
+    assert cache.get("b") is None
+    assert [cache.get(key) for key in "acd"] == ["a", "c", "d"]
+    assert cache.stats().evictions == 1
+
+
+def test_bounded_by_size_of_values():
+    cache = LRUCache(10, sizeof=len)
+    cache.set("a", "x" * 6)
+    cache.set("b", "x" * 6)
+    assert cache.get("a") is None
+    assert cache.size == 6
+    # a value larger than the whole cache is not cached and evicts nothing
+    cache.set("c", "x" * 11)
+    assert cache.get("c") is None
+    assert cache.get("b") == "x" * 6
+
+
+def test_replacing_value_updates_size():
+    cache = LRUCache(10, sizeof=len)
+    cache.set("a", "xx")
+    cache.set("a", "xxxx")
+    assert (len(cache), cache.size) == (1, 4)
+    assert cache.pop("a") == "xxxx"
+    assert (len(cache), cache.size) == (0, 0)
+
+
+def test_invalidate_group():
+    cache = LRUCache(100, sizeof=lambda value: 1, group=lambda key: key[0])
+    for key in [(1, "a"), (1, "b"), (2, "a")]:
+        cache.set(key, key)
+    assert cache.invalidate(1) == 2
+    assert cache.invalidate(1) == 0
+    assert cache.get((1, "a")) is None
+    assert cache.get((2, "a")) == (2, "a")
+    assert cache._groups == {2: {(2, "a")}}
+
+
+def test_eviction_drops_key_from_group():
+    cache = LRUCache(1, sizeof=lambda value: 1, group=lambda key: key[0])
+    cache.set((1, "a"), 1)
+    cache.set((2, "a"), 2)
+    assert cache._groups == {2: {(2, "a")}}
+    cache.clear()
+    assert (len(cache), cache.size, cache._groups) == (0, 0, {})
@@ -0,0 +1,64 @@
+import asyncio
+
+import pytest
+
+from src.base.group_commit import GroupCommitQueue
+
+
+pytestmark = pytest.mark.anyio
+
+
+class Writer:
+    """`commit_many` recording its groups, negative items fail, and all of them with a `fail` item"""
+
+    def __init__(self):
+        self.groups = []
+
+    async def __call__(self, items: list) -> list:
+        self.groups.append(items)
+        if "fail" in items:
+            raise RuntimeError("Commit failed")
+        return [ValueError(item) if item < 0 else item * 10 for item in items]
+
+
+async def test_commits_concurrent_items_together():
+    writer = Writer()
+    queue = GroupCommitQueue("test", writer, 100, 0.01)
+    queue.start()
+    assert await asyncio.gather(*(queue.submit(item) for item in range(5))) == [0, 10, 20, 30, 40]
+    await queue.close()
+    assert writer.groups == [[0, 1, 2, 3, 4]]
+    stats = queue.stats()
+    assert (stats.batches, stats.items, stats.errors) == (1, 5, 0)
+
+
+async def test_splits_groups_by_max_batch_size():
+    writer = Writer()
+    queue = GroupCommitQueue("test", writer, 2, 10)
+    queue.start()
+    assert await asyncio.wait_for(asyncio.gather(*(queue.submit(item) for item in range(4))), 1) == [0, 10, 20, 30]
+    await queue.close()
+    assert writer.groups == [[0, 1], [2, 3]]
+
+
+async def test_item_errors_are_raised_to_their_submitters():
+    writer = Writer()
+    queue = GroupCommitQueue("test", writer, 100, 0.01)
+    queue.start()
+    results = await asyncio.gather(queue.submit(1), queue.submit(-1), return_exceptions=True)
+    assert results[0] == 10 and isinstance(results[1], ValueError)
+    results = await asyncio.gather(queue.submit(2), queue.submit("fail"), return_exceptions=True)
+    assert all(isinstance(result, RuntimeError) for result in results)
+    await queue.close()
+    assert queue.stats().errors == 3
+
+
+async def test_close_commits_queued_items():
+    writer = Writer()
+    queue = GroupCommitQueue("test", writer, 100, 10)
+    queue.start()
+    submitted = asyncio.ensure_future(queue.submit(1))
+    await asyncio.sleep(0)
+    await asyncio.wait_for(queue.close(), 1)
+    assert await submitted == 10
+    assert not queue.running
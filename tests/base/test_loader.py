@@ -0,0 +1,96 @@
+import asyncio
+
+import pytest
+
+from src.base.loader import BatchLoader
+from src.conf.query_budget import QueryTracker
+from src.conf.query_budget import query_tracker
+
+
+pytestmark = pytest.mark.anyio
+
+
+class Lookup:
+    """`load_many` recording its batches, failing batches with keys that are not ints"""
+
+    def __init__(self):
+        self.batches = []
+
+    async def __call__(self, keys: list) -> dict:
+        self.batches.append(sorted(keys, key=str))
+        if any(not isinstance(key, int) for key in keys):
+            raise ValueError("Invalid key")
+        return {key: key * 10 for key in keys if key > 0}
+
+
+async def test_batches_concurrent_loads():
+    lookup = Lookup()
+    loader = BatchLoader(lookup, 0, 100)
+    assert await asyncio.gather(loader.load(1), loader.load(2), loader.load(1), loader.load(-1)) == [10, 20, 10, None]
+    assert lookup.batches == [[-1, 1, 2]]
+    stats = loader.stats()
+    assert (stats.batches, stats.keys, stats.largest_batch_size, stats.batch_sizes) == (1, 3, 3, {4: 1})
+
+
+async def test_dispatches_full_batch():
+    lookup = Lookup()
+    loader = BatchLoader(lookup, 10, 2)
+    assert await asyncio.wait_for(asyncio.gather(loader.load(1), loader.load(2)), 1) == [10, 20]
+    assert lookup.batches == [[1, 2]]
+
+
+async def test_waits_for_window():
+    lookup = Lookup()
+    loader = BatchLoader(lookup, 0.01, 100)
+
+    async def load_later(key: int) -> int:
+        await asyncio.sleep(0.001)
+        return await loader.load(key)
+
+    assert await asyncio.gather(loader.load(1), load_later(2)) == [10, 20]
+    assert lookup.batches == [[1, 2]]
+
+
+async def test_failing_key_fails_only_its_waiters():
+    lookup = Lookup()
+    loader = BatchLoader(lookup, 0, 100)
+    results = await asyncio.gather(loader.load(1), loader.load("x"), loader.load(2), return_exceptions=True)
+    assert results[0] == 10 and results[2] == 20
+    assert isinstance(results[1], ValueError)
+    assert lookup.batches[0] == [1, 2, "x"]
+    assert sorted(map(str, lookup.batches[1:])) == ["['x']", "[1]", "[2]"]
+    stats = loader.stats()
+    assert (stats.batches, stats.keys, stats.errors) == (1, 3, 2)
+
+
+async def test_cancelled_waiter_does_not_cancel_others():
+    lookup = Lookup()
+    loader = BatchLoader(lookup, 0.01, 100)
+    cancelled = asyncio.ensure_future(loader.load(1))
+    waiter = asyncio.ensure_future(loader.load(1))
+    await asyncio.sleep(0)
+    cancelled.cancel()
+    assert await waiter == 10
+
+
+async def test_charges_batch_statements_to_every_waiter_once():
+    batch_trackers = []
+
+    async def load_many(keys: list) -> dict:
+        # stands for the statement the engine records into the tracker of the current context
+        batch_trackers.append(query_tracker.get())
+        query_tracker.get().record("SELECT users", 0.5)
+        return {key: key for key in keys}
+
+    loader = BatchLoader(load_many, 0, 100)
+
+    async def request(keys: list) -> QueryTracker:
+        tracker = QueryTracker()
+        query_tracker.set(tracker)
+        await asyncio.gather(*(loader.load(key) for key in keys))
+        return tracker
+
+    trackers = await asyncio.gather(request([1, 2]), request([2, 3]))
+    assert len(batch_trackers) == 1 and batch_trackers[0] not in trackers
+    for tracker in trackers:
+        assert (tracker.statements, tracker.duration) == ({"SELECT users": 1}, 0.5)
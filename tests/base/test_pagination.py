@@ -0,0 +1,21 @@
+import pytest
+
+from src.base.pagination import decode_cursor
+from src.base.pagination import encode_cursor
+from src.conf.exceptions import BadRequestException
+
+
+@pytest.mark.parametrize(
+    "data",
+    [{}, {"id": 1}, {"created_at": "2024-12-16T19:55:28.823701", "id": 42, "desc": True}, {"total": "12.5", "id": 7}],
+)
+def test_round_trip(data):
+    cursor = encode_cursor(data)
+    assert "=" not in cursor and "+" not in cursor and "/" not in cursor
+    assert decode_cursor(cursor) == data
+
+
+@pytest.mark.parametrize("cursor", ["", "!!!", "bm90IGpzb24", encode_cursor([1, 2]), "W10"])
+def test_invalid_cursor(cursor):
+    with pytest.raises(BadRequestException):
+        decode_cursor(cursor)
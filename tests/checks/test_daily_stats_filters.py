@@ -0,0 +1,59 @@
+from datetime import date
+from types import SimpleNamespace
+
+import pytest
+
+from src.checks.schemas import FilterParams
+from src.checks.service import CheckService
+
+
+USER = SimpleNamespace(id=7)
+
+
+def stats_filters(**params) -> list[str] | None:
+    filters = CheckService._get_daily_stats_filters(USER, FilterParams(**params))
+    if filters is None:
+        return None
+    return [str(f.compile(compile_kwargs={"literal_binds": True})) for f in filters]
+
+
+@pytest.mark.parametrize(
+    "created_at_lte",
+    ["2024-12-16T23:59:59", "2024-12-16T23:59:59.5", "2024-12-16T23:59:59.999999"],
+)
+def test_whole_days(created_at_lte):
+    assert stats_filters(created_at_gte="2024-12-01T00:00:00", created_at_lte=created_at_lte, payment_type="card") == [
+        "check_daily_stats.user_id = 7",
+        "check_daily_stats.day >= '2024-12-01'",
+        "check_daily_stats.day <= '2024-12-16'",
+        "check_daily_stats.payment_type = 'card'",
+    ]
+
+
+def test_no_filters():
+    assert stats_filters() == ["check_daily_stats.user_id = 7"]
+
+
+@pytest.mark.parametrize(
+    "params",
+    [
+        {"created_at_gte": "2024-12-01T00:00:01"},
+        {"created_at_lte": "2024-12-16T23:59:58.999999"},
+        {"created_at_lte": "2024-12-16T12:00:00"},
+        {"created_at_gte": "2024-12-01T00:00:00+02:00"},
+        {"created_at_lte": "2024-12-16T23:59:59+02:00"},
+        {"total_gte": "10"},
+        {"total_lte": "10"},
+        {"product_name": "Milk"},
+    ],
+)
+def test_not_whole_days(params):
+    assert stats_filters(**params) is None
+
+
+def test_end_of_day_bound_extended():
+    # the checks listed and the counters then cover the same part of the day
+    params = FilterParams(created_at_lte="2024-12-16T23:59:59")
+    assert params.created_at_lte.date() == date(2024, 12, 16)
+    assert params.created_at_lte.microsecond == 999999
+    assert FilterParams(created_at_lte="2024-12-16T23:59:58").created_at_lte.second == 58
@@ -0,0 +1,80 @@
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+
+from src.checks.layout import ReceiptLayout
+from src.checks.models import PaymentTypeEnum
+
+
+def make_check(products: list[tuple[str, int, int, int]], payment_type=PaymentTypeEnum.cash, amount=10000, **user):
+    """Check of `(name, price, quantity, total)` products, amounts in kopecks and quantities in thousandths"""
+    total = sum(product[3] for product in products)
+    return SimpleNamespace(
+        user=SimpleNamespace(**{"first_name": "Іван", "last_name": "Петренко", "check_symbols": None} | user),
+        products=[
+            SimpleNamespace(name=name, price=price, quantity=quantity, total=total)
+            for name, price, quantity, total in products
+        ],
+        payment=SimpleNamespace(type=payment_type, amount=amount),
+        total=total,
+        rest=amount - total,
+        created_at=datetime(2024, 12, 16, 19, 55, 28, 823701),
+        comment="Дякуємо",
+    )
+
+
+def test_render():
+    check = make_check([("Milk", 1250, 2000, 2500), ("Cheese", 1000, 125, 125)])
+    assert ReceiptLayout.for_width(30).render(check) == [
+        "      ФОП Петренко Іван      ",
+        "=" * 30,
+        "Milk                          ",
+        "2 x 12.5               = 25.00",
+        "-" * 30,
+        "Cheese                        ",
+        "0.125 x 10              = 1.25",
+        "=" * 30,
+        "Сума                     26.25",
+        "Готівка                 100.00",
+        "Решта                    73.75",
+        "=" * 30,
+        "     Дякуємо за покупку!     ",
+        "     2024-12-16 19:55:28     ",
+        "           Дякуємо           ",
+    ]
+
+
+def test_card_payment_label():
+    lines = ReceiptLayout.for_width(30).render(make_check([("Milk", 1250, 2000, 2500)], PaymentTypeEnum.card))
+    assert "Картка                  100.00" in lines
+    assert not any(line.startswith("Готівка") for line in lines)
+
+
+def test_wraps_long_lines():
+    # the name is split to leave room for the total, the price formation word by word
+    check = make_check([("A very long product name that does not fit", 123456789, 1234567, 152415776)])
+    assert ReceiptLayout.for_width(20).render(check)[2:12] == [
+        "A very l",
+        "ong prod",
+        "uct name",
+        " that do",
+        "es not f",
+        "it",
+        "1234.567",
+        "x",
+        "1234567.",
+        "89      = 1524157.76",
+    ]
+
+
+def test_wraps_long_header():
+    lines = ReceiptLayout.for_width(16).render(make_check([], first_name="Олександра", last_name="Костянтинопольська"))
+    assert lines[:5] == ["      ФОП      ", "Костянтинопольсь", "       ка       ", "   Олександра   ", "=" * 16]
+
+
+@pytest.mark.parametrize("products_count", [0, 1, 3, 7])
+def test_iter_lines_matches_render(products_count):
+    check = make_check([(f"Product {i}", 100 * i, 1000, 100 * i) for i in range(products_count)])
+    layout = ReceiptLayout.for_width(32)
+    assert list(layout.iter_lines(check, chunk_size=3)) == layout.render(check)
@@ -0,0 +1,110 @@
+from decimal import Decimal
+
+import pytest
+
+from pydantic import BaseModel
+from pydantic import ValidationError
+
+from src.checks.money import MONEY_LIMIT
+from src.checks.money import MONEY_PLACES
+from src.checks.money import QUANTITY_PLACES
+from src.checks.money import Money
+from src.checks.money import MoneyInput
+from src.checks.money import Quantity
+from src.checks.money import QuantityInput
+from src.checks.money import format_amount
+from src.checks.money import format_minor
+from src.checks.money import format_money
+from src.checks.money import format_quantity
+from src.checks.money import product_total
+from src.checks.money import to_decimal
+from src.checks.money import to_minor
+
+
+class Amounts(BaseModel):
+    price: MoneyInput
+    quantity: QuantityInput
+
+
+class FormattedAmounts(BaseModel):
+    price: Money
+    quantity: Quantity
+
+
+@pytest.mark.parametrize(
+    "value, expected",
+    [
+        ("12.35", 1235),
+        ("12.3", 1230),
+        ("12", 1200),
+        (12, 1200),
+        (12.35, 1235),
+        (0.1, 10),
+        ("-0.01", -1),
+        (Decimal("1E+2"), 10000),
+        ("12.350", 1235),
+    ],
+)
+def test_to_minor(value, expected):
+    assert to_minor(value, MONEY_PLACES, MONEY_LIMIT) == expected
+
+
+@pytest.mark.parametrize("value", ["12.345", 0.001, "abc", "NaN", "Infinity", True, None, "1E+100000"])
+def test_to_minor_rejects(value):
+    with pytest.raises(ValueError):
+        to_minor(value, MONEY_PLACES, MONEY_LIMIT)
+
+
+def test_to_minor_limit():
+    assert to_minor("10000000000", MONEY_PLACES, MONEY_LIMIT) == MONEY_LIMIT
+    with pytest.raises(ValueError, match="must not exceed 10000000000.00"):
+        to_minor("10000000000.01", MONEY_PLACES, MONEY_LIMIT)
+
+
+@pytest.mark.parametrize(
+    "price, quantity, expected",
+    [
+        (1235, 1500, 1853),  # 18.525 rounded half up
+        (1235, 1000, 1235),
+        (1, 1, 0),
+        (1, 500, 1),
+        (999, 333, 333),  # 332.667
+        (0, 1000, 0),
+    ],
+)
+def test_product_total(price, quantity, expected):
+    assert product_total(price, quantity) == expected
+
+
+@pytest.mark.parametrize("value", [0, 1, 5, 10, 99, 100, 1230, 1235, 123456789, -1, -1230])
+def test_format_money(value):
+    assert format_money(value) == format_minor(value, MONEY_PLACES)
+    assert Decimal(format_money(value)) == to_decimal(value, MONEY_PLACES)
+
+
+@pytest.mark.parametrize(
+    "value, expected",
+    [(0, "0"), (1, "0.01"), (10, "0.1"), (1200, "12"), (1250, "12.5"), (1235, "12.35"), (-1250, "-12.5")],
+)
+def test_format_amount(value, expected):
+    assert format_amount(value) == expected
+
+
+@pytest.mark.parametrize(
+    "value, expected",
+    [(0, "0"), (1, "0.001"), (125, "0.125"), (1500, "1.5"), (2000, "2"), (-1500, "-1.5")],
+)
+def test_format_quantity(value, expected):
+    assert format_quantity(value) == expected
+    assert Decimal(expected) == to_decimal(value, QUANTITY_PLACES)
+
+
+def test_round_trip_through_schemas():
+    amounts = Amounts(price="12.50", quantity=2)
+    assert (amounts.price, amounts.quantity) == (1250, 2000)
+    assert FormattedAmounts(**amounts.model_dump()).model_dump(mode="json") == {"price": "12.5", "quantity": "2"}
+
+
+def test_schema_rejects_extra_places():
+    with pytest.raises(ValidationError, match="At most 3 decimal places"):
+        Amounts(price="1", quantity="0.0001")
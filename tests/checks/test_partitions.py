@@ -0,0 +1,171 @@
+from datetime import date
+from datetime import datetime
+
+import pytest
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from src.checks.partitions import PARTITIONED_TABLES
+from src.checks.partitions import add_months
+from src.checks.partitions import create_partitions
+from src.checks.partitions import detach_partitions
+from src.checks.partitions import get_partitions
+from src.checks.partitions import partition_month
+from src.checks.partitions import partition_name
+
+
+CURRENT_MONTH = datetime.now(tz=None).date().replace(day=1)
+OLD_MONTH = add_months(CURRENT_MONTH, -24)
+
+
+@pytest.mark.parametrize(
+    "month, months, expected",
+    [
+        (date(2024, 1, 1), 1, date(2024, 2, 1)),
+        (date(2024, 12, 15), 1, date(2025, 1, 1)),
+        (date(2024, 1, 1), -1, date(2023, 12, 1)),
+        (date(2024, 3, 31), -27, date(2021, 12, 1)),
+    ],
+)
+def test_add_months(month, months, expected):
+    assert add_months(month, months) == expected
+
+
+def test_partition_month():
+    assert partition_month(partition_name("check_products", date(2024, 3, 1))) == date(2024, 3, 1)
+    assert partition_month("check_products_p2024") is None
+    assert partition_month("users_p202403") is None
+
+
+async def insert_check(connection: AsyncConnection, user_id: int, created_at: datetime) -> int:
+    """Check with a product and a payment, counted in the rollups, created at `created_at`"""
+    name_id = await connection.scalar(
+        text(
+            """
+            INSERT INTO product_names (name, updated_at) VALUES ('Milk', now())
+            ON CONFLICT (name) DO UPDATE SET name = excluded.name
+            RETURNING id
+            """
+        )
+    )
+    values = {"user_id": user_id, "created_at": created_at, "name_id": name_id}
+    check_id = await connection.scalar(
+        text(
+            """
+            INSERT INTO checks (user_id, total, rest, payment_type, paid_amount, products_count, created_at, updated_at)
+            VALUES (:user_id, 1250, 0, 'cash', 1250, 1, :created_at, now())
+            RETURNING id
+            """
+        ),
+        values,
+    )
+    values["check_id"] = check_id
+    await connection.execute(
+        text(
+            """
+            INSERT INTO check_products (name_id, price, quantity, total, check_id, check_created_at, updated_at)
+            VALUES (:name_id, 1250, 1000, 1250, :check_id, :created_at, now())
+            """
+        ),
+        values,
+    )
+    await connection.execute(
+        text(
+            """
+            INSERT INTO check_payments (type, amount, check_id, check_created_at, updated_at)
+            VALUES ('cash', 1250, :check_id, :created_at, now())
+            """
+        ),
+        values,
+    )
+    for table, column, period in (("check_daily_stats", "day", "day"), ("check_monthly_stats", "month", "month")):
+        await connection.execute(
+            text(
+                f"""
+                INSERT INTO {table} (user_id, {column}, payment_type, checks_count, total_amount, updated_at)
+                VALUES (:user_id, CAST(date_trunc('{period}', CAST(:created_at AS timestamp)) AS date), 'cash', 1, 1250,
+                    now())
+                ON CONFLICT (user_id, {column}, payment_type) DO UPDATE SET
+                    checks_count = {table}.checks_count + 1, total_amount = {table}.total_amount + 1250
+                """
+            ),
+            values,
+        )
+    return check_id
+
+
+@pytest.fixture
+async def user_id(engine: AsyncEngine):
+    """User with a check of `OLD_MONTH` in partitions of their own, and a check of the current month"""
+    async with engine.begin() as connection:
+        for table in PARTITIONED_TABLES:
+            await connection.execute(
+                text(
+                    f"CREATE TABLE {partition_name(table, OLD_MONTH)} PARTITION OF {table} "
+                    f"FOR VALUES FROM ('{OLD_MONTH}') TO ('{add_months(OLD_MONTH, 1)}')"
+                )
+            )
+        user_id = await connection.scalar(
+            text("INSERT INTO users (username, password, updated_at) VALUES ('partitions', '', now()) RETURNING id")
+        )
+        await insert_check(connection, user_id, datetime.combine(OLD_MONTH, datetime.min.time()).replace(hour=12))
+        await insert_check(connection, user_id, datetime.now(tz=None))
+    yield user_id
+    async with engine.begin() as connection:
+        for table in reversed(PARTITIONED_TABLES):
+            await connection.execute(text(f"DROP TABLE IF EXISTS {partition_name(table, OLD_MONTH)}"))
+        await connection.execute(
+            text(
+                "TRUNCATE check_products, check_payments, checks, check_daily_stats, check_monthly_stats, "
+                "product_names, users"
+            )
+        )
+
+
+@pytest.mark.db
+@pytest.mark.anyio
+async def test_create_partitions(engine: AsyncEngine):
+    assert await create_partitions(engine, 3) == []
+    created = await create_partitions(engine, 30)
+    async with engine.connect() as connection:
+        partitions = await get_partitions(connection)
+    for table in PARTITIONED_TABLES:
+        assert partition_name(table, add_months(CURRENT_MONTH, 30)) in created
+        assert {add_months(CURRENT_MONTH, offset) for offset in range(31)} <= set(partitions[table])
+
+
+@pytest.mark.db
+@pytest.mark.anyio
+async def test_detach_partitions(engine: AsyncEngine, user_id: int):
+    detached = await detach_partitions(engine, add_months(OLD_MONTH, 1))
+    assert detached == [partition_name(table, OLD_MONTH) for table in reversed(PARTITIONED_TABLES)]
+    async with engine.connect() as connection:
+        assert OLD_MONTH not in (await get_partitions(connection))["checks"]
+        assert await connection.scalar(text("SELECT count(*) FROM checks")) == 1
+        # detached tables stay standalone, without the foreign keys to the attached checks
+        assert await connection.scalar(text(f"SELECT count(*) FROM {partition_name('checks', OLD_MONTH)}")) == 1
+        foreign_keys = await connection.scalar(
+            text(
+                "SELECT count(*) FROM pg_constraint "
+                "WHERE conrelid = CAST(:name AS regclass) AND contype = 'f' AND confrelid = 'checks'::regclass"
+            ),
+            {"name": partition_name("check_products", OLD_MONTH)},
+        )
+        assert foreign_keys == 0
+        # the rollups only count the checks of the attached months
+        for table in ("check_daily_stats", "check_monthly_stats"):
+            assert await connection.scalar(text(f"SELECT sum(checks_count) FROM {table}")) == 1
+    assert await detach_partitions(engine, add_months(OLD_MONTH, 1)) == []
+
+
+@pytest.mark.db
+@pytest.mark.anyio
+async def test_drop_partitions(engine: AsyncEngine, user_id: int):
+    dropped = await detach_partitions(engine, add_months(OLD_MONTH, 1), drop=True)
+    assert len(dropped) == len(PARTITIONED_TABLES)
+    async with engine.connect() as connection:
+        for name in dropped:
+            assert await connection.scalar(text("SELECT to_regclass(:name)"), {"name": name}) is None
+        assert await connection.scalar(text("SELECT count(*) FROM checks")) == 1
@@ -0,0 +1,61 @@
+import pytest
+
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+from src.conf.db import STICKY_COOKIE
+from src.conf.db import replica_router
+from src.conf.middlewares import StickyReadsMiddleware
+
+
+async def endpoint(request: Request) -> JSONResponse:
+    user_id = int(request.path_params["user_id"])
+    if request.method == "POST":
+        replica_router.stick(user_id)
+    return JSONResponse({"sticky": replica_router.is_sticky(user_id)})
+
+
+@pytest.fixture
+def client():
+    replicas, stickiness = replica_router.replicas, replica_router.stickiness
+    replica_router.configure([object()], 5)
+    app = Starlette(routes=[Route("/{user_id}", endpoint, methods=["GET", "POST"])])
+    app.add_middleware(StickyReadsMiddleware)
+    yield TestClient(app)
+    replica_router.configure(replicas, stickiness)
+
+
+def test_cookie_sticks_reads_of_the_writer(client):
+    assert client.get("/1").json() == {"sticky": False}
+    response = client.post("/1")
+    assert response.json() == {"sticky": True}
+    assert "Max-Age=5" in response.headers["set-cookie"]
+    # the cookie is all the next request needs, whichever worker serves it
+    assert client.get("/1").json() == {"sticky": True}
+    assert client.get("/2").json() == {"sticky": False}
+    assert "set-cookie" not in client.get("/1").headers
+
+
+def flip_last(value: str) -> str:
+    return value[:-1] + ("1" if value.endswith("0") else "0")
+
+
+def other_user(value: str) -> str:
+    return "2" + value
+
+
+@pytest.mark.parametrize("forge", [flip_last, other_user])
+def test_forged_cookie_is_ignored(client, forge):
+    client.post("/1")
+    client.cookies[STICKY_COOKIE] = forge(client.cookies[STICKY_COOKIE])
+    assert client.get("/1").json() == {"sticky": False}
+    assert client.get("/21").json() == {"sticky": False}
+
+
+def test_expired_cookie_is_ignored(client):
+    replica_router.stickiness = -1
+    client.post("/1")
+    assert client.get("/1").json() == {"sticky": False}
@@ -0,0 +1,74 @@
+import os
+
+
+# settings are read on import, the tests marked with `db` connect to the configured server
+for name, value in (
+    ("ENV", "TESTING"),
+    ("DATABASE_ADMIN_USER", "postgres"),
+    ("DATABASE_ADMIN_PASSWORD", "postgres"),
+    ("DATABASE_NAME", "fiscal"),
+    ("DATABASE_USER", "postgres"),
+    ("DATABASE_PASSWORD", "postgres"),
+    ("DATABASE_HOST", "localhost"),
+):
+    os.environ.setdefault(name, value)
+
+import pytest
+
+from alembic.config import Config
+from sqlalchemy import create_engine
+from sqlalchemy import exc
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from alembic import command
+from src.conf.settings import settings
+
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture
+def anyio_backend() -> str:
+    return "asyncio"
+
+
+@pytest.fixture(scope="session")
+def database() -> str:
+    """
+    Name of a database created for the test session and migrated to the head revision.
+
+    The configured database name gets the `_test` suffix, the database is dropped once the session ends.
+    """
+    name, separator, options = settings.DATABASE_NAME.partition("?")
+    test_name = f"{name}_test{separator}{options}"
+    admin_engine = create_engine(
+        f"postgresql://{settings.DATABASE_ADMIN_USER}:{settings.DATABASE_ADMIN_PASSWORD}@{settings.DATABASE_HOST}/"
+        f"postgres{separator}{options}",
+        isolation_level="AUTOCOMMIT",
+    )
+    try:
+        with admin_engine.connect() as connection:
+            if not connection.scalar(text("SELECT count(*) FROM pg_available_extensions WHERE name = 'pg_trgm'")):
+                pytest.skip("The pg_trgm extension the migrations need is not available")
+            connection.execute(text(f'DROP DATABASE IF EXISTS "{name}_test"'))
+            connection.execute(text(f'CREATE DATABASE "{name}_test" OWNER "{settings.DATABASE_USER}"'))
+    except exc.OperationalError:
+        pytest.skip("The database server is not available")
+
+    configured_name, settings.DATABASE_NAME = settings.DATABASE_NAME, test_name
+    try:
+        command.upgrade(Config(os.path.join(BASE_DIR, "alembic.ini")), "head")
+        yield test_name
+    finally:
+        settings.DATABASE_NAME = configured_name
+        with admin_engine.connect() as connection:
+            connection.execute(text(f'DROP DATABASE IF EXISTS "{name}_test" WITH (FORCE)'))
+        admin_engine.dispose()
+
+
+@pytest.fixture
+async def engine(database: str):
+    engine = create_async_engine(settings.sqlalchemy_database_uri)
+    yield engine
+    await engine.dispose()
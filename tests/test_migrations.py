@@ -0,0 +1,94 @@
+import os
+
+import pytest
+
+from alembic.config import Config
+from sqlalchemy import create_engine
+from sqlalchemy import text
+
+from alembic import command
+from src.conf.settings import settings
+
+
+pytestmark = pytest.mark.db
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# the revision before src.checks.money, amounts were numeric
+BEFORE_INTEGER_MONEY = "aa47a982be90"
+
+
+@pytest.fixture
+def config(database: str) -> Config:
+    return Config(os.path.join(BASE_DIR, "alembic.ini"))
+
+
+def test_models_match_migrations(config: Config):
+    command.check(config)
+
+
+def test_downgrade_and_upgrade(config: Config):
+    command.downgrade(config, "base")
+    command.upgrade(config, "head")
+    command.check(config)
+
+
+def test_integer_money(config: Config):
+    command.downgrade(config, BEFORE_INTEGER_MONEY)
+    engine = create_engine(settings.sync_sqlalchemy_database_uri)
+    try:
+        with engine.begin() as connection:
+            user_id = connection.scalar(
+                text("INSERT INTO users (username, password, updated_at) VALUES ('money', '', now()) RETURNING id")
+            )
+            name_id = connection.scalar(
+                text("INSERT INTO product_names (name, updated_at) VALUES ('Milk', now()) RETURNING id")
+            )
+            check = connection.execute(
+                text(
+                    """
+                    INSERT INTO checks (user_id, total, rest, payment_type, paid_amount, products_count, updated_at)
+                    VALUES (:user_id, 18.525, 81.475, 'cash', 100, 1, now())
+                    RETURNING id, created_at
+                    """
+                ),
+                {"user_id": user_id},
+            ).one()
+            connection.execute(
+                text(
+                    """
+                    INSERT INTO check_products (name_id, price, quantity, total, check_id, check_created_at, updated_at)
+                    VALUES (:name_id, 12.35, 1.5, 18.525, :id, :created_at, now())
+                    """
+                ),
+                {"name_id": name_id, "id": check.id, "created_at": check.created_at},
+            )
+            connection.execute(
+                text(
+                    """
+                    INSERT INTO check_daily_stats (user_id, day, payment_type, checks_count, total_amount, updated_at)
+                    VALUES (:user_id, CAST(:created_at AS date), 'cash', 1, 18.525, now())
+                    """
+                ),
+                {"user_id": user_id, "created_at": check.created_at},
+            )
+
+        command.upgrade(config, "head")
+
+        with engine.connect() as connection:
+            # 1235 kopecks by 1500 thousandths is 1852.5, rounded half up
+            assert connection.execute(text("SELECT price, quantity, total FROM check_products")).one() == (
+                1235,
+                1500,
+                1853,
+            )
+            assert connection.execute(text("SELECT total, rest, paid_amount FROM checks")).one() == (1853, 8147, 10000)
+            assert connection.scalar(text("SELECT total_amount FROM check_daily_stats")) == 1853
+    finally:
+        with engine.begin() as connection:
+            connection.execute(
+                text(
+                    "TRUNCATE check_products, check_payments, checks, check_daily_stats, check_monthly_stats, "
+                    "product_names, users"
+                )
+            )
+        engine.dispose()